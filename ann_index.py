@@ -0,0 +1,228 @@
+# ann_index.py
+# -----------------------------------------------------------------------------
+# Approximate nearest-neighbour index over competency embeddings (IVF, numpy).
+#
+# Brute-force cosine against every competency is fine for the 35 rows of
+# data/competencies.csv, not for ESCO / O*NET sized taxonomies (tens of
+# thousands of rows, and one query per answer in "max" mode). The IVF index:
+#   - clusters the unit-normalized competency vectors with spherical k-means
+#     into n_lists inverted lists,
+#   - at query time scores the query against the centroids, opens the
+#     `nprobe` closest lists and ranks only their members.
+# Pure numpy (no faiss / hnswlib), CPU only. The index is saved next to the
+# cached competency embeddings (.cache/embeddings/<model>/competencies.ivf.npz)
+# with a signature of the catalog, so it is rebuilt only when that changes.
+#
+# Recall@N vs brute force, to pick n_lists / nprobe:
+#   python ann_index.py --report                    # cached competency embeddings
+#   python ann_index.py --report --synthetic 50000  # random clustered catalog
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+KMEANS_ITERS = 10
+NPROBE = 8
+SEED = 0
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def default_n_lists(n: int) -> int:
+    """~4 * sqrt(n) lists, the usual IVF rule of thumb."""
+    return max(1, min(n, int(4 * np.sqrt(n))))
+
+
+def _spherical_kmeans(X: np.ndarray, k: int, iters: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Centroids (k x d, unit norm) and assignment of each row of X (unit norm)."""
+    rng = np.random.default_rng(seed)
+    C = X[rng.choice(len(X), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _argmax_sim(X, C)
+        sums = np.zeros_like(C)
+        np.add.at(sums, assign, X)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        if empty.any():  # re-seed empty lists on random points
+            sums[empty] = X[rng.choice(len(X), size=int(empty.sum()), replace=False)]
+        C = _normalize(sums)
+    return C, _argmax_sim(X, C)
+
+
+def _argmax_sim(X: np.ndarray, C: np.ndarray, chunk: int = 4096) -> np.ndarray:
+    return np.concatenate([np.argmax(X[i:i + chunk] @ C.T, axis=1) for i in range(0, len(X), chunk)])
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit-normalized vectors (cosine = dot product).
+
+    Attributes
+    ----------
+    vectors : (n x d) float32, normalized, stored grouped by list
+    ids : (n,) original row of each stored vector
+    offsets : (n_lists + 1,) list i = vectors[offsets[i]:offsets[i + 1]]
+    centroids : (n_lists x d)
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, ids: np.ndarray,
+                 offsets: np.ndarray, signature: str = ""):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.signature = signature
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, vectors, n_lists: int | None = None, iters: int = KMEANS_ITERS,
+              seed: int = SEED, signature: str = "") -> "IVFIndex":
+        X = _normalize(vectors)
+        k = n_lists or default_n_lists(len(X))
+        C, assign = _spherical_kmeans(X, min(k, len(X)), iters, seed)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(C)))])
+        return cls(C, X[order], order.astype(np.int64), offsets.astype(np.int64), signature)
+
+    def search(self, queries, top_n: int = 10, nprobe: int = NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-N by cosine for each query.
+
+        Returns (ids, scores), both (n_queries x top_n), best first. Rows with
+        fewer than top_n candidates are padded with id -1 / score -inf.
+        """
+        Q = _normalize(np.atleast_2d(queries))
+        nprobe = min(nprobe, len(self.centroids))
+        probes = np.argpartition(-(Q @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        out_ids = np.full((len(Q), top_n), -1, dtype=np.int64)
+        out_scores = np.full((len(Q), top_n), -np.inf, dtype=np.float32)
+        for qi, q in enumerate(Q):
+            rows = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes[qi]])
+            if not len(rows):
+                continue
+            sims = self.vectors[rows] @ q
+            k = min(top_n, len(rows))
+            best = np.argpartition(-sims, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-sims[best])]
+            out_ids[qi, :k] = self.ids[rows[best]]
+            out_scores[qi, :k] = sims[best]
+        return out_ids, out_scores
+
+    # ------------------------------------------------------------------ I/O
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, centroids=self.centroids, vectors=self.vectors, ids=self.ids,
+                     offsets=self.offsets, signature=np.array(self.signature))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, signature: str | None = None) -> "IVFIndex | None":
+        """Saved index, or None if missing, unreadable or built for another catalog."""
+        try:
+            with np.load(path) as z:
+                sig = str(z["signature"])
+                if signature is not None and sig != signature:
+                    return None
+                return cls(z["centroids"], z["vectors"], z["ids"], z["offsets"], sig)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def brute_force_topn(vectors, queries, top_n: int) -> np.ndarray:
+    """Exact top-N ids by cosine (reference for recall)."""
+    S = _normalize(np.atleast_2d(queries)) @ _normalize(vectors).T
+    k = min(top_n, S.shape[1])
+    part = np.argpartition(-S, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(part, np.argsort(-np.take_along_axis(S, part, axis=1), axis=1), axis=1)
+
+
+def recall_report(vectors, queries, top_ns: List[int] = (10, 50, 200),
+                  n_lists: List[int] | None = None, nprobes: List[int] = (1, 4, 8, 16, 32)) -> Dict:
+    """Recall@N and query time of every (n_lists, nprobe) against brute force."""
+    vectors, queries = _normalize(vectors), _normalize(queries)
+    n_lists = list(n_lists or [default_n_lists(len(vectors))])
+    max_n = max(top_ns)
+
+    t0 = time.perf_counter()
+    exact = brute_force_topn(vectors, queries, max_n)
+    brute_ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+
+    rows = []
+    for nl in n_lists:
+        t0 = time.perf_counter()
+        index = IVFIndex.build(vectors, n_lists=nl)
+        build_s = time.perf_counter() - t0
+        for nprobe in nprobes:
+            if nprobe > nl:
+                continue
+            t0 = time.perf_counter()
+            ids, _ = index.search(queries, top_n=max_n, nprobe=nprobe)
+            query_ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+            row = {"n_lists": nl, "nprobe": nprobe, "build_seconds": build_s, "query_ms": query_ms}
+            for n in top_ns:
+                hits = [len(set(a[:n]) & set(b[:n])) / min(n, exact.shape[1]) for a, b in zip(ids, exact)]
+                row[f"recall@{n}"] = float(np.mean(hits))
+            rows.append(row)
+            print("  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+    return {"n_vectors": len(vectors), "n_queries": len(queries), "brute_force_query_ms": brute_ms,
+            "results": rows}
+
+
+def _synthetic(n: int, d: int = 768, n_queries: int = 200, seed: int = SEED):
+    """Clustered random catalog + queries near catalog points (taxonomy-like)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 50), d)).astype(np.float32)
+    X = centers[rng.integers(len(centers), size=n)] + 0.5 * rng.normal(size=(n, d)).astype(np.float32)
+    Q = X[rng.integers(n, size=n_queries)] + 0.5 * rng.normal(size=(n_queries, d)).astype(np.float32)
+    return X, Q
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IVF competency index: recall@N vs brute force.")
+    parser.add_argument("--report", action="store_true")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N random catalog vectors")
+    parser.add_argument("--n-lists", type=int, nargs="+", default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--top-n", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--out", type=Path, default=Path("outputs") / "results" / "ann_recall.json")
+    args = parser.parse_args()
+    if not args.report:
+        parser.print_help()
+        raise SystemExit(0)
+
+    if args.synthetic:
+        X, Q = _synthetic(args.synthetic)
+    else:
+        import semantic_engine as engine
+        from embedding_store import AnswerCache, EmbeddingStore
+        from encoder_backends import model_key
+
+        key = model_key(engine.MODEL_NAME, engine.ENCODER_BACKEND)
+        store = EmbeddingStore(key, "competencies", engine.CACHE_DIR)
+        answers = AnswerCache(key, engine.CACHE_DIR)
+        if not store.npy_path.exists() or answers._disk is None:
+            raise SystemExit("No cached embeddings yet: run the engine once, or use --synthetic N.")
+        X, Q = np.load(store.npy_path), np.asarray(answers._disk)
+
+    report = recall_report(X, Q, args.top_n, args.n_lists, args.nprobe)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Brute force: {report['brute_force_query_ms']:.2f} ms/query. Report written to {args.out}")
@@ -5,12 +5,9 @@ import requests
 import base64
 import json
 
-# importe ta page de visu si le module existe
-try:
-    from viz_page import show_visualisations
-    HAS_VIZ = True
-except Exception:
-    HAS_VIZ = False
+# importe ta page de visu si le module existe (import réel seulement si la page est choisie)
+import importlib.util
+HAS_VIZ = importlib.util.find_spec("viz_page") is not None
 
 # --- Navigation ---
 pages = ["Accueil"]
@@ -21,6 +18,7 @@ choice = st.sidebar.radio("Navigation", pages, index=0)
 
 # --- Si on choisit Visualisations : on affiche et on S'ARRÊTE ---
 if HAS_VIZ and choice == "Visualisations":
+    from viz_page import show_visualisations
     show_visualisations()
     st.stop()  # ⬅️ empêche tout le code en dessous (le formulaire) de s'exécuter
 
@@ -88,6 +86,47 @@ GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN", "")
 GITHUB_REPO = "Amik24/semantic-analysis-project"  # ✅ Ton dépôt GitHub
 FILE_PATH = "data/user_responses.csv"             # ✅ Chemin du fichier CSV
 
+# Optional resident scoring service (python scoring_service.py), e.g. "http://127.0.0.1:8765".
+# When set, results are shown right after submission instead of after the CI run.
+SCORING_SERVICE_URL = st.secrets.get("SCORING_SERVICE_URL", "")
+
+def score_with_service(new_response):
+    """Ask the scoring service for this submission's results (None if unavailable)."""
+    if not SCORING_SERVICE_URL:
+        return None
+    try:
+        r = requests.post(f"{SCORING_SERVICE_URL.rstrip('/')}/score",
+                          json={"response": new_response}, timeout=30)
+        if r.status_code == 200:
+            return r.json()
+    except requests.RequestException:
+        pass
+    return None
+
+# Where submissions go: "github" (read-modify-write of FILE_PATH through the
+# GitHub API) or "local" (one atomic append to an SQLite store; export it to
+# the CSV with `python submission_store.py export`).
+SUBMISSION_BACKEND = st.secrets.get("SUBMISSION_BACKEND", "github")
+SUBMISSIONS_DB = st.secrets.get("SUBMISSIONS_DB", "data/submissions.db")
+
+@st.cache_resource
+def get_submission_store():
+    from submission_store import SubmissionStore
+    return SubmissionStore(SUBMISSIONS_DB)
+
+def append_to_local_store(new_response):
+    try:
+        get_submission_store().append(new_response)
+        return True
+    except Exception as e:
+        st.error(f"❌ Exception occurred: {str(e)}")
+        return False
+
+def submit_response(new_response):
+    if SUBMISSION_BACKEND == "local":
+        return append_to_local_store(new_response)
+    return append_to_github_csv(new_response)
+
 def append_to_github_csv(new_response):
     if not GITHUB_TOKEN:
         st.error("❌ GitHub token not configured. Please add it to Streamlit secrets.")
@@ -223,16 +262,24 @@ with st.form("skills_form"):
                 "Reflection": reflection_text
             }
 
-            with st.spinner("Saving your responses to GitHub..."):
-                success = append_to_github_csv(responses)
+            target = "GitHub" if SUBMISSION_BACKEND != "local" else "the response store"
+            with st.spinner(f"Saving your responses to {target}..."):
+                success = submit_response(responses)
 
             if success:
-                st.success(f"✅ Thank you {first_name}! Your responses have been submitted successfully to GitHub.")
+                st.success(f"✅ Thank you {first_name}! Your responses have been submitted successfully to {target}.")
                 st.balloons()
                 st.markdown("### 📋 Your Submitted Responses:")
                 df = pd.DataFrame([responses])
                 st.dataframe(df)
+
+                result = score_with_service(responses)
+                if result and result.get("top_job"):
+                    st.markdown("### 🎯 Your Results:")
+                    st.metric("Recommended job", result["top_job"],
+                              f"score {result['top_job_score']:.2f}")
+                    st.dataframe(pd.DataFrame(result["top_competencies"]))
             else:
-                st.error("❌ Failed to save responses to GitHub. Please try again or contact support.")
+                st.error(f"❌ Failed to save responses to {target}. Please try again or contact support.")
 
 
@@ -0,0 +1,301 @@
+# benchmark.py
+# -----------------------------------------------------------------------------
+# Stage-by-stage benchmark of the scoring pipeline on synthetic data.
+#
+# Generates a user_responses.csv-like frame, a competency catalog and jobs at
+# the requested scale, then times every stage of semantic_engine.main():
+#   ingest            text assembly (_responses_from_frame)
+#   model_load        encoder load
+#   encode_responses  / encode_competencies
+#   score_pooled      pooled profile vs every competency
+#   score_respondents respondent x competency matrix
+#   job_scoring       JobMatrix Top-K + mean for every respondent
+#   tables            per-respondent long tables (respondent_tables)
+#   write             pooled + per-respondent outputs (to a temp folder)
+# with throughput (items/s) and the process peak RSS after each stage
+# (--trace-memory adds the tracemalloc peak of each stage, at a large cost in
+# speed for the pandas-heavy stages).
+#
+# --encoder stub (default) replaces the model with a deterministic hashing
+# encoder, so the benchmark runs offline and measures everything but the
+# model; --encoder model uses MODEL_NAME / ENCODER_BACKEND.
+#
+#   python benchmark.py --scale small
+#   python benchmark.py --respondents 100000 --competencies 2000 --jobs 200
+#   python benchmark.py --compare old.json new.json
+#
+# Results go to outputs/results/benchmarks/<scale>-<commit>.json.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from run_metrics import peak_rss_mb
+
+# (respondents, competencies, jobs)
+SCALES = {
+    "tiny": (10, 35, 12),
+    "small": (1_000, 35, 12),
+    "medium": (100_000, 35, 12),
+    "large": (1_000_000, 35, 12),
+    "taxonomy": (2_000, 50_000, 2_000),
+}
+BENCH_DIR = Path("outputs") / "results" / "benchmarks"
+# Per-respondent long tables are skipped above this many (respondent,
+# competency) rows: they would not fit in memory at taxonomy scale.
+MAX_TABLE_ROWS = 50_000_000
+SEED = 0
+
+_WORDS = ("python pandas numpy sql spark airflow docker git model regression classification "
+          "clustering nlp transformer embeddings pipeline dashboard report api cloud testing "
+          "statistics visualisation streamlit scikit-learn pytorch etl kafka feature deployment").split()
+
+
+# ------------------------------- Synthetic data -------------------------------
+
+def _sentences(rng: np.random.Generator, n: int, words: int = 12) -> np.ndarray:
+    """n random sentences drawn from a small technical vocabulary."""
+    picks = rng.integers(len(_WORDS), size=(n, words))
+    return np.array([" ".join(_WORDS[i] for i in row) for row in picks], dtype=object)
+
+
+def synthetic_competencies(n: int, n_blocks: int = 6, seed: int = SEED) -> pd.DataFrame:
+    """Competency catalog with the columns of data/competencies.csv."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "CompetencyID": [f"C{i:05d}" for i in range(n)],
+        "CompetencyText": [f"{s} ({i})" for i, s in enumerate(_sentences(rng, n, 8))],
+        "BlockName": [f"Block {i % n_blocks}" for i in range(n)],
+    })
+
+
+def synthetic_jobs(n: int, comp_ids: List, per_job: int = 8, seed: int = SEED) -> pd.DataFrame:
+    """Jobs as returned by semantic_engine.load_reference() (RequiredCompetencies lists)."""
+    rng = np.random.default_rng(seed + 1)
+    ids = np.asarray(comp_ids, dtype=object)
+    k = min(per_job, len(ids))
+    return pd.DataFrame({
+        "JobID": [f"J{i:04d}" for i in range(n)],
+        "JobTitle": [f"Job {i}" for i in range(n)],
+        "RequiredCompetencies": [list(ids[rng.choice(len(ids), size=k, replace=False)]) for _ in range(n)],
+    })
+
+
+def synthetic_responses(n: int, seed: int = SEED, pool: int = 2_000) -> pd.DataFrame:
+    """Multi-column frame shaped like data/user_responses.csv (one row per respondent)."""
+    import semantic_engine as engine
+
+    rng = np.random.default_rng(seed + 2)
+    sentences = _sentences(rng, pool)
+    df = pd.DataFrame({
+        "Timestamp": pd.Series(pd.date_range("2024-01-01", periods=n, freq="s")).astype(str),
+        "First_Name": [f"First{i % 997}" for i in range(n)],
+        "Last_Name": [f"Last{i}" for i in range(n)],
+    })
+    for field in engine.CANONICAL_TEXT_FIELDS:
+        df[field] = sentences[rng.integers(pool, size=n)]
+    return df
+
+
+class StubEncoder:
+    """
+    Offline stand-in for the sentence encoder: every text gets a fixed
+    pseudo-random vector (two rows of a random table picked by CRC32 hashes).
+    Same text -> same vector, no model download, negligible cost.
+    """
+
+    def __init__(self, dim: int = 768, table_size: int = 4096, seed: int = SEED):
+        self.dim = dim
+        self.table = np.random.default_rng(seed).normal(size=(table_size, dim)).astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        h = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in texts), dtype=np.int64, count=len(texts))
+        T = len(self.table)
+        return self.table[h % T] + 0.5 * self.table[(h // T) % T]
+
+
+# --------------------------------- Measuring ----------------------------------
+
+class StageTimer:
+    """Collects seconds, items/s and memory of named stages."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict] = {}
+
+    @contextmanager
+    def stage(self, name: str, items: int | None = None):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        yield
+        sec = time.perf_counter() - t0
+        row = {"seconds": sec}
+        if items is not None:
+            row["items"] = int(items)
+            row["items_per_second"] = items / sec if sec > 0 else None
+        row["peak_rss_mb"] = peak_rss_mb()
+        if self.trace_memory:
+            row["peak_mb"] = (tracemalloc.get_traced_memory()[1] - base) / 2 ** 20
+        self.stages[name] = row
+        print(f"  {name:<20} {sec:8.3f}s" + (f"  {items / max(sec, 1e-9):12.0f} items/s" if items else "")
+              + (f"  rss {row['peak_rss_mb']:.0f} MB" if row["peak_rss_mb"] else "")
+              + (f"  peak +{row['peak_mb']:.0f} MB" if self.trace_memory else ""))
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# --------------------------------- Benchmark ----------------------------------
+
+def run_benchmark(n_respondents: int, n_competencies: int, n_jobs: int, encoder: str = "stub",
+                  stub_dim: int = 768, tables: bool = True, trace_memory: bool = False,
+                  output_format: str = "csv") -> Dict:
+    """Run every pipeline stage once on synthetic data; returns the report dict."""
+    import semantic_engine as engine
+    from job_matrix import JobMatrix
+
+    timer = StageTimer(trace_memory)
+    if tables and n_respondents * n_competencies > MAX_TABLE_ROWS:
+        print(f"More than {MAX_TABLE_ROWS} respondent x competency rows: skipping tables.")
+        tables = False
+    if trace_memory:
+        tracemalloc.start()
+    saved = {k: getattr(engine, k) for k in ("OUT_DIR", "RES_DIR", "FIG_DIR", "RESP_DIR", "CANDIDATE_DIR",
+                                              "OUTPUT_FORMAT")}
+    tmp = tempfile.TemporaryDirectory(prefix="bench-")
+    try:
+        print(f"Benchmark: {n_respondents} respondents, {n_competencies} competencies, {n_jobs} jobs "
+              f"({encoder} encoder)")
+        with timer.stage("generate", n_respondents):
+            raw = synthetic_responses(n_respondents)
+            competencies = synthetic_competencies(n_competencies)
+            jobs = synthetic_jobs(n_jobs, competencies["CompetencyID"].tolist())
+
+        with timer.stage("ingest", len(raw)):
+            responses = engine._responses_from_frame(raw)
+        del raw
+        texts = responses["Response"].tolist()
+        comp_texts = competencies["CompetencyText"].tolist()
+
+        with timer.stage("model_load"):
+            if encoder == "stub":
+                model = StubEncoder(stub_dim)
+                encode_fn = model.encode
+            else:
+                model = engine.load_model(engine.MODEL_NAME, engine.ENCODER_BACKEND)
+                encode_fn = lambda t: engine._to_numpy(engine._encode_model(model, t))  # noqa: E731
+        with timer.stage("encode_responses", len(texts)):
+            U = encode_fn(texts)
+        with timer.stage("encode_competencies", len(comp_texts)):
+            C = encode_fn(comp_texts)
+
+        owners, _ = pd.factorize(responses["RespondentID"])
+        people = engine._people_from_responses(responses)
+        with timer.stage("score_pooled", len(U)):
+            pooled = engine.compute_comp_scores_batch(U, C, np.zeros(len(U), dtype=np.int64), 1,
+                                                      mode=engine.MODE)[0]
+        with timer.stage("score_respondents", len(people)):
+            S = engine.compute_comp_scores_batch(U, C, owners, len(people), mode=engine.MODE)
+        del U
+        with timer.stage("job_scoring", len(people) * n_jobs):
+            job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+            job_matrix.score_topk(S, k=engine.TOP_K)
+            job_matrix.score_mean(S)
+
+        out = Path(tmp.name)
+        engine.OUT_DIR, engine.RES_DIR, engine.FIG_DIR = out, out / "results", out / "figures"
+        engine.RESP_DIR, engine.CANDIDATE_DIR = out / "respondents", out / "candidates"
+        engine.OUTPUT_FORMAT = output_format
+        engine._ensure_folders()
+        if tables:
+            with timer.stage("tables", len(people) * n_competencies):
+                resp_tables = engine.respondent_tables(people, S, competencies, jobs, top_k=engine.TOP_K,
+                                                       job_matrix=job_matrix)
+        with timer.stage("write", len(people) if tables else None):
+            engine.write_pooled_outputs(pooled, competencies, jobs, job_matrix=job_matrix)
+            if tables:
+                engine.write_respondent_outputs(resp_tables)
+        written_mb = sum(p.stat().st_size for p in out.rglob("*") if p.is_file()) / 2 ** 20
+    finally:
+        for k, v in saved.items():
+            setattr(engine, k, v)
+        tmp.cleanup()
+        if trace_memory:
+            tracemalloc.stop()
+
+    pipeline = [k for k in timer.stages if k != "generate"]
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "encoder": encoder if encoder == "stub" else f"{engine.MODEL_NAME}@{engine.ENCODER_BACKEND}",
+        "params": {"respondents": n_respondents, "competencies": n_competencies, "jobs": n_jobs,
+                   "mode": engine.MODE, "top_k": engine.TOP_K, "tables": tables,
+                   "output_format": output_format, "stub_dim": stub_dim if encoder == "stub" else None},
+        "stages": timer.stages,
+        "total_seconds": sum(timer.stages[k]["seconds"] for k in pipeline),
+        "written_mb": written_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(old: Dict, new: Dict) -> None:
+    """Print per-stage time ratios of two reports (new / old)."""
+    print(f"{'stage':<20} {'old s':>9} {'new s':>9} {'new/old':>8}")
+    for name in dict.fromkeys([*old["stages"], *new["stages"]]):
+        a, b = old["stages"].get(name, {}).get("seconds"), new["stages"].get(name, {}).get("seconds")
+        ratio = f"{b / a:8.2f}" if a and b else f"{'-':>8}"
+        print(f"{name:<20} {a if a is not None else float('nan'):9.3f} "
+              f"{b if b is not None else float('nan'):9.3f} {ratio}")
+    print(f"{'total':<20} {old['total_seconds']:9.3f} {new['total_seconds']:9.3f} "
+          f"{new['total_seconds'] / old['total_seconds']:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scoring pipeline on synthetic data.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--respondents", type=int, default=None)
+    parser.add_argument("--competencies", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=None)
+    parser.add_argument("--encoder", choices=["stub", "model"], default="stub")
+    parser.add_argument("--stub-dim", type=int, default=768)
+    parser.add_argument("--no-tables", action="store_true", help="skip per-respondent tables and writes")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc peak per stage (slow)")
+    parser.add_argument("--output-format", choices=["csv", "npz", "both"], default="csv")
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*(json.loads(p.read_text(encoding="utf-8")) for p in args.compare))
+        raise SystemExit(0)
+
+    n_resp, n_comp, n_jobs = SCALES[args.scale]
+    custom = any(v is not None for v in (args.respondents, args.competencies, args.jobs))
+    report = run_benchmark(args.respondents or n_resp, args.competencies or n_comp, args.jobs or n_jobs,
+                           encoder=args.encoder, stub_dim=args.stub_dim, tables=not args.no_tables,
+                           trace_memory=args.trace_memory, output_format=args.output_format)
+    out = args.out or BENCH_DIR / f"{'custom' if custom else args.scale}-{report['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Total {report['total_seconds']:.2f}s, peak RSS {report['peak_rss_mb'] or 0:.0f} MB. "
+          f"Report written to {out}")
@@ -0,0 +1,185 @@
+# candidate_index.py
+# -----------------------------------------------------------------------------
+# Reverse lookup: given a JobID, rank the respondents who fit it best.
+#
+# Per-respondent engine runs save every respondent's competency scores as one
+# float32 matrix (n_respondents x n_competencies) in outputs/candidates/:
+#   scores.npy   score matrix (memory-mapped on load)
+#   people.csv   RespondentID + key fields, one row per matrix row
+#   meta.json    CompetencyID of each column, mode
+#
+# Ranking candidates for a job is then one gather of the job's required
+# columns, a Top-K (or mean) over them and an argpartition over respondents:
+# well under a second for 100k stored respondents.
+#
+#   python candidate_index.py rank J01 [--top 10] [--method topk|mean] [--k 3]
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+CANDIDATE_DIR = Path("outputs") / "candidates"
+TOP_N = 10
+
+
+class CandidateIndex:
+    """
+    Competency scores of every stored respondent.
+
+    Parameters
+    ----------
+    people : DataFrame
+        One row per respondent (RespondentID + key fields).
+    scores : np.ndarray
+        (n_respondents x n_competencies) float32, aligned with `people`.
+    comp_ids : list
+        CompetencyID of each column.
+    """
+
+    def __init__(self, people: pd.DataFrame, scores: np.ndarray, comp_ids: List, mode: str = ""):
+        self.people = people.reset_index(drop=True)
+        self.scores = scores
+        self.comp_ids = list(comp_ids)
+        self.mode = mode
+        self._col_of = {cid: j for j, cid in enumerate(self.comp_ids)}
+
+    def __len__(self) -> int:
+        return len(self.people)
+
+    # ------------------------------------------------------------------ I/O
+
+    def save(self, folder: Path = CANDIDATE_DIR) -> None:
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = folder / "scores.npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.scores, dtype=np.float32))
+        os.replace(tmp, folder / "scores.npy")
+        self.people.to_csv(folder / "people.csv", index=False)
+        _write_meta(folder, self.comp_ids, self.mode, len(self.people))
+
+    @classmethod
+    def load(cls, folder: Path = CANDIDATE_DIR) -> "CandidateIndex":
+        folder = Path(folder)
+        if not (folder / "scores.npy").exists():
+            raise FileNotFoundError(
+                f"No candidate index in {folder}: run `python semantic_engine.py --per-respondent` first."
+            )
+        meta = json.loads((folder / "meta.json").read_text(encoding="utf-8"))
+        people = pd.read_csv(folder / "people.csv", dtype=str, keep_default_na=False)
+        scores = np.load(folder / "scores.npy", mmap_mode="r")
+        return cls(people, scores, meta["comp_ids"], meta.get("mode", ""))
+
+    # -------------------------------------------------------------- ranking
+
+    def job_scores(self, required_ids: List, method: str = "topk", k: int = 3) -> np.ndarray:
+        """
+        Score of every respondent for one job (n_respondents,).
+
+        Same definitions as score_job_topk / score_job_mean in semantic_engine:
+        required competencies missing from the index are ignored.
+        """
+        cols = [self._col_of[c] for c in required_ids if c in self._col_of]
+        if not cols:
+            return np.zeros(len(self), dtype=np.float32)
+        G = np.asarray(self.scores[:, cols], dtype=np.float32)          # respondents x required
+        if method == "mean":
+            return G.mean(axis=1)
+        if method != "topk":
+            raise ValueError("method must be 'topk' or 'mean'")
+        if k < G.shape[1]:
+            G = -np.partition(-G, k - 1, axis=1)[:, :k]
+        return G.mean(axis=1)
+
+    def rank(self, required_ids: List, top_n: int = TOP_N, method: str = "topk", k: int = 3) -> pd.DataFrame:
+        """Best `top_n` respondents for a job, best first (people columns + JobScore, Rank)."""
+        s = self.job_scores(required_ids, method=method, k=k)
+        n = min(top_n, len(s))
+        if n == 0:
+            return self.people.iloc[:0].assign(JobScore=[], Rank=[])
+        best = np.argpartition(-s, n - 1)[:n] if n < len(s) else np.arange(len(s))
+        best = best[np.argsort(-s[best], kind="stable")]
+        out = self.people.iloc[best].reset_index(drop=True)
+        return out.assign(JobScore=s[best], Rank=np.arange(1, n + 1))
+
+
+class CandidateIndexWriter:
+    """
+    Builds the saved index chunk by chunk (streaming engine runs): scores are
+    appended to a raw float32 file and wrapped in a .npy header on close(),
+    so the full matrix is never held in memory.
+    """
+
+    def __init__(self, folder: Path, comp_ids: List, mode: str = ""):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.comp_ids = list(comp_ids)
+        self.mode = mode
+        self.n = 0
+        self._raw_path = self.folder / "scores.f32.tmp"
+        self._people_path = self.folder / "people.csv.tmp"
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, index: CandidateIndex) -> None:
+        np.ascontiguousarray(index.scores, dtype=np.float32).tofile(self._raw)
+        index.people.to_csv(self._people_path, mode="a" if self.n else "w", header=not self.n, index=False)
+        self.n += len(index)
+
+    def close(self) -> None:
+        self._raw.close()
+        tmp = self.folder / "scores.npy.tmp"
+        with open(tmp, "wb") as f, open(self._raw_path, "rb") as raw:
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                      "fortran_order": False, "shape": (self.n, len(self.comp_ids))}
+            np.lib.format.write_array_header_1_0(f, header)
+            shutil.copyfileobj(raw, f, 1 << 24)
+        os.replace(tmp, self.folder / "scores.npy")
+        os.remove(self._raw_path)
+        if self.n:
+            os.replace(self._people_path, self.folder / "people.csv")
+        _write_meta(self.folder, self.comp_ids, self.mode, self.n)
+
+
+def _write_meta(folder: Path, comp_ids: List, mode: str, n: int) -> None:
+    meta = {"comp_ids": comp_ids, "mode": mode, "n": n}
+    (folder / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+def rank_candidates(job_id, top_n: int = TOP_N, method: str = "topk", k: int | None = None,
+                    folder: Path = CANDIDATE_DIR) -> pd.DataFrame:
+    """Top-N respondents for `job_id` of data/job_skills.csv, from the saved index."""
+    import semantic_engine as engine
+
+    _, jobs = engine.load_reference()
+    match = jobs[jobs["JobID"].astype(str) == str(job_id)]
+    if match.empty:
+        raise KeyError(f"Unknown JobID: {job_id}")
+    index = CandidateIndex.load(folder)
+    ranked = index.rank(match.iloc[0]["RequiredCompetencies"], top_n=top_n, method=method,
+                        k=engine.TOP_K if k is None else k)
+    return ranked.assign(JobID=match.iloc[0]["JobID"], JobTitle=match.iloc[0]["JobTitle"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank stored respondents for a job.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rank = sub.add_parser("rank", help="top candidates for a JobID")
+    p_rank.add_argument("job_id")
+    p_rank.add_argument("--top", type=int, default=TOP_N)
+    p_rank.add_argument("--method", choices=["topk", "mean"], default="topk")
+    p_rank.add_argument("--k", type=int, default=None, help="Top-K size (default: engine TOP_K)")
+    p_rank.add_argument("--dir", type=Path, default=CANDIDATE_DIR)
+    args = parser.parse_args()
+
+    result = rank_candidates(args.job_id, top_n=args.top, method=args.method, k=args.k, folder=args.dir)
+    with pd.option_context("display.max_columns", None, "display.width", 160):
+        print(result.to_string(index=False))
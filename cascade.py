@@ -0,0 +1,208 @@
+# cascade.py
+# -----------------------------------------------------------------------------
+# Two-stage per-respondent scoring: a small encoder for everyone, MODEL_NAME
+# only where the job ranking is close.
+#
+#   1. every answer is encoded with SMALL_MODEL (e.g. all-MiniLM-L6-v2, about
+#      5x faster than all-mpnet-base-v2 on CPU) and every respondent is scored;
+#   2. the margin between a respondent's two best jobs (Top-K job scores) is
+#      computed; respondents under MARGIN_THRESHOLD are re-encoded and
+#      re-scored with semantic_engine.MODEL_NAME.
+#
+# Competency and answer embeddings are cached per model (embedding_store.py),
+# so the catalog keeps one embedding file for each of the two encoders.
+# The per-respondent tables go to outputs/respondents/ as usual, with two more
+# respondent columns: ScoredBy (model key) and Margin (small-model margin), and
+# respondents.json records the cascade settings.
+# Scores of the two models are on different scales: compare rankings within a
+# respondent, not raw scores across respondents scored by different models.
+# For that reason no candidate index (outputs/candidates/, which ranks
+# respondents against each other) is written, and an earlier one is removed.
+#
+# outputs/results/cascade.json reports the escalated fraction and the encode
+# time of each stage. With --evaluate, everyone is also scored with
+# MODEL_NAME, so the report adds the agreement of the cascade (and of the
+# small model alone) with the full MODEL_NAME rankings, and the escalated
+# fraction / agreement for a range of thresholds.
+#
+#   python cascade.py [--small-model all-MiniLM-L6-v2] [--margin 0.02] [--evaluate]
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from encoder_backends import model_key
+from job_matrix import JobMatrix
+from parameter_sweep import rank_agreement
+
+SMALL_MODEL: str = "all-MiniLM-L6-v2"
+MARGIN_THRESHOLD: float = 0.02
+
+# Thresholds of the accuracy / cost table written with --evaluate.
+EVALUATE_THRESHOLDS: List[float] = [0.0, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, np.inf]
+
+REPORT_FILE = Path("outputs") / "results" / "cascade.json"
+
+
+def top_job_margins(job_scores: np.ndarray) -> np.ndarray:
+    """Best minus second-best job score of every respondent (inf with a single job)."""
+    if job_scores.shape[1] < 2:
+        return np.full(job_scores.shape[0], np.inf)
+    top2 = -np.partition(-job_scores, 1, axis=1)[:, :2]
+    return top2[:, 0] - top2[:, 1]
+
+
+def _encode_and_score(model_name: str, backend: str, texts: List[str], comp_texts: List[str],
+                      responses: pd.DataFrame, competencies: pd.DataFrame, n_people: int,
+                      owners: np.ndarray) -> Dict:
+    """Load one encoder, encode texts + catalog (cached per model) and score every owner."""
+    import semantic_engine as engine
+
+    key = model_key(model_name, backend)
+    t0 = time.perf_counter()
+    model = engine.load_model(model_name, backend)
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    user_emb = engine.encode(model, texts, model_name=key)
+    comp_emb = engine.encode_competencies(model, comp_texts, model_name=key)
+    encode_s = time.perf_counter() - t0
+    if "Field" in responses.columns:
+        S = engine.compute_field_scores_batch(user_emb, comp_emb, owners, responses["Field"].tolist(), n_people,
+                                              mode=engine.MODE, weights=engine.FIELD_WEIGHTS,
+                                              comp_ids=competencies["CompetencyID"].tolist(),
+                                              restrict=engine.RESTRICT_TO_MAPSTO)
+    else:
+        S = engine.compute_comp_scores_batch(user_emb, comp_emb, owners, n_people, mode=engine.MODE)
+    return {"model": key, "scores": np.asarray(S, dtype=np.float32), "texts": len(texts),
+            "load_seconds": load_s, "encode_seconds": encode_s}
+
+
+def run_cascade(small_model: str = SMALL_MODEL, margin: float = MARGIN_THRESHOLD,
+                evaluate: bool = False, field_level: bool = False, out: Path = REPORT_FILE) -> Dict:
+    """
+    Score data/user_responses.csv per respondent with the cascade; write tables and report.
+
+    With `evaluate`, the answer cache is off for the run: otherwise the full
+    MODEL_NAME pass would reuse the escalated answers and the timings would
+    not compare.
+    """
+    import semantic_engine as engine
+
+    use_cache = engine.USE_ANSWER_CACHE
+    engine.USE_ANSWER_CACHE = use_cache and not evaluate
+    try:
+        return _run_cascade(small_model, margin, evaluate, field_level, Path(out))
+    finally:
+        engine.USE_ANSWER_CACHE = use_cache
+
+
+def _run_cascade(small_model: str, margin: float, evaluate: bool, field_level: bool, out: Path) -> Dict:
+    import semantic_engine as engine
+
+    engine._ensure_folders()
+    competencies, jobs, responses = engine.load_respondents(field_level=field_level)
+    if responses.empty:
+        raise ValueError("No user responses found in data/user_responses.csv.")
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+    people = engine._people_from_responses(responses)
+    owners, _ = pd.factorize(responses["RespondentID"])
+    texts = responses["Response"].tolist()
+    backend = engine.ENCODER_BACKEND
+
+    print(f"Stage 1: {small_model} on {len(people)} respondents ({len(texts)} texts)...")
+    small = _encode_and_score(small_model, backend, texts, comp_texts, responses, competencies,
+                              len(people), owners)
+    margins = top_job_margins(job_matrix.score_topk(small["scores"], k=engine.TOP_K))
+    escalate = np.flatnonzero(margins < margin)
+    print(f"  {len(escalate)} / {len(people)} respondents with a top-job margin < {margin}")
+
+    S = small["scores"].copy()
+    large = None
+    if len(escalate):
+        rows = np.flatnonzero(np.isin(owners, escalate))
+        sub_owners = np.searchsorted(escalate, owners[rows])
+        print(f"Stage 2: {engine.MODEL_NAME} on {len(escalate)} respondents ({len(rows)} texts)...")
+        large = _encode_and_score(engine.MODEL_NAME, backend, [texts[i] for i in rows], comp_texts,
+                                  responses.iloc[rows], competencies, len(escalate), sub_owners)
+        S[escalate] = large["scores"]
+
+    scored_by = np.full(len(people), small["model"], dtype=object)
+    scored_by[escalate] = model_key(engine.MODEL_NAME, backend)
+    tables = engine.respondent_tables(people, S, competencies, jobs, top_k=engine.TOP_K, job_matrix=job_matrix)
+    tables["respondents"] = tables["respondents"].assign(ScoredBy=scored_by, Margin=margins)
+    del tables["candidates"]      # raw scores of the two models do not rank respondents
+    engine.write_respondent_outputs(tables, run={"cascade": {
+        "small_model": small["model"], "large_model": model_key(engine.MODEL_NAME, backend),
+        "margin_threshold": margin, "escalated": int(len(escalate)),
+    }})
+
+    stages = {"small": small, "large": large}
+    report = {
+        "small_model": small["model"],
+        "large_model": model_key(engine.MODEL_NAME, backend),
+        "mode": engine.MODE, "top_k": engine.TOP_K, "margin_threshold": margin,
+        "respondents": len(people),
+        "escalated": int(len(escalate)),
+        "escalated_fraction": len(escalate) / len(people),
+        "stages": {name: {k: v for k, v in st.items() if k not in ("scores", "model")}
+                   for name, st in stages.items() if st is not None},
+    }
+    cascade_s = sum(st["encode_seconds"] for st in stages.values() if st is not None)
+    report["encode_seconds"] = cascade_s
+
+    if evaluate:
+        print(f"Evaluation: {engine.MODEL_NAME} on every respondent...")
+        full = _encode_and_score(engine.MODEL_NAME, backend, texts, comp_texts, responses, competencies,
+                                 len(people), owners)
+        J_full = job_matrix.score_topk(full["scores"], k=engine.TOP_K)
+        J_small = job_matrix.score_topk(small["scores"], k=engine.TOP_K)
+        report["full_encode_seconds"] = full["encode_seconds"]
+        report["encode_speedup"] = full["encode_seconds"] / max(cascade_s, 1e-9)
+        report["agreement"] = {
+            "cascade": rank_agreement(job_matrix.score_topk(S, k=engine.TOP_K), J_full),
+            "small_only": rank_agreement(J_small, J_full),
+        }
+        # Escalated fraction / top-1 agreement for other thresholds (no re-encoding needed)
+        same_top = J_small.argmax(axis=1) == J_full.argmax(axis=1)
+        report["thresholds"] = [
+            {"margin": float(t) if np.isfinite(t) else None, "escalated_fraction": float(np.mean(margins < t)),
+             "top1_agreement": float(np.mean(same_top | (margins < t)))}
+            for t in EVALUATE_THRESHOLDS
+        ]
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, default=float), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two-stage scoring: small encoder first, "
+                                                 "MODEL_NAME where the top jobs are close.")
+    parser.add_argument("--small-model", default=SMALL_MODEL)
+    parser.add_argument("--margin", type=float, default=MARGIN_THRESHOLD,
+                        help="escalate respondents whose top-2 job score gap is below this")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="also score everyone with MODEL_NAME and report the agreement")
+    parser.add_argument("--field-level", action="store_true")
+    parser.add_argument("--out", type=Path, default=REPORT_FILE)
+    args = parser.parse_args()
+
+    report = run_cascade(args.small_model, args.margin, evaluate=args.evaluate,
+                         field_level=args.field_level, out=args.out)
+    print(f"Escalated {report['escalated']} / {report['respondents']} respondents "
+          f"({report['escalated_fraction']:.1%}); encode {report['encode_seconds']:.2f}s")
+    if "agreement" in report:
+        a = report["agreement"]
+        print(f"Top-1 agreement with {report['large_model']}: cascade {a['cascade']['top1_agreement']:.1%}, "
+              f"small only {a['small_only']['top1_agreement']:.1%}; "
+              f"encode speedup x{report['encode_speedup']:.2f}")
+    print(f"Report written to {args.out}")
@@ -0,0 +1,82 @@
+# check_import_time.py
+# -----------------------------------------------------------------------------
+# Import-time budget check (run in CI, or locally before pushing).
+#
+# For each module below, a fresh `python -X importtime -c "import <module>"`
+# is run in an empty temporary folder and we check that:
+#   - none of the heavy dependencies listed for it got imported,
+#   - its cumulative import time stays under the budget,
+#   - importing it created no files or folders (e.g. outputs/).
+#
+#   python check_import_time.py            # exit code 1 on any violation
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# module -> (budget in seconds, modules that must NOT be imported)
+BUDGETS = {
+    "semantic_engine": (2.0, ["torch", "sentence_transformers", "plotly", "streamlit"]),
+    "scoring_service": (2.0, ["torch", "sentence_transformers", "plotly", "streamlit"]),
+    "viz_page": (5.0, ["torch", "sentence_transformers", "plotly"]),
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """-X importtime output -> {module: cumulative seconds} (top-level entry per module)."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        out[name.strip()] = int(cumulative) / 1e6
+    return out
+
+
+def check_module(module: str, budget: float, forbidden: List[str]) -> List[str]:
+    """Import `module` in a clean process; return the list of violations."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=str(REPO_DIR) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=tmp, env=env, capture_output=True, text=True,
+        )
+        leftovers = sorted(p.name for p in Path(tmp).iterdir())
+
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()
+        return [f"import failed: {err[-1] if err else proc.returncode}"]
+
+    times = parse_importtime(proc.stderr)
+    problems = []
+    loaded = [m for m in forbidden if m in times]
+    if loaded:
+        problems.append(f"imports heavy dependencies eagerly: {', '.join(loaded)}")
+    seconds = times.get(module, 0.0)
+    if seconds > budget:
+        problems.append(f"import took {seconds:.2f}s (budget {budget:.2f}s)")
+    if leftovers:
+        problems.append(f"import created files: {', '.join(leftovers)}")
+    print(f"{module:<18} {seconds:6.2f}s  {'OK' if not problems else 'FAIL'}")
+    return problems
+
+
+def main() -> int:
+    failed = False
+    for module, (budget, forbidden) in BUDGETS.items():
+        for problem in check_module(module, budget, forbidden):
+            print(f"  - {problem}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# columnar_output.py
+# -----------------------------------------------------------------------------
+# Compact binary copy of the result tables (compressed .npz, numpy only).
+#
+# The CSV outputs repeat CompetencyText / BlockName / JobTitle / RespondentID
+# as text on every row; with per-respondent scoring that is one row per
+# (respondent, competency). Here every text column is dictionary-encoded
+# (distinct values once + small integer codes) and every float column is
+# stored as float32, all in one compressed archive:
+#   outputs/scores.npz              pooled competencies / blocks / jobs
+#   outputs/respondents/scores.npz  per-respondent tables
+#
+# read_tables() gives back DataFrames whose text columns are pandas
+# Categoricals (cheap to group, filter and plot).
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import IO, Dict
+
+import numpy as np
+import pandas as pd
+
+
+def _codes_dtype(n_categories: int):
+    return np.int8 if n_categories < 2 ** 7 else np.int16 if n_categories < 2 ** 15 else np.int32
+
+
+def _encode_column(values: pd.Series) -> Dict[str, np.ndarray]:
+    """Arrays stored for one column: {"values"} or {"codes", "categories"}."""
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return {"values": values.to_numpy()}
+    if pd.api.types.is_float_dtype(values):
+        return {"values": values.to_numpy(dtype=np.float32)}
+    if (not isinstance(values.dtype, pd.CategoricalDtype)
+            and pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty")):
+        # Non-string objects (e.g. the RequiredCompetencies lists) are stored
+        # as their text, like in the CSV.
+        values = values.map(lambda v: v if isinstance(v, str) or (pd.api.types.is_scalar(v) and pd.isna(v))
+                            else str(v))
+    codes, categories = pd.factorize(values)           # missing values -> -1
+    return {
+        "codes": codes.astype(_codes_dtype(len(categories))),
+        "categories": np.asarray(categories, dtype=str),
+    }
+
+
+def write_tables(path: Path, tables: Dict[str, pd.DataFrame]) -> None:
+    """Save several DataFrames in one compressed .npz (temp file + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays, layout = {}, {}
+    for name, df in tables.items():
+        layout[name] = [str(c) for c in df.columns]
+        for i, col in enumerate(df.columns):
+            for part, arr in _encode_column(df[col]).items():
+                arrays[f"{name}/{i}/{part}"] = arr
+    arrays["__layout__"] = np.array(json.dumps(layout))
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def read_tables(source: Path | IO[bytes]) -> Dict[str, pd.DataFrame]:
+    """DataFrames saved by write_tables(); text columns come back as Categoricals."""
+    with np.load(source, allow_pickle=False) as z:
+        layout = json.loads(str(z["__layout__"]))
+        tables = {}
+        for name, columns in layout.items():
+            data = {}
+            for i, col in enumerate(columns):
+                key = f"{name}/{i}"
+                if f"{key}/values" in z.files:
+                    data[col] = z[f"{key}/values"]
+                else:
+                    data[col] = pd.Categorical.from_codes(
+                        z[f"{key}/codes"].astype(np.int32), categories=z[f"{key}/categories"]
+                    )
+            tables[name] = pd.DataFrame(data, columns=columns)
+    return tables
@@ -0,0 +1,400 @@
+# embedding_archive.py
+# -----------------------------------------------------------------------------
+# Compact, append-only archive of the answer embeddings of every respondent.
+#
+# Keeping old respondents' embeddings lets them be re-scored when
+# competencies.csv or job_skills.csv changes, without running the encoder
+# again. At 768 float32 dims (3 KB per answer) years of cohorts add up, so
+# vectors are stored quantized:
+#   "float16" : 2 bytes / dim
+#   "int8"    : 1 byte / dim + one float32 scale per vector (q = round(v / s),
+#               s = max|v| / 127)
+#
+# Layout (one folder per model key, like the embedding cache):
+#   archive/<model-slug>/vectors.f16 | vectors.i8   raw rows, memory-mapped
+#   archive/<model-slug>/scales.f32                 int8 only
+#   archive/<model-slug>/people.csv                 RespondentID, key fields,
+#                                                    Start, Count (row range)
+#   archive/<model-slug>/fields.txt                 field of each row (field-level)
+#   archive/<model-slug>/meta.json                  model, dim, dtype, rows
+# Rows of one respondent are contiguous; meta.json is written last, so rows
+# appended by an interrupted run are ignored.
+#
+# Scoring reads the memory map chunk by chunk and computes cosines on the
+# quantized rows directly: the per-vector scale cancels out of a cosine, so
+# "max" mode needs no dequantization; "avg" mode applies the scales to the
+# per-respondent sums only.
+#
+#   python embedding_archive.py rescore            # archived respondents x current catalog
+#   python embedding_archive.py report [--mode max]  # float16 / int8 deviation and size vs float32
+# semantic_engine.py fills the archive when ARCHIVE_DTYPE is set
+# (python semantic_engine.py --archive int8).
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from embedding_store import model_slug
+
+ARCHIVE_DIR = Path("archive")
+ARCHIVE_DTYPES = ("float16", "int8")
+SUFFIX = {"float16": "f16", "int8": "i8"}
+
+# Rows dequantized / scored at once (bounds the memory of a full scan).
+SCORE_CHUNK_ROWS = 65_536
+
+REPORT_FILE = Path("outputs") / "results" / "archive_report.json"
+
+
+def quantize(vecs: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray | None]:
+    """float32 rows -> (stored rows, per-row scales or None)."""
+    vecs = np.asarray(vecs, dtype=np.float32)
+    if dtype == "float16":
+        return vecs.astype(np.float16), None
+    if dtype != "int8":
+        raise ValueError(f"dtype must be one of {ARCHIVE_DTYPES}")
+    scales = np.abs(vecs).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(vecs / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+def dequantize(rows: np.ndarray, scales: np.ndarray | None = None) -> np.ndarray:
+    out = np.asarray(rows, dtype=np.float32)
+    return out * np.asarray(scales, dtype=np.float32)[:, None] if scales is not None else out
+
+
+def score_quantized(rows: np.ndarray, scales: np.ndarray | None, starts: np.ndarray,
+                    comp_unit: np.ndarray, mode: str = "avg") -> np.ndarray:
+    """
+    Competency scores of consecutive respondents straight from quantized rows.
+
+    rows / scales : stored rows of the respondents (contiguous per respondent)
+    starts        : first row of each respondent within `rows`
+    comp_unit     : L2-normalized competency embeddings (m x d)
+    Returns (n_respondents x m), as semantic_engine.compute_comp_scores_batch.
+    """
+    Q = np.asarray(rows, dtype=np.float32)
+    if mode == "max":
+        # cos(s * q, c) = q . c / ||q||: the int8 scale cancels out
+        S = Q @ comp_unit.T
+        S /= np.maximum(np.linalg.norm(Q, axis=1), 1e-12)[:, None]
+        return np.maximum.reduceat(S, starts, axis=0)
+    if mode != "avg":
+        raise ValueError("mode must be 'avg' or 'max'")
+    if scales is not None:
+        Q *= np.asarray(scales, dtype=np.float32)[:, None]
+    P = np.add.reduceat(Q, starts, axis=0)
+    P /= np.maximum(np.linalg.norm(P, axis=1), 1e-12)[:, None]
+    return P @ comp_unit.T
+
+
+class EmbeddingArchive:
+    """
+    Quantized answer embeddings of all archived respondents for one model.
+
+    Parameters
+    ----------
+    model_name : str
+        Model key (encoder_backends.model_key()); part of the folder name.
+    dtype : str
+        "float16" or "int8" for a new archive (an existing one keeps its own).
+    root : Path
+        Archive root folder.
+    """
+
+    def __init__(self, model_name: str, dtype: str = "int8", root: Path = ARCHIVE_DIR):
+        if dtype not in ARCHIVE_DTYPES:
+            raise ValueError(f"dtype must be one of {ARCHIVE_DTYPES}")
+        self.model_name = model_name
+        self.folder = Path(root) / model_slug(model_name)
+        self.meta_path = self.folder / "meta.json"
+        self.people_path = self.folder / "people.csv"
+        self.fields_path = self.folder / "fields.txt"
+        self.scales_path = self.folder / "scales.f32"
+        self.meta = {"model": model_name, "dim": None, "dtype": dtype, "rows": 0, "field_level": None}
+        self.people = pd.DataFrame({"RespondentID": pd.Series(dtype=str)})
+        self._stale = False
+        self._load()
+
+    @property
+    def dtype(self) -> str:
+        return self.meta["dtype"]
+
+    @property
+    def vec_path(self) -> Path:
+        return self.folder / f"vectors.{SUFFIX[self.dtype]}"
+
+    def __len__(self) -> int:
+        return len(self.people)
+
+    # ------------------------------------------------------------------ I/O
+
+    def _load(self) -> None:
+        if not (self.meta_path.exists() and self.people_path.exists()):
+            return
+        meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        if meta.get("model") != self.model_name:
+            raise ValueError(f"{self.folder} holds embeddings of {meta.get('model')}, not {self.model_name}")
+        self.meta = meta
+        people = pd.read_csv(self.people_path, dtype=str, keep_default_na=False)
+        people["Start"] = people["Start"].astype(np.int64)
+        people["Count"] = people["Count"].astype(np.int64)
+        self.people = people[people["Start"] + people["Count"] <= meta["rows"]].reset_index(drop=True)
+        # people.csv / fields.txt rows past meta["rows"] (interrupted append) are rewritten on append
+        self._stale = len(self.people) != len(people)
+
+    def _vectors(self) -> np.ndarray:
+        dtype = np.float16 if self.dtype == "float16" else np.int8
+        return np.memmap(self.vec_path, dtype=dtype, mode="r", shape=(self.meta["rows"], self.meta["dim"]))
+
+    def _scales(self) -> np.ndarray | None:
+        if self.dtype != "int8":
+            return None
+        return np.memmap(self.scales_path, dtype=np.float32, mode="r", shape=(self.meta["rows"],))
+
+    def fields(self) -> List[str] | None:
+        """Field of each row (field-level archives), None otherwise."""
+        if not self.meta.get("field_level"):
+            return None
+        return self.fields_path.read_text(encoding="utf-8").split("\n")[:self.meta["rows"]]
+
+    # --------------------------------------------------------------- public
+
+    def append(self, responses: pd.DataFrame, user_emb) -> int:
+        """
+        Archive the embeddings of respondents not archived yet.
+
+        `responses` is aligned with `user_emb` (semantic_engine.load_respondents()
+        rows, with a Field column for field-level runs). Returns the number of
+        respondents added.
+        """
+        import semantic_engine as engine
+
+        U = engine._to_numpy(user_emb)
+        field_level = "Field" in responses.columns
+        if self.meta["field_level"] is not None and self.meta["field_level"] != field_level:
+            raise ValueError("Cannot mix field-level and whole-row answers in one archive.")
+        if self.meta["dim"] is not None and U.shape[1] != self.meta["dim"]:
+            raise ValueError(f"encoder returned dim {U.shape[1]}, archive holds {self.meta['dim']}")
+
+        new = ~responses["RespondentID"].isin(set(self.people["RespondentID"])).to_numpy()
+        if not new.any():
+            return 0
+        ids = responses["RespondentID"].to_numpy()[new]
+        order = np.argsort(pd.factorize(ids)[0], kind="stable")     # rows of one respondent together
+        rows = np.flatnonzero(new)[order]
+        people = engine._people_from_responses(responses.iloc[rows])
+        counts = responses.iloc[rows]["RespondentID"].value_counts(sort=False)
+        start = int(self.meta["rows"])
+        people["Count"] = people["RespondentID"].map(counts).to_numpy(dtype=np.int64)
+        people["Start"] = start + np.concatenate([[0], np.cumsum(people["Count"].to_numpy())[:-1]])
+
+        q, scales = quantize(U[rows], self.dtype)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        if start == 0:      # new archive: drop leftovers of an interrupted first run
+            for path in (self.vec_path, self.scales_path, self.fields_path, self.people_path):
+                if path.exists():
+                    path.unlink()
+        elif self._stale:
+            if field_level:
+                self.fields_path.write_text("".join(f + "\n" for f in self.fields()), encoding="utf-8")
+            self.people.to_csv(self.people_path, index=False)
+            self._stale = False
+        with open(self.vec_path, "ab") as f:
+            f.truncate(start * U.shape[1] * q.itemsize)
+            f.write(q.tobytes())
+        if scales is not None:
+            with open(self.scales_path, "ab") as f:
+                f.truncate(start * 4)
+                f.write(scales.tobytes())
+        if field_level:
+            with open(self.fields_path, "a", encoding="utf-8") as f:
+                f.write("".join(str(v) + "\n" for v in responses["Field"].to_numpy()[rows]))
+        people.to_csv(self.people_path, mode="a" if start else "w", header=not start, index=False)
+
+        self.people = pd.concat([self.people, people], ignore_index=True) if len(self.people) else people
+        self.meta.update({"dim": int(U.shape[1]), "rows": start + len(rows), "field_level": field_level})
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp.write_text(json.dumps(self.meta), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+        return len(people)
+
+    def row_range(self, respondent_id: str) -> Tuple[int, int]:
+        """[start, stop) rows of one respondent."""
+        match = self.people.index[self.people["RespondentID"] == respondent_id]
+        if not len(match):
+            raise KeyError(f"Respondent not archived: {respondent_id}")
+        start, count = self.people.loc[match[0], ["Start", "Count"]]
+        return int(start), int(start + count)
+
+    def vectors(self, respondent_id: str) -> np.ndarray:
+        """Dequantized float32 answer embeddings of one respondent."""
+        a, b = self.row_range(respondent_id)
+        scales = self._scales()
+        return dequantize(self._vectors()[a:b], scales[a:b] if scales is not None else None)
+
+    def _blocks(self, chunk_rows: int) -> Iterator[Tuple[int, int]]:
+        """Consecutive respondent ranges [i, j) holding about chunk_rows rows each."""
+        ends = (self.people["Start"] + self.people["Count"]).to_numpy()
+        i = 0
+        while i < len(ends):
+            limit = self.people["Start"].iat[i] + chunk_rows
+            j = max(i + 1, int(np.searchsorted(ends, limit, side="right")))
+            yield i, j
+            i = j
+
+    def score(self, comp_emb, mode: str = "avg", chunk_rows: int = SCORE_CHUNK_ROWS,
+              comp_ids: List | None = None) -> np.ndarray:
+        """
+        Competency scores of every archived respondent (n_respondents x m),
+        aligned with self.people, read chunk by chunk from the memory map.
+        Field-level archives go through semantic_engine.compute_field_scores_batch
+        (FIELD_WEIGHTS / RESTRICT_TO_MAPSTO) on dequantized chunks.
+        """
+        import semantic_engine as engine
+
+        C = engine._l2_normalize(engine._to_numpy(comp_emb))
+        out = np.zeros((len(self), C.shape[0]), dtype=np.float32)
+        if not len(self):
+            return out
+        vecs, scales, fields = self._vectors(), self._scales(), self.fields()
+        starts_all = self.people["Start"].to_numpy()
+        counts_all = self.people["Count"].to_numpy()
+        for i, j in self._blocks(chunk_rows):
+            a, b = int(starts_all[i]), int(starts_all[j - 1] + counts_all[j - 1])
+            sc = scales[a:b] if scales is not None else None
+            if fields is None:
+                out[i:j] = score_quantized(vecs[a:b], sc, starts_all[i:j] - a, C, mode=mode)
+            else:
+                owners = np.repeat(np.arange(j - i), counts_all[i:j])
+                out[i:j] = engine.compute_field_scores_batch(
+                    dequantize(vecs[a:b], sc), C, owners, fields[a:b], j - i, mode=mode,
+                    weights=engine.FIELD_WEIGHTS, comp_ids=comp_ids, restrict=engine.RESTRICT_TO_MAPSTO)
+        return out
+
+    def disk_bytes(self) -> int:
+        paths = [self.vec_path, self.scales_path, self.people_path, self.fields_path, self.meta_path]
+        return sum(p.stat().st_size for p in paths if p.exists())
+
+
+def rescore_archive(model_name: str | None = None, root: Path = ARCHIVE_DIR,
+                    mode: str | None = None) -> dict:
+    """
+    Score every archived respondent against the current catalog; write per-respondent outputs.
+
+    `mode` ("avg" / "max", default semantic_engine.MODE) is used for the
+    scores and recorded in respondents.json and the candidate index.
+    """
+    import semantic_engine as engine
+
+    mode = mode or engine.MODE
+    if mode not in ("avg", "max"):
+        raise ValueError("mode must be 'avg' or 'max'")
+    model_name = model_name or engine.model_key(engine.MODEL_NAME, engine.ENCODER_BACKEND)
+    archive = EmbeddingArchive(model_name, root=root)
+    if not len(archive):
+        raise FileNotFoundError(f"No archived respondents in {archive.folder}")
+    engine._ensure_folders()
+    competencies, jobs = engine.load_reference()
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    name, backend = engine.split_model_key(model_name)
+    # The catalog is usually in the embedding cache: the model is only loaded
+    # for competencies that are new or edited.
+    store = engine.EmbeddingStore(model_name, "competencies", engine.CACHE_DIR)
+    comp_emb, _ = store.get_or_encode(
+        comp_texts, lambda texts: engine._to_numpy(engine._encode_model(engine.load_model(name, backend), texts)))
+    S = archive.score(comp_emb, mode=mode, comp_ids=competencies["CompetencyID"].tolist())
+    people = archive.people.drop(columns=["Start", "Count"])
+    tables = engine.respondent_tables(people, S, competencies, jobs, top_k=engine.TOP_K, mode=mode)
+    engine.write_respondent_outputs(tables, run={"mode": mode, "archive": {
+        "model": model_name, "dtype": archive.dtype, "folder": str(archive.folder)}})
+    return tables
+
+
+def archive_report(vecs: np.ndarray, owners: np.ndarray, n_owners: int, comp_emb, jobs: pd.DataFrame,
+                   comp_ids: List, mode: str = "avg") -> Dict:
+    """
+    Deviation of float16 / int8 scores from float32 ones, and storage per dtype.
+
+    Scores are computed with score_quantized() on each quantized copy and
+    compared with semantic_engine.compute_comp_scores_batch() on the float32
+    embeddings (competency scores and top job per respondent).
+    """
+    import semantic_engine as engine
+    from job_matrix import JobMatrix
+
+    vecs = np.asarray(vecs, dtype=np.float32)
+    order = np.argsort(owners, kind="stable")
+    counts = np.bincount(owners, minlength=n_owners)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    C = engine._l2_normalize(engine._to_numpy(comp_emb))
+    ref = engine.compute_comp_scores_batch(vecs, C, owners, n_owners, mode=mode)
+    job_matrix = JobMatrix(jobs, comp_ids)
+    ref_top = job_matrix.score_topk(ref, k=engine.TOP_K).argmax(axis=1)
+    f32_bytes = vecs.shape[1] * 4
+
+    out = {"mode": mode, "answers": int(len(vecs)), "respondents": int(n_owners), "dim": int(vecs.shape[1]),
+           "float32_bytes_per_vector": f32_bytes, "dtypes": {}}
+    for dtype in ARCHIVE_DTYPES:
+        q, scales = quantize(vecs[order], dtype)
+        S = score_quantized(q, scales, starts, C, mode=mode)
+        dev = np.abs(S - ref)
+        per_vec = vecs.shape[1] * q.itemsize + (4 if scales is not None else 0)
+        out["dtypes"][dtype] = {
+            "bytes_per_vector": per_vec,
+            "size_ratio": per_vec / f32_bytes,
+            "max_abs_deviation": float(dev.max()),
+            "mean_abs_deviation": float(dev.mean()),
+            "p99_abs_deviation": float(np.quantile(dev, 0.99)),
+            "top_job_agreement": float(np.mean(job_matrix.score_topk(S, k=engine.TOP_K).argmax(axis=1) == ref_top)),
+        }
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantized archive of respondent answer embeddings.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rescore = sub.add_parser("rescore", help="score archived respondents against the current catalog")
+    p_rescore.add_argument("--mode", choices=["avg", "max"], default=None)
+    p_rescore.add_argument("--dir", type=Path, default=ARCHIVE_DIR)
+    p_report = sub.add_parser("report", help="float16 / int8 deviation and savings on the current answers")
+    p_report.add_argument("--mode", choices=["avg", "max"], default=None)
+    p_report.add_argument("--dir", type=Path, default=ARCHIVE_DIR)
+    p_report.add_argument("--out", type=Path, default=REPORT_FILE)
+    args = parser.parse_args()
+
+    import semantic_engine as engine
+
+    if args.command == "rescore":
+        tables = rescore_archive(root=args.dir, mode=args.mode)
+        print(f"Re-scored {len(tables['respondents'])} archived respondents; "
+              "results in outputs/respondents/ and outputs/results/respondents.json")
+    else:
+        competencies, jobs, responses = engine.load_respondents()
+        model = engine.load_model(engine.MODEL_NAME, engine.ENCODER_BACKEND)
+        user_emb = engine._to_numpy(engine.encode(model, responses["Response"].tolist()))
+        comp_emb = engine.encode_competencies(model, competencies["CompetencyText"].astype(str).tolist())
+        owners, uniques = pd.factorize(responses["RespondentID"])
+        report = archive_report(user_emb, owners, len(uniques), comp_emb, jobs,
+                                competencies["CompetencyID"].tolist(), mode=args.mode or engine.MODE)
+        archive = EmbeddingArchive(engine.model_key(engine.MODEL_NAME, engine.ENCODER_BACKEND), root=args.dir)
+        if len(archive):
+            report["archive"] = {"dtype": archive.dtype, "respondents": len(archive),
+                                 "rows": archive.meta["rows"], "disk_bytes": archive.disk_bytes(),
+                                 "float32_bytes": archive.meta["rows"] * archive.meta["dim"] * 4}
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        for dtype, r in report["dtypes"].items():
+            print(f"{dtype:8s} {r['bytes_per_vector']:5d} B/vector (x{r['size_ratio']:.2f})  "
+                  f"max |dev| {r['max_abs_deviation']:.2e}  mean |dev| {r['mean_abs_deviation']:.2e}  "
+                  f"top job kept {r['top_job_agreement']:.1%}")
+        print(f"Report written to {args.out}")
@@ -0,0 +1,305 @@
+# embedding_store.py
+# -----------------------------------------------------------------------------
+# Persistent on-disk cache for embeddings of reference texts (competencies).
+#
+# Layout (one folder per model, so switching MODEL_NAME never mixes vectors):
+#   .cache/embeddings/<model-slug>/<name>.npy            float32 matrix (n x d)
+#   .cache/embeddings/<model-slug>/<name>.manifest.json  model, dim, text hashes
+#
+# Rows are keyed by a hash of the text, not by position or CompetencyID:
+# adding, editing or removing one competency only re-encodes that row, every
+# other vector is read back from the memory-mapped .npy file.
+#
+# AnswerCache (bottom of this file) does the same for user answers, which
+# only grow: an append-only store keyed by normalized text, with an LRU.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+CACHE_DIR = Path(".cache") / "embeddings"
+
+
+def text_hash(text: str) -> str:
+    """Stable content key for one text (whitespace-trimmed, UTF-8, sha1)."""
+    return hashlib.sha1(str(text).strip().encode("utf-8")).hexdigest()
+
+
+def model_slug(model_name: str) -> str:
+    """Folder-safe version of a model name ("org/model" -> "org_model")."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+def _atomic_write_bytes(path: Path, write: Callable) -> None:
+    """Write through a temp file then rename, so readers never see half a file."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class EmbeddingStore:
+    """
+    Memory-mapped embedding matrix + JSON manifest for one model.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of the encoder; part of the cache key.
+    name : str
+        Logical name of the text collection (e.g. "competencies").
+    root : Path
+        Cache root folder.
+    """
+
+    def __init__(self, model_name: str, name: str = "competencies", root: Path = CACHE_DIR):
+        self.model_name = model_name
+        self.name = name
+        self.folder = Path(root) / model_slug(model_name)
+        self.npy_path = self.folder / f"{name}.npy"
+        self.manifest_path = self.folder / f"{name}.manifest.json"
+
+    # ------------------------------------------------------------------ I/O
+
+    def _load(self) -> Tuple[Dict, np.ndarray | None]:
+        """Return (manifest, memory-mapped matrix) or an empty manifest if unusable."""
+        empty = {"model": self.model_name, "dim": None, "rows": [], "encode_seconds_per_text": None}
+        if not (self.manifest_path.exists() and self.npy_path.exists()):
+            return empty, None
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            matrix = np.load(self.npy_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return empty, None
+        # Guard against a model mismatch or a manifest/matrix written by different runs.
+        if manifest.get("model") != self.model_name or matrix.shape[0] != len(manifest.get("rows", [])):
+            return empty, None
+        return manifest, matrix
+
+    def _save(self, manifest: Dict, matrix: np.ndarray) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        _atomic_write_bytes(self.npy_path, lambda f: np.save(f, matrix))
+        data = json.dumps(manifest, indent=2).encode("utf-8")
+        _atomic_write_bytes(self.manifest_path, lambda f: f.write(data))
+
+    # --------------------------------------------------------------- public
+
+    def get_or_encode(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+    ) -> Tuple[np.ndarray, Dict]:
+        """
+        Return embeddings for `texts` (same order), encoding only unseen texts.
+
+        Parameters
+        ----------
+        texts : list of str
+            Texts to embed.
+        encode_fn : callable
+            Called once with the list of texts missing from the cache; must
+            return an array-like of shape (n_missing x d).
+
+        Returns
+        -------
+        (np.ndarray, dict)
+            float32 matrix (n_texts x d) and stats:
+            hits, misses, seconds, cold_seconds_estimate.
+        """
+        t0 = time.perf_counter()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32), self._stats(0, 0, 0.0, {})
+        keys = [text_hash(t) for t in texts]
+        manifest, cached = self._load()
+        row_of = {k: i for i, k in enumerate(manifest["rows"])}
+
+        # Fast path: catalog unchanged, hand back the memory map as is.
+        if cached is not None and keys == manifest["rows"]:
+            elapsed = time.perf_counter() - t0
+            return cached, self._stats(len(texts), 0, elapsed, manifest)
+
+        missing = [i for i, k in enumerate(keys) if k not in row_of]
+        new_vecs = None
+        if missing:
+            t_enc = time.perf_counter()
+            new_vecs = np.asarray(encode_fn([texts[i] for i in missing]), dtype=np.float32)
+            per_text = (time.perf_counter() - t_enc) / len(missing)
+            prev = manifest.get("encode_seconds_per_text")
+            manifest["encode_seconds_per_text"] = per_text if prev is None else (prev + per_text) / 2
+
+        dim = new_vecs.shape[1] if new_vecs is not None else cached.shape[1]
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        new_pos = {i: j for j, i in enumerate(missing)}
+        for i, k in enumerate(keys):
+            out[i] = new_vecs[new_pos[i]] if i in new_pos else cached[row_of[k]]
+
+        # Rewrite with the current catalog only: edited/removed rows are dropped.
+        manifest.update({"model": self.model_name, "dim": int(dim), "rows": keys})
+        self._save(manifest, out)
+
+        elapsed = time.perf_counter() - t0
+        return out, self._stats(len(texts) - len(missing), len(missing), elapsed, manifest)
+
+    @staticmethod
+    def _stats(hits: int, misses: int, seconds: float, manifest: Dict) -> Dict:
+        per_text = manifest.get("encode_seconds_per_text")
+        cold = per_text * (hits + misses) if per_text is not None else None
+        return {"hits": hits, "misses": misses, "seconds": seconds, "cold_seconds_estimate": cold}
+
+
+# ----------------------------------------------------------------------------
+# Answer embeddings: append-only store + in-memory LRU
+# ----------------------------------------------------------------------------
+#
+# Unlike the competency catalog, user answers only ever accumulate, so this
+# store is append-only instead of being rewritten on each run:
+#   .cache/embeddings/<model-slug>/answers.f32   raw float32 rows (n x d)
+#   .cache/embeddings/<model-slug>/answers.keys  one text hash per line
+#   .cache/embeddings/<model-slug>/answers.json  model, dim
+# Vectors are written before their key, so a crash mid-append leaves at worst
+# orphan vectors (or a partial vector / key line); the next load truncates both
+# files back to the last complete key + vector pair before anything is appended.
+
+ANSWER_LRU_SIZE = 50_000
+
+
+def normalize_answer(text: str) -> str:
+    """Cache key text: trimmed, inner whitespace collapsed (the tokenizer ignores both)."""
+    return " ".join(str(text).split())
+
+
+class AnswerCache:
+    """
+    Content-addressed cache of answer embeddings for one model.
+
+    Lookups go through an in-memory LRU first, then the memory-mapped on-disk
+    rows; only texts found in neither are sent to the encoder.
+    """
+
+    def __init__(self, model_name: str, root: Path = CACHE_DIR, lru_size: int = ANSWER_LRU_SIZE):
+        self.model_name = model_name
+        self.folder = Path(root) / model_slug(model_name)
+        self.vec_path = self.folder / "answers.f32"
+        self.keys_path = self.folder / "answers.keys"
+        self.meta_path = self.folder / "answers.json"
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._row_of: Dict[str, int] = {}
+        self._disk: np.ndarray | None = None
+        self.dim: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not (self.meta_path.exists() and self.keys_path.exists() and self.vec_path.exists()):
+            return
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            lines = self.keys_path.read_text(encoding="utf-8").split("\n")
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model_name or not meta.get("dim"):
+            return
+        keys = lines[:-1]                   # the last item is "" or a partial key line
+        self.dim = int(meta["dim"])
+        n = min(len(keys), self.vec_path.stat().st_size // (4 * self.dim))
+        self._truncate(keys, n)
+        if n:
+            self._disk = np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        self._row_of = {k: i for i, k in enumerate(keys[:n])}
+
+    def _truncate(self, keys: List[str], n: int) -> None:
+        """Drop what an interrupted append left past the first `n` complete rows."""
+        size = n * self.dim * 4
+        if self.vec_path.stat().st_size != size:
+            os.truncate(self.vec_path, size)
+        if self.keys_path.stat().st_size != sum(len(k.encode("utf-8")) + 1 for k in keys[:n]):
+            text = "".join(k + "\n" for k in keys[:n]).encode("utf-8")
+            _atomic_write_bytes(self.keys_path, lambda f: f.write(text))
+
+    def _get(self, key: str) -> np.ndarray | None:
+        vec = self._lru.get(key)
+        if vec is not None:
+            self._lru.move_to_end(key)
+            return vec
+        row = self._row_of.get(key)
+        if row is None:
+            return None
+        vec = np.array(self._disk[row])
+        self._remember(key, vec)
+        return vec
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _append(self, keys: List[str], vecs: np.ndarray) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        if not self.meta_path.exists() or (self._disk is None and not self._row_of):
+            # Fresh (or unusable) store: start the files over for this model/dim.
+            meta = json.dumps({"model": self.model_name, "dim": int(vecs.shape[1])}).encode("utf-8")
+            _atomic_write_bytes(self.meta_path, lambda f: f.write(meta))
+            self.vec_path.write_bytes(b"")
+            self.keys_path.write_text("", encoding="utf-8")
+        with open(self.vec_path, "ab") as f:
+            f.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+        with open(self.keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(k + "\n" for k in keys))
+        start = len(self._row_of)
+        for i, k in enumerate(keys):
+            self._row_of[k] = start + i
+        n = len(self._row_of)
+        self._disk = np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(n, vecs.shape[1]))
+
+    def get_or_encode(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+    ) -> Tuple[np.ndarray, Dict]:
+        """
+        Embeddings for `texts` (same order); each distinct unseen text is encoded once.
+
+        Returns the float32 matrix (n_texts x d) and stats for this call:
+        hits, misses (distinct texts encoded), seconds.
+        """
+        t0 = time.perf_counter()
+        keys = [text_hash(normalize_answer(t)) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vec = self._get(key)
+            if vec is None:
+                missing[key] = normalize_answer(text)
+            else:
+                found[key] = vec
+
+        if missing:
+            new_vecs = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            if self.dim is not None and new_vecs.shape[1] != self.dim:
+                raise ValueError(f"encoder returned dim {new_vecs.shape[1]}, cache holds {self.dim}")
+            self.dim = new_vecs.shape[1]
+            self._append(list(missing), new_vecs)
+            for key, vec in zip(missing, new_vecs):
+                found[key] = vec
+                self._remember(key, vec)
+
+        hits = sum(1 for k in keys if k not in missing)
+        self.hits += hits
+        self.misses += len(missing)
+        out = np.stack([found[k] for k in keys]) if keys else np.zeros((0, self.dim or 0), dtype=np.float32)
+        return out, {"hits": hits, "misses": len(missing), "seconds": time.perf_counter() - t0}
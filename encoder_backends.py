@@ -0,0 +1,144 @@
+# encoder_backends.py
+# -----------------------------------------------------------------------------
+# Interchangeable CPU inference backends for the sentence encoder.
+#
+#   "torch" : SentenceTransformer in fp32 PyTorch (reference)
+#   "int8"  : same model with its Linear layers dynamically quantized to int8
+#             (torch.quantization.quantize_dynamic, no extra dependency)
+#   "onnx"  : SentenceTransformer(..., backend="onnx") on ONNX Runtime
+#             (needs sentence-transformers >= 3.2 and
+#              `pip install optimum[onnxruntime]`)
+#
+# Every backend returns a SentenceTransformer, so encode(), tokenizer,
+# max_seq_length and device work the same for the rest of the engine.
+# Embeddings differ slightly between backends, so caches are keyed by
+# model_key() (model name + backend), never by the model name alone.
+#
+# Accuracy check (pooled job ranking + per-respondent top job vs "torch"):
+#   python encoder_backends.py --compare [--backends torch int8 onnx]
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def model_key(model_name: str, backend: str = "torch") -> str:
+    """Cache / signature key of an encoder ("all-mpnet-base-v2", "all-mpnet-base-v2@int8")."""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def split_model_key(key: str):
+    """Inverse of model_key(): (model_name, backend)."""
+    name, sep, backend = key.rpartition("@")
+    return (name, backend) if sep and backend in BACKENDS else (key, "torch")
+
+
+def load_model(model_name: str, backend: str = "torch"):
+    """Load `model_name` on CPU with the given backend (see module header)."""
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "int8":
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name, device="cpu", backend="onnx")
+        except TypeError as e:  # older sentence-transformers: no `backend` argument
+            raise RuntimeError("The onnx backend needs sentence-transformers >= 3.2") from e
+        except ImportError as e:
+            raise RuntimeError("The onnx backend needs: pip install optimum[onnxruntime]") from e
+    raise ValueError(f"backend must be one of {', '.join(BACKENDS)}")
+
+
+def _ranking_agreement(ref, other) -> Dict:
+    """Rank correlations of two score vectors over the same jobs."""
+    from scipy.stats import kendalltau, spearmanr
+    return {
+        "spearman": float(spearmanr(ref, other)[0]),
+        "kendall": float(kendalltau(ref, other)[0]),
+        "max_abs_diff": float(np.max(np.abs(np.asarray(ref) - np.asarray(other)))),
+    }
+
+
+def compare_backends(backends: List[str] = list(BACKENDS)) -> Dict:
+    """
+    Score the current data with every backend and compare with "torch".
+
+    For each backend: encode time, pooled job ranking agreement (Spearman,
+    Kendall, same top job, max score difference) and the share of respondents
+    whose top job is unchanged. Caches are bypassed so timings are real.
+    """
+    import semantic_engine as engine
+    from job_matrix import JobMatrix
+
+    competencies, jobs, responses = engine.load_respondents()
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    texts = responses["Response"].tolist()
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+    owners, people = pd.factorize(responses["RespondentID"])
+    n_people = len(people)
+
+    results, ref = {}, None
+    for backend in backends:
+        try:
+            t0 = time.perf_counter()
+            model = load_model(engine.MODEL_NAME, backend)
+            load_s = time.perf_counter() - t0
+        except (RuntimeError, ImportError, OSError) as e:
+            print(f"[{backend}] skipped: {e}")
+            results[backend] = {"error": str(e)}
+            continue
+
+        t0 = time.perf_counter()
+        user_emb = engine._encode_model(model, texts, model_key(engine.MODEL_NAME, backend))
+        comp_emb = engine._encode_model(model, comp_texts, model_key(engine.MODEL_NAME, backend))
+        encode_s = time.perf_counter() - t0
+
+        pooled = job_matrix.score_topk(engine.compute_comp_scores(user_emb, comp_emb, mode=engine.MODE),
+                                       k=engine.TOP_K)[0]
+        S = engine.compute_comp_scores_batch(user_emb, comp_emb, owners, n_people, mode=engine.MODE)
+        top_jobs = job_matrix.score_topk(S, k=engine.TOP_K).argmax(axis=1)
+
+        row = {"load_seconds": load_s, "encode_seconds": encode_s,
+               "texts_per_second": (len(texts) + len(comp_texts)) / max(encode_s, 1e-9)}
+        if ref is None:
+            ref = {"backend": backend, "pooled": pooled, "top_jobs": top_jobs, "encode_seconds": encode_s}
+        else:
+            row.update(_ranking_agreement(ref["pooled"], pooled))
+            row["same_top_job"] = bool(np.argmax(ref["pooled"]) == np.argmax(pooled))
+            row["respondent_top_job_agreement"] = float(np.mean(ref["top_jobs"] == top_jobs))
+            row["speedup"] = ref["encode_seconds"] / max(encode_s, 1e-9)
+        results[backend] = row
+        print(f"[{backend}] " + ", ".join(
+            f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+
+    report = {"model": engine.MODEL_NAME, "reference": ref["backend"] if ref else None,
+              "mode": engine.MODE, "top_k": engine.TOP_K, "backends": results}
+    engine._ensure_folders()
+    with open(engine.RES_DIR / "backend_comparison.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {engine.RES_DIR / 'backend_comparison.json'}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encoder backends: accuracy / speed comparison.")
+    parser.add_argument("--compare", action="store_true", help="compare backends on the current data")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args()
+    if args.compare:
+        compare_backends(args.backends)
+    else:
+        parser.print_help()
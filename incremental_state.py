@@ -0,0 +1,135 @@
+# incremental_state.py
+# -----------------------------------------------------------------------------
+# What an incremental engine run remembers between runs.
+#
+# data/user_responses.csv is append-only, so a run only needs to encode the
+# rows it has not seen yet. This file stores, under .cache/incremental/:
+#   state.json  -> signature (model / mode / competency catalog), the
+#                  fingerprints of the rows already processed, respondents
+#   state.npz   -> per-respondent accumulators and competency scores, and
+#                  the pooled-profile accumulators
+#
+# The scoring maths stay in semantic_engine.py; this module is storage only.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+STATE_DIR = Path(".cache") / "incremental"
+
+
+class IncrementalState:
+    """
+    Accumulated results of all previously processed response rows.
+
+    Attributes
+    ----------
+    signature : str
+        Hash of everything that invalidates the state (model, mode, catalog).
+    fingerprints : set of str
+        RowHash of every processed row of user_responses.csv.
+    people : DataFrame
+        One row per respondent (RespondentID + key fields).
+    counts : np.ndarray
+        Number of answers per respondent (n_respondents,).
+    sums : np.ndarray
+        Sum of answer embeddings per respondent (n_respondents x d), "avg" mode.
+    scores : np.ndarray
+        Competency scores per respondent (n_respondents x n_competencies).
+    pooled_sum, pooled_count, pooled_scores
+        Same accumulators for the pooled profile of all rows.
+    """
+
+    def __init__(self, signature: str, folder: Path = STATE_DIR):
+        self.signature = signature
+        self.folder = Path(folder)
+        self.fingerprints: set = set()
+        self.people = pd.DataFrame({"RespondentID": pd.Series(dtype=str)})
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros((0, 0), dtype=np.float32)
+        self.scores = np.zeros((0, 0), dtype=np.float32)
+        self.pooled_sum = np.zeros(0, dtype=np.float32)
+        self.pooled_count = 0
+        self.pooled_scores = np.zeros(0, dtype=np.float32)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.fingerprints
+
+    @classmethod
+    def load(cls, signature: str, folder: Path = STATE_DIR) -> "IncrementalState":
+        """Load the saved state, or return an empty one if missing or stale."""
+        state = cls(signature, folder)
+        json_path, npz_path = state.folder / "state.json", state.folder / "state.npz"
+        if not (json_path.exists() and npz_path.exists()):
+            return state
+        try:
+            meta = json.loads(json_path.read_text(encoding="utf-8"))
+            arrays = np.load(npz_path)
+        except (OSError, ValueError):
+            return state
+        if meta.get("signature") != signature:
+            print("Incremental state was built for another model/mode/catalog: starting over.")
+            return state
+
+        state.fingerprints = set(meta["fingerprints"])
+        state.people = pd.DataFrame(meta["people"], columns=meta["people_columns"])
+        state.pooled_count = int(meta["pooled_count"])
+        state.counts = arrays["counts"]
+        state.sums = arrays["sums"]
+        state.scores = arrays["scores"]
+        state.pooled_sum = arrays["pooled_sum"]
+        state.pooled_scores = arrays["pooled_scores"]
+        return state
+
+    def save(self) -> None:
+        """Write state.npz then state.json (each through a temp file + rename)."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        tmp = self.folder / "state.npz.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, counts=self.counts, sums=self.sums, scores=self.scores,
+                     pooled_sum=self.pooled_sum, pooled_scores=self.pooled_scores)
+        os.replace(tmp, self.folder / "state.npz")
+
+        meta = {
+            "signature": self.signature,
+            "pooled_count": self.pooled_count,
+            "people_columns": list(self.people.columns),
+            "people": self.people.astype(str).values.tolist(),
+            "fingerprints": sorted(self.fingerprints),
+        }
+        tmp = self.folder / "state.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.folder / "state.json")
+
+    def add_people(self, people: pd.DataFrame, dim: int, n_comp: int, fill: float) -> List[int]:
+        """
+        Register respondents (appending unknown ones) and return their row index.
+
+        New rows start with count 0, a zero embedding sum and `fill` scores.
+        """
+        if self.sums.shape[1] == 0:
+            self.sums = np.zeros((0, dim), dtype=np.float32)
+            self.scores = np.zeros((0, n_comp), dtype=np.float32)
+            self.pooled_sum = np.zeros(dim, dtype=np.float32)
+            self.pooled_scores = np.full(n_comp, fill, dtype=np.float32)
+
+        index = {rid: i for i, rid in enumerate(self.people["RespondentID"])}
+        fresh = people[~people["RespondentID"].isin(index)]
+        if len(fresh):
+            self.people = pd.concat([self.people, fresh], ignore_index=True)
+            k = len(fresh)
+            self.counts = np.concatenate([self.counts, np.zeros(k, dtype=np.int64)])
+            self.sums = np.vstack([self.sums, np.zeros((k, dim), dtype=np.float32)])
+            self.scores = np.vstack([self.scores, np.full((k, n_comp), fill, dtype=np.float32)])
+            for rid in fresh["RespondentID"]:
+                index[rid] = len(index)
+        return [index[rid] for rid in people["RespondentID"]]
@@ -0,0 +1,110 @@
+# job_matrix.py
+# -----------------------------------------------------------------------------
+# Job scoring as matrix operations.
+#
+# job_skills.csv is turned once into a sparse job x competency incidence
+# matrix (CSR). Scoring any number of users against every job is then:
+#   - mean  : one sparse x dense product   (n_users x n_jobs)
+#   - top-K : one gather + np.partition    (no Python loop over jobs)
+# Results are identical to score_job_mean / score_job_topk in semantic_engine.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Max number of gathered scores held at once by score_topk (users x jobs x skills).
+TOPK_CHUNK_ELEMENTS = 8_000_000
+
+
+class JobMatrix:
+    """
+    Sparse job x competency matrix aligned with a competency order.
+
+    Parameters
+    ----------
+    jobs : DataFrame
+        Columns JobID, JobTitle, RequiredCompetencies (list of CompetencyID),
+        as returned by semantic_engine.load_inputs().
+    comp_ids : list
+        CompetencyID of each column of the score matrices that will be scored.
+        Required competencies missing from this list are ignored, like the
+        scalar scorers do.
+    """
+
+    def __init__(self, jobs: pd.DataFrame, comp_ids: List):
+        self.job_ids = jobs["JobID"].tolist()
+        self.job_titles = jobs["JobTitle"].tolist()
+        self.n_comp = len(comp_ids)
+
+        col_of = pd.Series(np.arange(len(comp_ids)), index=pd.Index(comp_ids))
+        pairs = jobs[["RequiredCompetencies"]].assign(_job=np.arange(len(jobs)))
+        pairs = pairs.explode("RequiredCompetencies")
+        pairs = pairs[pairs["RequiredCompetencies"].isin(col_of.index)]
+        rows = pairs["_job"].to_numpy(dtype=np.int64)
+        cols = col_of.loc[pairs["RequiredCompetencies"]].to_numpy(dtype=np.int64)
+
+        # Duplicated (job, competency) pairs count twice, as in the list version.
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(jobs), len(comp_ids)),
+        )
+        self.lengths = np.bincount(rows, minlength=len(jobs))
+
+        # Padded (job x max_len) column index, -1 = padding; used for Top-K.
+        width = int(self.lengths.max()) if len(rows) else 0
+        self.padded = np.full((len(jobs), width), -1, dtype=np.int64)
+        if len(rows):
+            order = np.argsort(rows, kind="stable")
+            rows, cols = rows[order], cols[order]
+            starts = np.concatenate([[0], np.cumsum(self.lengths)[:-1]])
+            slot = np.arange(len(rows)) - starts[rows]
+            self.padded[rows, slot] = cols
+
+    @staticmethod
+    def _as_matrix(scores) -> np.ndarray:
+        S = np.asarray(scores, dtype=np.float32)
+        return S[None, :] if S.ndim == 1 else S
+
+    def score_mean(self, scores) -> np.ndarray:
+        """
+        Mean of the required competency scores, for every user and job.
+
+        scores : (n_users x n_competencies) or (n_competencies,)
+        Returns (n_users x n_jobs).
+        """
+        S = self._as_matrix(scores)
+        sums = np.asarray(self.matrix @ S.T).T
+        return np.where(self.lengths > 0, sums / np.maximum(self.lengths, 1), 0.0)
+
+    def score_topk(self, scores, k: int = 3) -> np.ndarray:
+        """
+        Average of the best K required competency scores (all if fewer than K).
+
+        scores : (n_users x n_competencies) or (n_competencies,)
+        Returns (n_users x n_jobs).
+        """
+        S = self._as_matrix(scores)
+        n_users, n_jobs = S.shape[0], len(self.job_ids)
+        width = self.padded.shape[1]
+        out = np.zeros((n_users, n_jobs), dtype=np.float64)
+        if width == 0 or n_users == 0:
+            return out
+
+        k_eff = np.minimum(self.lengths, k)
+        valid = self.padded >= 0
+        idx = np.where(valid, self.padded, 0)
+        step = max(1, TOPK_CHUNK_ELEMENTS // max(1, n_jobs * width))
+
+        for start in range(0, n_users, step):
+            G = S[start:start + step][:, idx]                    # users x jobs x width
+            G = np.where(valid, G, -np.inf)
+            if k < width:
+                G = -np.partition(-G, k - 1, axis=2)[:, :, :k]   # best K per job, unordered
+            top = np.where(np.isfinite(G), G, 0.0).sum(axis=2, dtype=np.float64)
+            out[start:start + step] = np.where(k_eff > 0, top / np.maximum(k_eff, 1), 0.0)
+        return out
@@ -0,0 +1,199 @@
+# micro_batcher.py
+# -----------------------------------------------------------------------------
+# Dynamic micro-batching for encode() calls coming from concurrent requests.
+#
+# One form submission is ~8 short texts: encoding each submission on its own
+# leaves most of the transformer's batch throughput unused. The batcher keeps
+# a queue of pending requests; a single worker thread takes the first one,
+# then keeps collecting until either
+#   - max_batch_size texts are gathered, or
+#   - max_wait_ms has passed since that first request arrived,
+# runs ONE encode call on all texts and hands each caller its own rows back.
+# A request that would take the batch over max_batch_size starts the next
+# batch instead; a request larger than max_batch_size is split into several
+# encode calls and its rows are concatenated back.
+#
+# Batch sizes and queue waits are recorded so the latency budget can be tuned
+# (see MicroBatcher.stats()).
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Defaults: a few submissions per batch without adding noticeable latency.
+MAX_BATCH_SIZE = 64       # texts per encode call
+MAX_WAIT_MS = 10.0        # latency budget for the first request of a batch
+STATS_WINDOW = 10_000     # number of recent batches / requests kept for stats
+
+
+class MicroBatcher:
+    """
+    Queue in front of an encode function.
+
+    Parameters
+    ----------
+    encode_fn : callable
+        encode_fn(list of str) -> embeddings (tensor or array, one row per text).
+    max_batch_size : int
+        Upper bound on texts per encode call (a larger request is split).
+    max_wait_ms : float
+        How long the worker waits for more requests after the first one.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], object],
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._batch_sizes: deque = deque(maxlen=STATS_WINDOW)
+        self._requests_per_batch: deque = deque(maxlen=STATS_WINDOW)
+        self._waits_ms: deque = deque(maxlen=STATS_WINDOW)
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()      # submit() vs close()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    # --------------------------------------------------------------- public
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue `texts`; the Future resolves to their embeddings (same order)."""
+        texts = list(texts)
+        n = self.max_batch_size
+        chunks = [texts[i:i + n] for i in range(0, len(texts), n)] or [texts]
+        futures = [Future() for _ in chunks]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            queued = time.perf_counter()
+            for chunk, fut in zip(chunks, futures):
+                self._queue.put((chunk, fut, queued))
+        return futures[0] if len(futures) == 1 else _gather(futures)
+
+    def encode(self, texts: List[str]):
+        """Blocking helper: submit and wait (drop-in for encode_fn)."""
+        return self.submit(texts).result()
+
+    def close(self) -> None:
+        """Stop the worker after the requests already queued."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> Dict:
+        """Batch-size and queue-wait distribution over the recent window."""
+        with self._stats_lock:
+            sizes = np.asarray(self._batch_sizes, dtype=np.float64)
+            reqs = np.asarray(self._requests_per_batch, dtype=np.float64)
+            waits = np.asarray(self._waits_ms, dtype=np.float64)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": int(len(sizes)),
+            "requests": int(len(waits)),
+            "batch_texts": _distribution(sizes),
+            "batch_requests": _distribution(reqs),
+            "queue_wait_ms": _distribution(waits),
+        }
+
+    # --------------------------------------------------------------- worker
+
+    def _run(self) -> None:
+        held = None     # request that did not fit in the previous batch
+        while True:
+            first = held if held is not None else self._queue.get()
+            held = None
+            if first is None:
+                return
+            batch = [first]
+            n_texts = len(first[0])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while n_texts < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                if n_texts + len(item[0]) > self.max_batch_size:
+                    held = item
+                    break
+                batch.append(item)
+                n_texts += len(item[0])
+            self._encode_batch(batch)
+            if stop:
+                return
+
+    def _encode_batch(self, batch: list) -> None:
+        started = time.perf_counter()
+        texts = [t for item in batch for t in item[0]]
+        try:
+            emb = self.encode_fn(texts) if texts else None
+        except Exception as e:  # every caller of the batch gets the error
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            return
+
+        start = 0
+        for item_texts, fut, _ in batch:
+            end = start + len(item_texts)
+            fut.set_result(emb[start:end] if emb is not None else emb)
+            start = end
+
+        with self._stats_lock:
+            self._batch_sizes.append(len(texts))
+            self._requests_per_batch.append(len(batch))
+            self._waits_ms.extend((started - queued) * 1000.0 for _, _, queued in batch)
+
+
+def _gather(futures: List[Future]) -> Future:
+    """One Future for the chunks of a split request: their rows concatenated, or the first error."""
+    out: Future = Future()
+    lock = threading.Lock()
+    pending = [len(futures)]
+
+    def done(fut: Future) -> None:
+        with lock:
+            if out.done():
+                return
+            if fut.exception() is not None:
+                out.set_exception(fut.exception())
+                return
+            pending[0] -= 1
+            if pending[0]:
+                return
+        parts = [f.result() for f in futures]
+        if hasattr(parts[0], "detach"):  # torch.Tensor, without importing torch up front
+            import torch
+            out.set_result(torch.cat(parts))
+        else:
+            out.set_result(np.concatenate(parts))
+
+    for fut in futures:
+        fut.add_done_callback(done)
+    return out
+
+
+def _distribution(x: np.ndarray) -> Dict:
+    """mean / p50 / p90 / p99 / max of a 1D sample (None when empty)."""
+    if not len(x):
+        return {"mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    p50, p90, p99 = np.percentile(x, [50, 90, 99])
+    return {"mean": float(x.mean()), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "max": float(x.max())}
@@ -0,0 +1,177 @@
+# parallel_encoder.py
+# -----------------------------------------------------------------------------
+# Sharded encoding over a pool of worker processes (many-core CPUs).
+#
+# One model.encode() call does not keep a large CPU busy: tokenization and
+# pooling are single-threaded, and torch's intra-op threads scale poorly past
+# a few cores on these small models. ParallelEncoder:
+#   - starts `workers` processes ("spawn"), each loading the model ONCE and
+#     using cpu_count // workers torch threads,
+#   - cuts the texts into contiguous shards, encoded with the engine's usual
+#     length-bucketed batching (semantic_engine._encode_model),
+#   - has every worker write its rows straight into one shared output buffer
+#     (a memory-mapped file in /dev/shm when available), so embeddings are
+#     neither pickled back nor reordered: row i is the embedding of texts[i].
+#
+# semantic_engine uses it from _encode_model() when ENCODE_WORKERS > 1
+# (python semantic_engine.py --encode-workers 4).
+#
+# Pool sizing, texts/s and speedup vs 1 worker on the current data:
+#   python parallel_encoder.py --bench [--workers 1 2 4 8] [--repeat 20]
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+SHARDS_PER_WORKER = 4   # a few shards per worker so slow shards do not stall the pool
+
+# State of a worker process (set by _init_worker).
+_worker: Dict = {}
+
+
+def _shared_dir() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _init_worker(model_name: str, backend: str, threads: int, batch_size: int,
+                 token_budget: int | None) -> None:
+    import semantic_engine as engine
+    from encoder_backends import load_model
+
+    # Workers run the engine's single-process path with the parent's settings.
+    engine.ENCODE_WORKERS = 1
+    engine.ENCODE_THREADS = threads
+    engine.ENCODE_BATCH_SIZE = batch_size
+    engine.ENCODE_TOKEN_BUDGET = token_budget
+    _worker["engine"] = engine
+    _worker["model"] = load_model(model_name, backend)
+
+
+def _worker_dim() -> int:
+    return int(_worker["model"].get_sentence_embedding_dimension())
+
+
+def _encode_shard(path: str, shape: Tuple[int, int], start: int, texts: List[str]) -> Tuple[int, float]:
+    """Encode texts[start:start + len(texts)] into the shared buffer; returns (tokens, seconds)."""
+    engine = _worker["engine"]
+    before = dict(engine.encode_stats)
+    emb = engine._to_numpy(engine._encode_model(_worker["model"], texts))
+    out = np.memmap(path, dtype=np.float32, mode="r+", shape=shape)
+    out[start:start + len(texts)] = emb
+    out.flush()
+    del out
+    return (engine.encode_stats["tokens"] - before["tokens"],
+            engine.encode_stats["seconds"] - before["seconds"])
+
+
+class ParallelEncoder:
+    """
+    Pool of encoder processes for one model.
+
+    Parameters
+    ----------
+    model_name, backend : str
+        Passed to encoder_backends.load_model() in each worker.
+    workers : int
+        Number of processes.
+    """
+
+    def __init__(self, model_name: str, backend: str = "torch", workers: int = 2,
+                 batch_size: int = 32, token_budget: int | None = 4096):
+        self.workers = int(workers)
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=mp.get_context("spawn"), initializer=_init_worker,
+            initargs=(model_name, backend, threads, batch_size, token_budget),
+        )
+        self.dim = self._pool.submit(_worker_dim).result()
+
+    def encode(self, texts: List[str]) -> Tuple[np.ndarray, int]:
+        """Embeddings (len(texts) x dim, float32, input order) and the number of tokens encoded."""
+        n = len(texts)
+        if not n:
+            return np.zeros((0, self.dim), dtype=np.float32), 0
+        n_shards = min(n, self.workers * SHARDS_PER_WORKER)
+        bounds = np.linspace(0, n, n_shards + 1).astype(int)
+
+        fd, path = tempfile.mkstemp(prefix="encode-", suffix=".f32", dir=_shared_dir())
+        os.close(fd)
+        try:
+            shape = (n, self.dim)
+            np.memmap(path, dtype=np.float32, mode="w+", shape=shape).flush()
+            futures = [self._pool.submit(_encode_shard, path, shape, int(a), list(texts[a:b]))
+                       for a, b in zip(bounds[:-1], bounds[1:])]
+            tokens = sum(f.result()[0] for f in futures)
+            return np.array(np.memmap(path, dtype=np.float32, mode="r", shape=shape)), tokens
+        finally:
+            os.remove(path)
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+
+def scaling_report(texts: List[str], worker_counts: List[int], model_name: str,
+                   backend: str = "torch") -> Dict:
+    """texts/s and speedup vs the single-process encoder for every pool size."""
+    import semantic_engine as engine
+    from encoder_backends import load_model
+
+    model = load_model(model_name, backend)
+    engine._encode_model(model, texts[:8])                       # warm-up
+    t0 = time.perf_counter()
+    ref = engine._to_numpy(engine._encode_model(model, texts))
+    base_s = time.perf_counter() - t0
+    rows = [{"workers": 1, "seconds": base_s, "texts_per_second": len(texts) / base_s, "speedup": 1.0}]
+    print(f"workers=1  {len(texts) / base_s:.1f} texts/s")
+
+    for w in worker_counts:
+        if w <= 1:
+            continue
+        t0 = time.perf_counter()
+        encoder = ParallelEncoder(model_name, backend, w, engine.ENCODE_BATCH_SIZE, engine.ENCODE_TOKEN_BUDGET)
+        start_s = time.perf_counter() - t0
+        encoder.encode(texts[:8 * w])                            # warm-up every worker
+        t0 = time.perf_counter()
+        emb, _ = encoder.encode(texts)
+        sec = time.perf_counter() - t0
+        encoder.close()
+        row = {"workers": w, "seconds": sec, "startup_seconds": start_s,
+               "texts_per_second": len(texts) / sec, "speedup": base_s / sec,
+               "max_abs_diff": float(np.max(np.abs(emb - ref)))}
+        rows.append(row)
+        print(f"workers={w}  {row['texts_per_second']:.1f} texts/s  speedup x{row['speedup']:.2f}"
+              f"  (pool start {start_s:.1f}s)")
+    return {"model": model_name, "backend": backend, "n_texts": len(texts),
+            "cpu_count": os.cpu_count(), "results": rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process encoding: speedup vs worker count.")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=20, help="repeat the current answers N times")
+    parser.add_argument("--out", type=Path, default=Path("outputs") / "results" / "encode_scaling.json")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        raise SystemExit(0)
+
+    import semantic_engine as engine
+
+    _, _, responses = engine.load_respondents()
+    texts = responses["Response"].tolist() * args.repeat
+    report = scaling_report(texts, args.workers, engine.MODEL_NAME, engine.ENCODER_BACKEND)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.out}")
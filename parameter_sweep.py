@@ -0,0 +1,241 @@
+# parameter_sweep.py
+# -----------------------------------------------------------------------------
+# Compare MODE / TOP_K settings from ONE encoding of the answers.
+#
+# Changing MODE or TOP_K in semantic_engine normally means a full re-run
+# (model load + encoding). Both only act after the answer x competency
+# similarity matrix, so the sweep computes that matrix once and derives:
+#   - "max" competency scores: per-respondent max over the answer rows,
+#   - "avg" competency scores: cos(mean answer, competency) = sum of the rows
+#     weighted by the answer norms / norm of the summed answers (exact, no
+#     second matrix product),
+# then mean and Top-K job rankings for every K of the list (job_matrix.py).
+#
+# One row per configuration goes to outputs/results/sweep.csv, with the
+# agreement of its job rankings with the reference configuration (engine
+# MODE / TOP_K by default): top-1 agreement, top-N overlap and Spearman
+# correlation of the job scores.
+#
+#   python parameter_sweep.py [--modes avg max] [--top-k 1 2 3 5 10] [--no-mean]
+#                             [--per-respondent] [--reference max/top3]
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from job_matrix import JobMatrix
+
+# Configurations swept by default (edit here or pass --modes / --top-k / --no-mean).
+SWEEP_MODES: List[str] = ["avg", "max"]
+SWEEP_TOP_K: List[int] = [1, 2, 3, 4, 5, 6, 7, 8, 10]
+SWEEP_MEAN: bool = True
+
+# Size of the top-N job lists compared by the overlap statistic.
+AGREEMENT_TOP_N: int = 5
+
+SWEEP_FILE = Path("outputs") / "results" / "sweep.csv"
+
+
+class SimilarityMatrix:
+    """
+    Answer x competency cosine similarities, reduced per respondent on demand.
+
+    Parameters
+    ----------
+    user_emb, comp_emb : tensor or array
+        Answer embeddings (n_answers x d) and competency embeddings.
+    owners : array of int
+        owners[i] = respondent of answer i (all zeros for the pooled profile).
+    n_owners : int
+        Number of respondents; every one must own at least one answer.
+    """
+
+    def __init__(self, user_emb, comp_emb, owners, n_owners: int):
+        import semantic_engine as engine
+
+        U = engine._to_numpy(user_emb)
+        C = engine._l2_normalize(engine._to_numpy(comp_emb))
+        owners = np.asarray(owners, dtype=np.int64)
+        order = np.argsort(owners, kind="stable")       # answers of one respondent are contiguous
+        U = U[order]
+        counts = np.bincount(owners, minlength=n_owners)
+        if (counts == 0).any():
+            raise ValueError("every respondent needs at least one answer")
+        self.starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        norms = np.linalg.norm(U, axis=1)
+        self.S = (U / np.maximum(norms, 1e-12)[:, None]) @ C.T                 # answers x competencies
+        self._weights = norms.astype(np.float32)
+        self._pooled_norms = np.linalg.norm(np.add.reduceat(U, self.starts, axis=0), axis=1)
+        self._scores: Dict[str, np.ndarray] = {}
+
+    def comp_scores(self, mode: str) -> np.ndarray:
+        """(n_respondents x n_competencies), as compute_comp_scores_batch(mode=mode)."""
+        if mode not in self._scores:
+            if mode == "max":
+                out = np.maximum.reduceat(self.S, self.starts, axis=0)
+            elif mode == "avg":
+                out = np.add.reduceat(self.S * self._weights[:, None], self.starts, axis=0)
+                out /= np.maximum(self._pooled_norms, 1e-12)[:, None]
+            else:
+                raise ValueError("mode must be 'avg' or 'max'")
+            self._scores[mode] = out.astype(np.float32, copy=False)
+        return self._scores[mode]
+
+
+def config_name(mode: str, method: str, k: int | None = None) -> str:
+    return f"{mode}/top{k}" if method == "topk" else f"{mode}/mean"
+
+
+def parse_config(name: str) -> Tuple[str, str, int | None]:
+    """'max/top3' -> ("max", "topk", 3); 'avg/mean' -> ("avg", "mean", None)."""
+    mode, _, method = name.partition("/")
+    if method == "mean":
+        return mode, "mean", None
+    if method.startswith("top") and method[3:].isdigit():
+        return mode, "topk", int(method[3:])
+    raise ValueError(f"Unknown configuration {name!r} (expected e.g. 'avg/top3' or 'max/mean')")
+
+
+def sweep_job_scores(matrix: SimilarityMatrix, job_matrix: JobMatrix, modes: List[str],
+                     top_ks: List[int], mean: bool = True) -> Dict[str, Dict]:
+    """
+    Job scores (n_respondents x n_jobs) of every configuration.
+
+    Returns {config name: {"mode", "method", "k", "scores", "seconds"}}.
+    """
+    out = {}
+    for mode in modes:
+        t0 = time.perf_counter()
+        cs = matrix.comp_scores(mode)
+        reduce_s = time.perf_counter() - t0
+        methods = [("topk", k) for k in top_ks] + ([("mean", None)] if mean else [])
+        for method, k in methods:
+            t0 = time.perf_counter()
+            scores = job_matrix.score_topk(cs, k=k) if method == "topk" else job_matrix.score_mean(cs)
+            out[config_name(mode, method, k)] = {
+                "mode": mode, "method": method, "k": k, "scores": scores,
+                "seconds": time.perf_counter() - t0 + reduce_s / len(methods),
+            }
+    return out
+
+
+def rank_agreement(scores: np.ndarray, reference: np.ndarray, top_n: int = AGREEMENT_TOP_N) -> Dict:
+    """
+    Agreement of two (n_respondents x n_jobs) job score matrices, averaged
+    over respondents: same top job, share of common top-N jobs, Spearman
+    correlation of the scores (ties get average ranks).
+    """
+    n_jobs = scores.shape[1]
+    top_n = min(top_n, n_jobs)
+    top1 = float(np.mean(scores.argmax(axis=1) == reference.argmax(axis=1)))
+    a = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+    b = np.argsort(-reference, axis=1, kind="stable")[:, :top_n]
+    overlap = np.mean([len(np.intersect1d(x, y)) / top_n for x, y in zip(a, b)]) if top_n else np.nan
+
+    ra = rankdata(scores, axis=1)
+    rb = rankdata(reference, axis=1)
+    ra -= ra.mean(axis=1, keepdims=True)
+    rb -= rb.mean(axis=1, keepdims=True)
+    denom = np.sqrt((ra ** 2).sum(axis=1) * (rb ** 2).sum(axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rho = (ra * rb).sum(axis=1) / denom
+    spearman = float(np.nanmean(rho)) if np.isfinite(rho).any() else np.nan
+    return {"top1_agreement": top1, f"top{top_n}_overlap": float(overlap), "spearman": spearman}
+
+
+def sweep_table(results: Dict[str, Dict], job_titles: List[str], reference: str) -> pd.DataFrame:
+    """One row per configuration: best job, its share of respondents and the agreement stats."""
+    if reference not in results:
+        raise ValueError(f"Reference configuration {reference!r} is not part of the sweep")
+    ref = results[reference]["scores"]
+    titles = np.asarray(job_titles, dtype=object)
+    rows = []
+    for name, res in results.items():
+        scores = res["scores"]
+        best = scores.argmax(axis=1)
+        top_job = np.bincount(best, minlength=len(titles)).argmax()
+        rows.append({
+            "Config": name, "Mode": res["mode"], "Method": res["method"], "K": res["k"],
+            "Reference": name == reference,
+            "TopJob": titles[top_job], "TopJobShare": float(np.mean(best == top_job)),
+            "MeanTopScore": float(scores.max(axis=1).mean()),
+            **rank_agreement(scores, ref),
+            "Seconds": res["seconds"],
+        })
+    table = pd.DataFrame(rows)
+    table["K"] = table["K"].astype("Int64")
+    return table
+
+
+def run_sweep(modes: List[str] = SWEEP_MODES, top_ks: List[int] = SWEEP_TOP_K, mean: bool = SWEEP_MEAN,
+              per_respondent: bool = False, reference: str | None = None,
+              out: Path = SWEEP_FILE) -> pd.DataFrame:
+    """Encode data/user_responses.csv once, score every configuration, write the table."""
+    import semantic_engine as engine
+
+    reference = reference or config_name(engine.MODE, "topk", engine.TOP_K)
+    ref_mode, ref_method, ref_k = parse_config(reference)
+    modes = list(dict.fromkeys(list(modes) + [ref_mode]))
+    if ref_method == "topk":
+        top_ks = sorted(set(top_ks) | {ref_k})
+    mean = mean or ref_method == "mean"
+
+    competencies, jobs, responses = engine.load_respondents()
+    texts = responses["Response"].tolist()
+    if not texts:
+        raise ValueError("No user responses found in data/user_responses.csv.")
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+
+    t0 = time.perf_counter()
+    print(f"Loading model: {engine.MODEL_NAME} ({engine.ENCODER_BACKEND})")
+    model = engine.load_model(engine.MODEL_NAME, engine.ENCODER_BACKEND)
+    print(f"Encoding {len(texts)} texts (once)...")
+    user_emb = engine.encode(model, texts)
+    comp_emb = engine.encode_competencies(model, competencies["CompetencyText"].astype(str).tolist())
+    encode_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if per_respondent:
+        owners, uniques = pd.factorize(responses["RespondentID"])
+        matrix = SimilarityMatrix(user_emb, comp_emb, owners, len(uniques))
+    else:
+        matrix = SimilarityMatrix(user_emb, comp_emb, np.zeros(len(texts), dtype=np.int64), 1)
+    results = sweep_job_scores(matrix, job_matrix, modes, top_ks, mean=mean)
+    table = sweep_table(results, job_matrix.job_titles, reference)
+    sweep_s = time.perf_counter() - t0
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out, index=False)
+    print(f"Encoding + model load {encode_s:.2f}s; {len(results)} configurations scored in {sweep_s:.2f}s "
+          f"({matrix.S.shape[0]} answers x {matrix.S.shape[1]} competencies)")
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score many MODE / TOP_K settings from one encoding.")
+    parser.add_argument("--modes", nargs="+", choices=["avg", "max"], default=SWEEP_MODES)
+    parser.add_argument("--top-k", type=int, nargs="+", default=SWEEP_TOP_K)
+    parser.add_argument("--no-mean", dest="mean", action="store_false", default=SWEEP_MEAN,
+                        help="skip the mean-of-required-competencies job score")
+    parser.add_argument("--per-respondent", action="store_true",
+                        help="score every respondent (agreement averaged over respondents)")
+    parser.add_argument("--reference", default=None,
+                        help="configuration the others are compared to, e.g. max/top3 (default: engine MODE/TOP_K)")
+    parser.add_argument("--out", type=Path, default=SWEEP_FILE)
+    args = parser.parse_args()
+
+    table = run_sweep(args.modes, args.top_k, args.mean, per_respondent=args.per_respondent,
+                      reference=args.reference, out=args.out)
+    with pd.option_context("display.max_columns", None, "display.width", 160):
+        print(table.drop(columns=["Mode", "Method", "K"]).to_string(index=False, float_format="%.3f"))
+    print(f"Sweep table written to {args.out}")
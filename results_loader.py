@@ -0,0 +1,159 @@
+# results_loader.py
+# -----------------------------------------------------------------------------
+# One interface to read the engine results, from GitHub or from disk.
+#
+#   GitHubSource : raw.githubusercontent.com over one pooled requests.Session,
+#                  all files fetched concurrently, each kept for `ttl` seconds
+#                  and then revalidated with If-None-Match (a 304 costs no
+#                  download).
+#   LocalSource  : files under a local folder (e.g. the repo root after
+#                  `python run_engine.py`), re-read only when their mtime changes.
+#
+# Both return {path: text or None} from fetch(paths) ({path: bytes or None}
+# from fetch_bytes(paths), for COLUMNAR_FILE), and version(paths), a token that
+# changes when any of the files changes (for memoizing parsed data).
+# Nothing here depends on Streamlit: the pages keep one source per session
+# (st.cache_resource) so the caches survive reruns.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+GITHUB_REPO = "Amik24/semantic-analysis-project"
+BASE_RAW_URL = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main"
+
+# Files the visualisation pages read.
+RESULT_FILES = [
+    "outputs/competency_scores.csv",
+    "outputs/block_scores.csv",
+    "outputs/job_scores.csv",
+    "outputs/results/summary.json",
+    "data/competencies.csv",
+]
+
+# Columnar copy of the pooled tables (semantic_engine --output-format npz),
+# read instead of the three score CSVs when present.
+COLUMNAR_FILE = "outputs/scores.npz"
+
+# Answers behind each competency score (semantic_engine in "max" mode), shown
+# as "matched because of your ... answer" when present.
+EVIDENCE_FILE = "outputs/evidence.csv"
+
+TTL_SECONDS = 60.0      # how long a fetched file is trusted without asking GitHub
+TIMEOUT_SECONDS = 10.0  # per request
+MAX_WORKERS = 8
+
+
+class GitHubSource:
+    """Concurrent, cached reads of raw files from a GitHub branch."""
+
+    def __init__(self, base_url: str = BASE_RAW_URL, ttl: float = TTL_SECONDS,
+                 timeout: float = TIMEOUT_SECONDS):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # path -> (content or None, etag, fetched_at)
+        self._cache: Dict[str, Tuple[bytes | None, str | None, float]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0      # HTTP requests sent
+        self.downloads = 0     # 200 responses (full bodies)
+
+    def _fetch_one(self, path: str) -> bytes | None:
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and time.monotonic() - cached[2] < self.ttl:
+            return cached[0]
+
+        headers = {"If-None-Match": cached[1]} if cached and cached[1] else {}
+        try:
+            resp = self.session.get(f"{self.base_url}/{path}", headers=headers, timeout=self.timeout)
+        except Exception:
+            return cached[0] if cached else None   # keep serving the last good copy
+        with self._lock:
+            self.requests += 1
+            if resp.status_code == 304 and cached:
+                self._cache[path] = (cached[0], cached[1], time.monotonic())
+                return cached[0]
+            if resp.status_code == 200:
+                self.downloads += 1
+                self._cache[path] = (resp.content, resp.headers.get("ETag"), time.monotonic())
+                return resp.content
+            self._cache[path] = (None, None, time.monotonic())
+            return None
+
+    def fetch_bytes(self, paths: List[str]) -> Dict[str, bytes | None]:
+        """Raw contents of `paths` (None for missing files), fetched concurrently."""
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, max(1, len(paths)))) as pool:
+            return dict(zip(paths, pool.map(self._fetch_one, paths)))
+
+    def fetch(self, paths: List[str]) -> Dict[str, str | None]:
+        """Text contents of `paths` (None for missing files), fetched concurrently."""
+        return _decode(self.fetch_bytes(paths))
+
+    def version(self, paths: List[str]) -> Tuple:
+        """Changes whenever one of `paths` changes (ETag, or content length if none)."""
+        with self._lock:
+            return tuple(
+                (p, c[1] or (len(c[0]) if c[0] is not None else None)) if c else (p, None)
+                for p, c in ((p, self._cache.get(p)) for p in paths)
+            )
+
+    def invalidate(self) -> None:
+        """Force revalidation on the next fetch (ETags are kept, so 304s stay cheap)."""
+        with self._lock:
+            self._cache = {p: (t, e, float("-inf")) for p, (t, e, _) in self._cache.items()}
+
+
+class LocalSource:
+    """Same interface over a local folder; files are re-read only when modified."""
+
+    def __init__(self, root: Path = Path(".")):
+        self.root = Path(root)
+        self._cache: Dict[str, Tuple[bytes | None, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def _mtime(self, path: str) -> float | None:
+        try:
+            return (self.root / path).stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _fetch_one(self, path: str) -> bytes | None:
+        mtime = self._mtime(path)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached and cached[1] == mtime:
+            return cached[0]
+        content = (self.root / path).read_bytes() if mtime is not None else None
+        with self._lock:
+            self._cache[path] = (content, mtime)
+        return content
+
+    def fetch_bytes(self, paths: List[str]) -> Dict[str, bytes | None]:
+        return {p: self._fetch_one(p) for p in paths}
+
+    def fetch(self, paths: List[str]) -> Dict[str, str | None]:
+        return _decode(self.fetch_bytes(paths))
+
+    def version(self, paths: List[str]) -> Tuple:
+        return tuple((p, self._mtime(p)) for p in paths)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def _decode(contents: Dict[str, bytes | None]) -> Dict[str, str | None]:
+    return {p: c.decode("utf-8") if c is not None else None for p, c in contents.items()}
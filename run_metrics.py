@@ -0,0 +1,124 @@
+# run_metrics.py
+# -----------------------------------------------------------------------------
+# Lightweight instrumentation of engine runs.
+#
+#   metrics = RunMetrics(trace_path=Path("outputs/results/trace.jsonl"))
+#   with metrics.span("encode_responses", texts=len(texts)):
+#       ...
+#   metrics.record(answer_cache={"hits": 10, "misses": 2})
+#   metrics.to_dict()   # -> the "run_metrics" section of summary.json
+#
+# Every finished span (name, seconds, counts, texts/s, peak RSS so far) is
+# appended to the JSONL trace as it ends, so an interrupted run still leaves
+# a trace. Spans may nest; to_dict() sums the spans of each name.
+# RunMetrics(enabled=False) records nothing: long-lived callers of the engine
+# functions (scoring_service.py) use it so spans never pile up.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident memory of this process so far (None where unavailable)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+class RunMetrics:
+    """
+    Timing spans and counters of one run.
+
+    Parameters
+    ----------
+    trace_path : Path, optional
+        JSONL file rewritten for this run (one line per span / record).
+    enabled : bool
+        False gives a no-op recorder (spans and records are dropped).
+    """
+
+    def __init__(self, trace_path: Path | None = None, enabled: bool = True):
+        self.enabled = enabled
+        self.trace_path = Path(trace_path) if trace_path and enabled else None
+        self.spans: List[Dict] = []
+        self.values: Dict = {}
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._t0 = time.perf_counter()
+        if self.trace_path:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            self.trace_path.write_text("", encoding="utf-8")
+            self._trace({"event": "start", "started_at": self.started_at})
+
+    def _trace(self, rec: Dict) -> None:
+        if self.trace_path:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, default=float) + "\n")
+
+    @contextmanager
+    def span(self, name: str, **counts):
+        """
+        Time a stage. Yields the span record, so counts known only at the end
+        can be added (`rec["texts"] = n`). A "texts" count gives texts/s.
+        """
+        rec = {"event": "span", "name": name, **counts}
+        if not self.enabled:
+            yield rec
+            return
+        start = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - start
+            rec["offset_seconds"] = start - self._t0
+            if rec.get("texts") and rec["seconds"] > 0:
+                rec["texts_per_second"] = rec["texts"] / rec["seconds"]
+            rec["peak_rss_mb"] = peak_rss_mb()
+            self.spans.append(rec)
+            self._trace(rec)
+
+    def record(self, **values) -> None:
+        """Store run-level figures (cache hit rates, sizes, ...)."""
+        if not self.enabled:
+            return
+        self.values.update(values)
+        self._trace({"event": "record", **values})
+
+    def to_dict(self) -> Dict:
+        stages: Dict[str, Dict] = {}
+        for rec in self.spans:
+            st = stages.setdefault(rec["name"], {"seconds": 0.0, "calls": 0})
+            st["seconds"] += rec["seconds"]
+            st["calls"] += 1
+            if rec.get("texts") is not None:
+                st["texts"] = st.get("texts", 0) + int(rec["texts"])
+        for st in stages.values():
+            if st.get("texts") and st["seconds"] > 0:
+                st["texts_per_second"] = st["texts"] / st["seconds"]
+        return {
+            "started_at": self.started_at,
+            "total_seconds": time.perf_counter() - self._t0,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            **self.values,
+        }
+
+    def finish(self) -> Dict:
+        """Final summary (also written to the trace)."""
+        out = self.to_dict()
+        self._trace({"event": "end", **out})
+        return out
+
+
+def hit_rate(hits: int, misses: int) -> Dict:
+    total = hits + misses
+    return {"hits": int(hits), "misses": int(misses), "hit_rate": hits / total if total else None}
@@ -0,0 +1,227 @@
+# scoring_service.py
+# -----------------------------------------------------------------------------
+# Resident scoring server: the model is loaded once, not once per run.
+#
+# `python semantic_engine.py` pays for importing torch, loading the
+# SentenceTransformer and encoding the competency catalog before it scores
+# anything. This service does all of that once at startup, then answers score
+# requests over local HTTP in milliseconds (one encode of the new answers +
+# matrix products against the cached competency embeddings).
+#
+# Run:
+#   python scoring_service.py                 # http://127.0.0.1:8765
+#   python scoring_service.py --port 9000 --host 0.0.0.0
+#   python scoring_service.py --max-batch-size 128 --max-wait-ms 20
+#
+# Endpoints:
+#   GET  /health  -> {"status": "ok", "model": ..., "competencies": n, "jobs": n}
+#   GET  /stats   -> micro-batching stats (batch sizes, queue waits), cache hits
+#   POST /score   -> body is either
+#                      {"texts": ["I use Python...", "..."]}
+#                    or one form submission as written by app.py
+#                      {"response": {"Programming": "...", "NLP": "...", ...}}
+#                    optional "mode" ("avg" / "max") and "top_k" (positive
+#                    integer) override the engine defaults. Returns the
+#                    summary.json fields plus the full competency, block and
+#                    job rankings; a malformed body gets a 400 with an "error".
+#
+# Concurrent requests are not encoded one by one: they go through a
+# MicroBatcher (micro_batcher.py) that merges them into one model.encode call.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import pandas as pd
+
+import semantic_engine as engine
+from encoder_backends import BACKENDS, load_model, model_key
+from job_matrix import JobMatrix
+from micro_batcher import MAX_BATCH_SIZE, MAX_WAIT_MS, MicroBatcher
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Largest request body accepted (bytes); a form submission is a few KB.
+MAX_BODY_BYTES = 1_000_000
+
+
+class ScoringService:
+    """
+    Model, competency embeddings and job matrix kept in memory between requests.
+
+    Parameters
+    ----------
+    model_name : str
+        SentenceTransformer to load (default: engine.MODEL_NAME).
+    backend : str
+        Encoder backend, see encoder_backends.py (default: engine.ENCODER_BACKEND).
+    mode, top_k :
+        Defaults used when a request does not override them.
+    max_batch_size, max_wait_ms :
+        Micro-batching limits for encode calls (see MicroBatcher).
+    """
+
+    def __init__(self, model_name: str = engine.MODEL_NAME, backend: str = engine.ENCODER_BACKEND,
+                 mode: str = engine.MODE, top_k: int = engine.TOP_K,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        t0 = time.perf_counter()
+        self.model_name = model_name
+        self.backend = backend
+        self.key = model_key(model_name, backend)
+        self.mode = mode
+        self.top_k = top_k
+        self.competencies, self.jobs = engine.load_reference()
+        self.job_matrix = JobMatrix(self.jobs, self.competencies["CompetencyID"].tolist())
+
+        print(f"Loading model: {model_name} ({backend})")
+        self.model = load_model(model_name, backend)
+        self.comp_emb = engine.encode_competencies(
+            self.model, self.competencies["CompetencyText"].astype(str).tolist(), model_name=self.key
+        )
+        # One forward pass at a time; concurrent requests are merged into it.
+        self.batcher = MicroBatcher(lambda texts: engine.encode(self.model, texts, self.key),
+                                    max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.startup_seconds = time.perf_counter() - t0
+        print(f"Scoring service ready in {self.startup_seconds:.1f}s")
+
+    def texts_from_payload(self, payload: Dict) -> List[str]:
+        """Answer texts from a request body ({"texts": [...]} or {"response": {...}})."""
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        if "texts" in payload:
+            if not isinstance(payload["texts"], list):
+                raise ValueError("'texts' must be a list of strings")
+            texts = [str(t).strip() for t in payload["texts"]]
+            return [t for t in texts if t]
+        if "response" in payload:
+            if not isinstance(payload["response"], dict):
+                raise ValueError("'response' must be an object of answer fields")
+            frame = pd.DataFrame([payload["response"]])
+            frame.columns = frame.columns.astype(str).str.strip()
+            return engine._responses_from_frame(frame)["Response"].tolist()
+        raise ValueError("request body needs a 'texts' list or a 'response' object")
+
+    def score(self, texts: List[str], mode: str | None = None, top_k: int | None = None) -> Dict:
+        """Score one profile made of `texts`; same maths as the pooled engine run."""
+        if not texts:
+            raise ValueError("no usable answer text to score")
+        mode = mode or self.mode
+        if mode not in ("avg", "max"):
+            raise ValueError("mode must be 'avg' or 'max'")
+        if top_k is None:
+            top_k = self.top_k
+        elif isinstance(top_k, bool) or not isinstance(top_k, int) or top_k <= 0:
+            raise ValueError("top_k must be a positive integer")
+
+        t0 = time.perf_counter()
+        user_emb = self.batcher.encode(texts)
+        comp_scores = engine.compute_comp_scores(user_emb, self.comp_emb, mode=mode)
+        comp_df, block_scores, jobs_ranked = engine.pooled_tables(
+            comp_scores, self.competencies, self.jobs, top_k=top_k, job_matrix=self.job_matrix
+        )
+
+        top_job = jobs_ranked.iloc[0] if len(jobs_ranked) else None
+        return {
+            "mode": mode,
+            "top_k": top_k,
+            "final_coverage": float(block_scores.mean()),
+            "top_job": top_job["JobTitle"] if top_job is not None else None,
+            "top_job_score": float(top_job["JobScore"]) if top_job is not None else None,
+            "top_competencies": comp_df.head(5)[
+                ["CompetencyID", "CompetencyText", "Score"]
+            ].to_dict(orient="records"),
+            "competencies": comp_df.to_dict(orient="records"),
+            "blocks": [{"BlockName": b, "Score": float(v)} for b, v in block_scores.items()],
+            "jobs": jobs_ranked[["JobID", "JobTitle", "JobScore"]].to_dict(orient="records"),
+            "elapsed_ms": (time.perf_counter() - t0) * 1000.0,
+        }
+
+    def stats(self) -> Dict:
+        """Micro-batching distribution plus answer-cache counters."""
+        out = self.batcher.stats()
+        out["encoder"] = dict(engine.encode_stats)
+        if engine.USE_ANSWER_CACHE:
+            cache = engine.answer_cache(self.key)
+            out["answer_cache"] = {"hits": cache.hits, "misses": cache.misses}
+        return out
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "model": self.model_name,
+            "backend": self.backend,
+            "competencies": len(self.competencies),
+            "jobs": len(self.jobs),
+        }
+
+
+def _make_handler(service: ScoringService):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: Dict) -> None:
+            data = json.dumps(body, ensure_ascii=False, default=float).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, service.health())
+            elif self.path == "/stats":
+                self._reply(200, service.stats())
+            else:
+                self._reply(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._reply(404, {"error": f"unknown path {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._reply(413, {"error": "request body too large"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                texts = service.texts_from_payload(payload)
+                result = service.score(texts, mode=payload.get("mode"), top_k=payload.get("top_k"))
+            except ValueError as e:  # includes json.JSONDecodeError
+                self._reply(400, {"error": str(e)})
+                return
+            self._reply(200, result)
+
+    return Handler
+
+
+def serve(host: str = HOST, port: int = PORT, service: ScoringService | None = None) -> None:
+    """Start the service and block until interrupted."""
+    service = service or ScoringService()
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"Listening on http://{host}:{port} (POST /score, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.batcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident semantic scoring service.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--backend", choices=BACKENDS, default=engine.ENCODER_BACKEND)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help="max texts per encode call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="how long to wait for more requests before encoding")
+    args = parser.parse_args()
+    serve(args.host, args.port,
+          ScoringService(backend=args.backend, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms))
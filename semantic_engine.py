@@ -27,25 +27,32 @@
 from __future__ import annotations
 
 import json
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
+
+from typing import TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
-
-BASE_DIR = Path.cwd()          # force le repo root
-DATA_DIR = BASE_DIR / "data"
-OUT_DIR  = BASE_DIR / "outputs"
-RES_DIR  = OUT_DIR / "results"
-FIG_DIR  = OUT_DIR / "figures"
 
+from ann_index import IVFIndex
+from candidate_index import CandidateIndex, CandidateIndexWriter
+from columnar_output import write_tables
+from embedding_store import AnswerCache, EmbeddingStore, model_slug, text_hash
+from encoder_backends import BACKENDS, load_model, model_key, split_model_key
+from incremental_state import IncrementalState
+from job_matrix import JobMatrix
+from run_metrics import RunMetrics, hit_rate
 
+# torch / sentence-transformers take seconds to import: they are only loaded
+# by the functions that encode or score tensors, so importing this module (or
+# running a command that only reads outputs) stays fast. Output folders are
+# created by _ensure_folders() when a run starts, not at import.
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-# Crée les dossiers si manquants
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-RES_DIR.mkdir(parents=True, exist_ok=True)
-FIG_DIR.mkdir(parents=True, exist_ok=True)
+    from parallel_encoder import ParallelEncoder
 
 
 # --------------------------- Configuration (edit here) ------------------------
@@ -54,6 +61,11 @@ FIG_DIR.mkdir(parents=True, exist_ok=True)
 # "all-mpnet-base-v2" = strong, general-purpose, good quality.
 MODEL_NAME: str = "all-mpnet-base-v2"
 
+# CPU inference backend for MODEL_NAME (see encoder_backends.py):
+#   "torch" (fp32 reference), "int8" (dynamic quantization), "onnx" (ONNX Runtime)
+# (Also available as: python semantic_engine.py --backend int8)
+ENCODER_BACKEND: str = "torch"
+
 # How we combine multiple user answers before scoring competencies:
 #   - "avg": average the user answers into one profile vector (stable)
 #   - "max": for each competency, take the strongest match among answers
@@ -63,11 +75,112 @@ MODE: str = "avg"
 #   - For each job, take the Top-K competency scores and average them.
 TOP_K: int = 3
 
+# Competency embeddings are cached on disk (per model, per text hash) so that
+# only new or edited competencies are re-encoded between runs.
+USE_EMBEDDING_CACHE: bool = True
+CACHE_DIR = Path(".cache") / "embeddings"
+
+# User answers are cached the same way (keyed by model + normalized text), so
+# duplicate answers and resubmissions are never encoded twice.
+USE_ANSWER_CACHE: bool = True
+
+# Encoder batching (CPU): texts are grouped into token-length buckets and each
+# bucket is encoded with batch_size = max(ENCODE_BATCH_SIZE,
+# ENCODE_TOKEN_BUDGET // bucket length), so short answers ("NLP") go in big
+# batches and long reflections in small ones, with little padding either way.
+# ENCODE_THREADS sets torch's CPU thread count (None = torch default).
+ENCODE_BATCH_SIZE: int = 32
+ENCODE_TOKEN_BUDGET: int | None = 4096
+ENCODE_THREADS: int | None = None
+
+# Multi-process encoding (parallel_encoder.py): with ENCODE_WORKERS > 1, calls
+# of at least PARALLEL_MIN_TEXTS texts are sharded over a pool of worker
+# processes, each holding its own copy of the model (smaller calls are not
+# worth the hand-off). `python parallel_encoder.py --bench` helps size it.
+# (Also available as: python semantic_engine.py --encode-workers 4)
+ENCODE_WORKERS: int = 1
+PARALLEL_MIN_TEXTS: int = 256
+
+# Per-respondent scoring: besides the pooled profile, score every respondent
+# separately and write per-person tables to outputs/respondents/.
+# (Also available as: python semantic_engine.py --per-respondent)
+PER_RESPONDENT: bool = False
+
+# Result file format. The pooled CSVs and summary.json (what the front-end
+# reads) are always written; OUTPUT_FORMAT picks the per-respondent tables:
+#   "csv" (text), "npz" (compressed, dictionary-encoded, see columnar_output.py)
+#   or "both". With "npz" / "both" the pooled tables also go to outputs/scores.npz;
+#   a "csv" run removes the scores.npz files of an earlier run.
+# (Also available as: python semantic_engine.py --output-format npz)
+OUTPUT_FORMAT: str = "csv"
+OUTPUT_FORMATS = ("csv", "npz", "both")
+
+# Incremental runs: remember which rows of user_responses.csv were already
+# scored (row fingerprints) and only encode the new ones.
+# (Also available as: python semantic_engine.py --incremental)
+INCREMENTAL: bool = False
+STATE_DIR = Path(".cache") / "incremental"
+
+# Streaming runs for very large response files: read user_responses.csv
+# STREAM_CHUNK_ROWS rows at a time, encode and score each chunk as it arrives
+# and append its per-respondent outputs, so memory stays bounded by the chunk
+# size (None = read the whole file at once).
+# (Also available as: python semantic_engine.py --chunk-rows 50000)
+STREAM_CHUNK_ROWS: int | None = None
+
+# Approximate nearest-neighbour competency retrieval (ann_index.py) for large
+# taxonomies: each profile (or answer, in "max" mode) is only scored against
+# its ANN_TOP_N nearest competencies; the others count as 0 in block and job
+# aggregation. Only used when the catalog has >= ANN_MIN_COMPETENCIES rows.
+USE_ANN_INDEX: bool = False
+ANN_MIN_COMPETENCIES: int = 5000
+ANN_TOP_N: int = 200
+ANN_NPROBE: int = 8
+
+# Field-level encoding: encode each answer field on its own (short inputs, no
+# truncation of long concatenations) and pool the field embeddings per
+# respondent, weighted by FIELD_WEIGHTS (missing fields weigh 1.0, 0 drops a
+# field). With RESTRICT_TO_MAPSTO, a competency is only scored from the fields
+# whose question lists it in the MapsTo column of data/questions.csv.
+# (Also available as: python semantic_engine.py --field-level [--restrict-mapsto])
+FIELD_LEVEL: bool = False
+FIELD_WEIGHTS: dict = {}
+RESTRICT_TO_MAPSTO: bool = False
+
+# Instrumentation: every run writes timing spans, texts/s, peak RSS and cache
+# hit rates to the "run_metrics" section of outputs/results/summary.json and
+# to outputs/results/trace.jsonl. PROFILE_RUN also dumps a cProfile file per
+# run (outputs/results/profile-<time>.pstats, e.g. for snakeviz / pstats).
+# (Also available as: python semantic_engine.py --profile)
+PROFILE_RUN: bool = False
+
+# Evidence (MODE = "max"): the max-mode scorers already hold the full answer x
+# competency similarity matrix, so the EVIDENCE_TOP_N best answers behind each
+# competency score are taken from it (vectorized top-k, no extra encoding) and
+# written to outputs/evidence.csv (pooled profile) and, for each respondent's
+# EVIDENCE_COMPETENCIES best competencies, to outputs/respondents/evidence.csv.
+# With --field-level every answer is one field ("matched because of your NLP
+# answer"). 0 = no evidence tables. Not available with the ANN index.
+EVIDENCE_TOP_N: int = 3
+EVIDENCE_COMPETENCIES: int = 10
+EVIDENCE_EXCERPT_CHARS: int = 120
+
+# Embedding archive (embedding_archive.py): with ARCHIVE_DTYPE = "float16" or
+# "int8", the answer embeddings of every new respondent are appended to a
+# quantized, memory-mapped archive under ARCHIVE_DIR, so past respondents can
+# be re-scored against a new catalog without the encoder
+# (python embedding_archive.py rescore). None = no archive.
+# (Also available as: python semantic_engine.py --archive int8)
+ARCHIVE_DTYPE: str | None = None
+ARCHIVE_DIR = Path("archive")
+
 # Folder layout (relative paths so it works the same locally and in CI)
 DATA_DIR = Path("data")
 OUT_DIR = Path("outputs")
 FIG_DIR = OUT_DIR / "figures"   # reserved if you add charts later
 RES_DIR = OUT_DIR / "results"
+RESP_DIR = OUT_DIR / "respondents"  # per-respondent tables
+CANDIDATE_DIR = OUT_DIR / "candidates"  # score matrix for job -> candidates lookups
 
 # -------------------------------------------------------------------------
 # Extra support for front-end CSV exports with multiple columns
@@ -96,6 +209,16 @@ CANONICAL_VARIANTS = {
 # Non-text columns we intentionally ignore when concatenating:
 IGNORE_FIELDS = {"Timestamp", "First_Name", "Last_Name", "Git_Level", "Presentation_Level"}
 
+# Columns that identify one respondent (per-respondent scoring keys on these).
+KEY_FIELDS = ["Timestamp", "First_Name", "Last_Name"]
+
+# Question of data/questions.csv answered by each canonical text field.
+FIELD_QUESTIONS = {
+    "Programming": "Q01", "Data_Analysis": "Q02", "ML_Projects": "Q03",
+    "ML_Problem": "Q04", "NLP": "Q05", "Data_Pipeline": "Q06",
+    "Sharing_Results": "Q07", "Reflection": "Q10",
+}
+
 def _resolve_actual_cols(df: pd.DataFrame) -> list[str]:
     """Find actual column names present in df for each canonical text field."""
     cols = []
@@ -106,16 +229,25 @@ def _resolve_actual_cols(df: pd.DataFrame) -> list[str]:
             cols.append(found)
     return cols
 
-def _row_to_response(row: pd.Series, selected_cols: list[str]) -> str:
-    """Concatenate selected text columns from a row into one clean string."""
-    parts = []
+def _clean_text(col: pd.Series) -> pd.Series:
+    """Stripped text of a column; missing values and "none" become ""."""
+    txt = col.astype(str).str.strip().where(col.notna(), "")
+    return txt.where(txt.str.lower() != "none", "")
+
+def _join_text_columns(df: pd.DataFrame, selected_cols: list[str]) -> pd.Series:
+    """Concatenate the selected text columns of every row into one clean string (vectorized)."""
+    texts = pd.Series("", index=df.index, dtype=object)
     for col in selected_cols:
-        val = row.get(col, None)
-        if pd.notna(val):
-            txt = str(val).strip()
-            if txt and txt.lower() != "none":
-                parts.append(txt)
-    return " ".join(parts).strip()
+        txt = _clean_text(df[col])
+        texts = texts + np.where((texts != "") & (txt != ""), " ", "") + txt
+    return texts
+
+def _respondent_ids(df: pd.DataFrame, key_cols: list[str]) -> pd.Series:
+    """"Timestamp | First_Name | Last_Name" of every row ("row-<n>" without key columns)."""
+    if not key_cols:
+        return pd.Series([f"row-{i}" for i in df.index], index=df.index, dtype=object)
+    keys = df[key_cols].astype(str).fillna("nan")   # same ids as str(NaN)
+    return keys[key_cols[0]].str.cat([keys[c] for c in key_cols[1:]], sep=" | ")
 
 # ------------------------------ Helper functions ------------------------------
 
@@ -136,39 +268,26 @@ def _ensure_folders() -> None:
         FIG_DIR.unlink()
     FIG_DIR.mkdir(parents=True, exist_ok=True)
 
-def load_inputs() -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+def _row_fingerprints(df: pd.DataFrame) -> pd.Series:
     """
-    Load inputs. If data/user_responses.csv has a 'response' column, use it.
-    Otherwise, treat it as a multi-column Streamlit export and build the text.
+    Fingerprint of every raw row: hash of its content plus its occurrence
+    number among identical rows, so a resubmitted identical row is a new row.
     """
-    comp_path  = DATA_DIR / "competencies.csv"
-    jobs_path  = DATA_DIR / "job_skills.csv"
-    user_path  = DATA_DIR / "user_responses.csv"   # Streamlit writes this
-
-    if not comp_path.exists():
-        raise FileNotFoundError("Missing data/competencies.csv")
-    if not jobs_path.exists():
-        raise FileNotFoundError("Missing data/job_skills.csv")
-    if not user_path.exists():
-        raise FileNotFoundError("Missing data/user_responses.csv")
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return hashes.map("{:016x}".format) + "-" + hashes.groupby(hashes).cumcount().astype(str)
 
-    # Reference data
-    competencies = pd.read_csv(comp_path)
-    jobs_long    = pd.read_csv(jobs_path)
-    competencies.columns = competencies.columns.str.strip()
-    jobs_long.columns    = jobs_long.columns.str.strip()
 
-    # User responses (single- or multi-column)
-    df = pd.read_csv(user_path)
-    df.columns = df.columns.str.strip()
+def _responses_from_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build one usable text per row of user_responses.csv, keeping who wrote it.
 
-    user_inputs: List[str] = []
+    Returns a DataFrame with columns RespondentID, the KEY_FIELDS present in the
+    file, Response, and RowHash (fingerprint of the raw row, used by incremental
+    runs). Rows with no usable text are dropped.
+    """
     if "response" in df.columns:
         # Classic path: already a single text column
-        user_inputs = (
-            df["response"].dropna().astype(str).map(str.strip)
-              .replace("", np.nan).dropna().tolist()
-        )
+        texts = df["response"].astype(str).map(str.strip).where(df["response"].notna(), "")
     else:
         # Streamlit export path: build text from multiple columns
         # 1) pick actual columns present for the canonical text fields
@@ -182,15 +301,73 @@ def load_inputs() -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
                 + ", ".join(CANONICAL_TEXT_FIELDS)
             )
         # 3) build one response per row
-        user_inputs = df.apply(lambda r: _row_to_response(r, actual_cols), axis=1).tolist()
-        user_inputs = [x for x in user_inputs if x]  # keep non-empty
+        texts = _join_text_columns(df, actual_cols)
 
-    if not user_inputs:
+    key_cols = [c for c in KEY_FIELDS if c in df.columns]
+    out = df[key_cols].copy()
+    out["RespondentID"] = _respondent_ids(df, key_cols)
+    out["Response"] = texts.astype(str)
+    out["RowHash"] = _row_fingerprints(df)
+    out = out[out["Response"] != ""].reset_index(drop=True)
+    return out[["RespondentID", *key_cols, "Response", "RowHash"]]
+
+
+def _field_responses_from_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Field-level version of _responses_from_frame(): one row per non-empty
+    answer field, with a Field column holding its canonical name ("response"
+    for the single-column format).
+    """
+    if "response" in df.columns:
+        out = _responses_from_frame(df).assign(Field="response")
+        return out[[*out.columns[:-3], "Field", "Response", "RowHash"]]
+
+    actual_to_canon = {}
+    existing = set(df.columns)
+    for canon, variants in CANONICAL_VARIANTS.items():
+        found = next((v for v in variants if v in existing), None)
+        if found and found not in IGNORE_FIELDS:
+            actual_to_canon[found] = canon
+    if not actual_to_canon:
         raise ValueError(
-            "No usable user responses found in data/user_responses.csv."
+            "user_responses.csv has no recognized text columns. "
+            "Expected one or more of: "
+            + ", ".join(CANONICAL_TEXT_FIELDS)
         )
 
-    # Group job -> list of required competencies
+    key_cols = [c for c in KEY_FIELDS if c in df.columns]
+    base = df[key_cols].copy()
+    base["RespondentID"] = _respondent_ids(df, key_cols)
+    base["RowHash"] = _row_fingerprints(df)
+
+    parts = []
+    for actual, canon in actual_to_canon.items():
+        parts.append(base.assign(Field=canon, Response=_clean_text(df[actual]), _row=np.arange(len(df))))
+    out = pd.concat(parts, ignore_index=True)
+    out = out[out["Response"] != ""].sort_values("_row", kind="stable").reset_index(drop=True)
+    return out[["RespondentID", *key_cols, "Field", "Response", "RowHash"]]
+
+
+def load_reference() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load the reference data: competencies and jobs (job -> list of required
+    CompetencyID), without touching data/user_responses.csv.
+    """
+    comp_path  = DATA_DIR / "competencies.csv"
+    jobs_path  = DATA_DIR / "job_skills.csv"
+
+    if not comp_path.exists():
+        raise FileNotFoundError("Missing data/competencies.csv")
+    if not jobs_path.exists():
+        raise FileNotFoundError("Missing data/job_skills.csv")
+
+    competencies = pd.read_csv(comp_path)
+    jobs_long    = pd.read_csv(jobs_path)
+    competencies.columns = competencies.columns.str.strip()
+    jobs_long.columns    = jobs_long.columns.str.strip()
+
+    # Group job -> list of required competencies (the layout JobMatrix,
+    # candidate_index.py and the scalar scorers read; job_skills.csv is unchanged)
     jobs = (
         jobs_long
         .groupby(["JobID", "JobTitle"])["CompetencyID"]
@@ -198,17 +375,223 @@ def load_inputs() -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
         .reset_index()
         .rename(columns={"CompetencyID": "RequiredCompetencies"})
     )
+    return competencies, jobs
 
-    return competencies, jobs, user_inputs
 
+def load_respondents(field_level: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Same as load_inputs(), but the responses are returned as a DataFrame that
+    keeps the respondent key (Timestamp / First_Name / Last_Name) of each text.
+    With field_level=True there is one text per answer field (Field column)
+    instead of one concatenated text per row.
+    """
+    user_path  = DATA_DIR / "user_responses.csv"   # Streamlit writes this
 
+    # Reference data
+    competencies, jobs = load_reference()
 
-def encode(model: SentenceTransformer, texts: List[str]):
-    """Convert a list of texts into SBERT embeddings (PyTorch tensors)."""
-    return model.encode(texts, convert_to_tensor=True)
+    if not user_path.exists():
+        raise FileNotFoundError("Missing data/user_responses.csv")
 
+    # User responses (single- or multi-column)
+    df = pd.read_csv(user_path)
+    df.columns = df.columns.str.strip()
+    responses = _field_responses_from_frame(df) if field_level else _responses_from_frame(df)
+
+    if responses.empty:
+        raise ValueError(
+            "No usable user responses found in data/user_responses.csv."
+        )
+
+    return competencies, jobs, responses
 
-def compute_comp_scores(user_emb, comp_emb, mode: str = "avg") -> np.ndarray:
+
+def load_inputs() -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+    """
+    Load inputs. If data/user_responses.csv has a 'response' column, use it.
+    Otherwise, treat it as a multi-column Streamlit export and build the text.
+    """
+    competencies, jobs, responses = load_respondents()
+    return competencies, jobs, responses["Response"].tolist()
+
+
+def iter_response_chunks(chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    load_respondents() responses, read `chunk_rows` rows of
+    data/user_responses.csv at a time (chunks with no usable text are skipped).
+    """
+    user_path = DATA_DIR / "user_responses.csv"
+    if not user_path.exists():
+        raise FileNotFoundError("Missing data/user_responses.csv")
+    with pd.read_csv(user_path, chunksize=chunk_rows) as reader:
+        for df in reader:   # the row index keeps counting across chunks
+            df.columns = df.columns.str.strip()
+            responses = _responses_from_frame(df)
+            if len(responses):
+                yield responses
+
+
+_answer_caches: dict = {}
+
+
+def answer_cache(model_name: str | None = None) -> AnswerCache:
+    """Process-wide answer embedding cache for one model key (opened on first use)."""
+    model_name = model_name or model_key(MODEL_NAME, ENCODER_BACKEND)
+    if model_name not in _answer_caches:
+        _answer_caches[model_name] = AnswerCache(model_name, CACHE_DIR)
+    return _answer_caches[model_name]
+
+
+# Cumulative encoder throughput of this process (see _report_encode()).
+encode_stats = {"texts": 0, "tokens": 0, "seconds": 0.0}
+
+# Timing spans and counters of the current run: a recording RunMetrics only
+# inside main(), a no-op one otherwise (e.g. scoring_service.py requests).
+metrics = RunMetrics(enabled=False)
+
+
+def _length_buckets(lengths: np.ndarray) -> List[np.ndarray]:
+    """Indices of texts grouped by token length (powers of two), shortest first."""
+    order = np.argsort(lengths, kind="stable")
+    bucket = np.ceil(np.log2(np.maximum(lengths[order], 1))).astype(np.int64)
+    cuts = np.flatnonzero(np.diff(bucket)) + 1
+    return np.split(order, cuts)
+
+
+_parallel_encoders: dict = {}
+
+
+def parallel_encoder(model_name: str | None = None) -> ParallelEncoder:
+    """Process-wide worker pool for one model key (started on first use)."""
+    from parallel_encoder import ParallelEncoder
+
+    model_name = model_name or model_key(MODEL_NAME, ENCODER_BACKEND)
+    if model_name not in _parallel_encoders:
+        name, backend = split_model_key(model_name)
+        print(f"Starting {ENCODE_WORKERS} encoder processes ({model_name})...")
+        _parallel_encoders[model_name] = ParallelEncoder(name, backend, ENCODE_WORKERS,
+                                                         ENCODE_BATCH_SIZE, ENCODE_TOKEN_BUDGET)
+    return _parallel_encoders[model_name]
+
+
+def _encode_model(model: SentenceTransformer, texts: List[str], model_name: str | None = None):
+    """
+    Raw SBERT call, no cache (PyTorch tensor, same order as `texts`).
+
+    Texts are encoded per length bucket with a token-budget batch size, then
+    put back in their original order. With ENCODE_WORKERS > 1, large calls
+    go to the parallel_encoder() pool of `model_name` (a model_key(), default
+    MODEL_NAME + ENCODER_BACKEND) instead.
+    """
+    import torch
+
+    if ENCODE_WORKERS > 1 and len(texts) >= PARALLEL_MIN_TEXTS:
+        t0 = time.perf_counter()
+        emb, n_tokens = parallel_encoder(model_name).encode(texts)
+        encode_stats["texts"] += len(texts)
+        encode_stats["tokens"] += n_tokens
+        encode_stats["seconds"] += time.perf_counter() - t0
+        return torch.from_numpy(emb).to(model.device)
+
+    if ENCODE_THREADS:
+        torch.set_num_threads(int(ENCODE_THREADS))
+    if not texts:
+        return model.encode(texts, convert_to_tensor=True)
+
+    t0 = time.perf_counter()
+    tokens = model.tokenizer(list(texts), truncation=True, max_length=model.max_seq_length)["input_ids"]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(texts))
+
+    out = None
+    for idx in _length_buckets(lengths):
+        batch_size = ENCODE_BATCH_SIZE
+        if ENCODE_TOKEN_BUDGET:
+            batch_size = max(batch_size, int(ENCODE_TOKEN_BUDGET // lengths[idx].max()))
+        emb = model.encode([texts[i] for i in idx], batch_size=batch_size, convert_to_tensor=True)
+        if out is None:
+            out = torch.empty((len(texts), emb.shape[1]), dtype=emb.dtype, device=emb.device)
+        out[torch.as_tensor(idx, device=emb.device)] = emb
+
+    encode_stats["texts"] += len(texts)
+    encode_stats["tokens"] += int(lengths.sum())
+    encode_stats["seconds"] += time.perf_counter() - t0
+    return out
+
+
+def _report_encode() -> None:
+    sec = encode_stats["seconds"]
+    if encode_stats["texts"] and sec > 0:
+        print(f"Encoder: {encode_stats['texts']} texts, {encode_stats['tokens']} tokens in {sec:.2f}s "
+              f"({encode_stats['texts'] / sec:.1f} texts/s, {encode_stats['tokens'] / sec:.0f} tokens/s)")
+
+
+def encode(model: SentenceTransformer, texts: List[str], model_name: str | None = None):
+    """
+    Convert a list of texts into SBERT embeddings (PyTorch tensors).
+
+    With USE_ANSWER_CACHE, texts already embedded by `model_name` (a
+    model_key(), default MODEL_NAME + ENCODER_BACKEND) in this process or an
+    earlier run are read from the answer cache; only distinct new texts reach
+    the model.
+    """
+    import torch
+
+    with metrics.span("encode", texts=len(texts)):
+        if not USE_ANSWER_CACHE or not texts:
+            return _encode_model(model, texts, model_name)
+        vecs, _ = answer_cache(model_name).get_or_encode(
+            texts, lambda new: _encode_model(model, new, model_name).cpu().numpy()
+        )
+        return torch.from_numpy(vecs).to(model.device)
+
+
+def _archive_embeddings(responses: pd.DataFrame, user_emb) -> None:
+    """Append new respondents' answer embeddings to the ARCHIVE_DTYPE archive."""
+    from embedding_archive import EmbeddingArchive
+
+    archive = EmbeddingArchive(model_key(MODEL_NAME, ENCODER_BACKEND), ARCHIVE_DTYPE, ARCHIVE_DIR)
+    added = archive.append(responses, user_emb)
+    if added:
+        print(f"Archived {added} respondents ({archive.dtype}, {len(archive)} in {archive.folder})")
+
+
+def _report_answer_cache() -> None:
+    if USE_ANSWER_CACHE and _answer_caches:
+        cache = answer_cache()
+        print(f"Answer embeddings: {cache.hits} cached, {cache.misses} encoded")
+
+
+def encode_competencies(model: SentenceTransformer, comp_texts: List[str],
+                        model_name: str | None = None):
+    """
+    Competency embeddings through the on-disk cache.
+
+    Only texts whose hash is not in the cache for `model_name` (a model_key(),
+    default MODEL_NAME + ENCODER_BACKEND) are sent to the model; the rest is
+    read back from the memory-mapped .npy file.
+    """
+    import torch
+
+    if not USE_EMBEDDING_CACHE:
+        with metrics.span("encode_competencies", texts=len(comp_texts)):
+            return _encode_model(model, comp_texts, model_name)
+
+    store = EmbeddingStore(model_name or model_key(MODEL_NAME, ENCODER_BACKEND), "competencies", CACHE_DIR)
+    with metrics.span("encode_competencies", texts=len(comp_texts)):
+        vecs, stats = store.get_or_encode(
+            comp_texts, lambda texts: _encode_model(model, texts, model_name).cpu().numpy()
+        )
+    metrics.record(competency_cache=hit_rate(stats["hits"], stats["misses"]))
+    cold = stats["cold_seconds_estimate"]
+    print(
+        f"Competency embeddings: {stats['hits']} cached, {stats['misses']} encoded "
+        f"in {stats['seconds']:.2f}s"
+        + (f" (cold encode ~{cold:.2f}s)" if cold is not None else "")
+    )
+    return torch.from_numpy(np.array(vecs)).to(model.device)
+
+
+def compute_comp_scores(user_emb, comp_emb, mode: str = "avg", evidence_top_n: int = 0):
     """
     Compute similarity scores between the user profile and each competency.
 
@@ -221,22 +604,39 @@ def compute_comp_scores(user_emb, comp_emb, mode: str = "avg") -> np.ndarray:
     mode : str
         "avg" -> average the user's answers into one vector, then compare.
         "max" -> for each competency, take the strongest match across answers.
+    evidence_top_n : int
+        In "max" mode, also return the best answers behind each score.
 
     Returns
     -------
     np.ndarray
         1D array of size n_competencies with cosine similarity scores in [0,1].
+        With evidence_top_n > 0 in "max" mode: (scores, (rows, sims)), where
+        rows / sims (n_competencies x evidence_top_n) are the answer indices
+        and similarities of top_answers().
     """
-    if mode == "max":
-        S = util.cos_sim(user_emb, comp_emb)
-        return S.max(dim=0).values.cpu().numpy()
-    elif mode == "avg":
-        user_avg = user_emb.mean(dim=0, keepdim=True)
-        S = util.cos_sim(user_avg, comp_emb)
-        return S.squeeze(0).cpu().numpy()
-    else:
-        raise ValueError("mode must be 'avg' or 'max'")
+    from sentence_transformers import util
 
+    with metrics.span("compute_comp_scores", texts=len(user_emb)):
+        if mode == "max":
+            S = util.cos_sim(user_emb, comp_emb)
+            scores = S.max(dim=0).values.cpu().numpy()
+            if evidence_top_n > 0:
+                rows, sims = top_answers(S.cpu().numpy(), np.zeros(S.shape[0], dtype=np.int64), 1,
+                                         evidence_top_n)
+                return scores, (rows[0], sims[0])
+            return scores
+        elif mode == "avg":
+            user_avg = user_emb.mean(dim=0, keepdim=True)
+            S = util.cos_sim(user_avg, comp_emb)
+            return S.squeeze(0).cpu().numpy()
+        else:
+            raise ValueError("mode must be 'avg' or 'max'")
+
+
+# Scalar job scorers: the engine scores jobs through job_matrix.JobMatrix;
+# these one-job-at-a-time definitions are the reference its results are
+# checked against (tests/test_job_matrix.py).
 
 def score_job_mean(required_ids: List, score_map: dict) -> float:
     """Baseline job score: simple mean of all required competency scores."""
@@ -259,31 +659,679 @@ def score_job_topk(required_ids: List, score_map: dict, k: int = 3) -> float:
     return float(np.mean(vals[:k]))
 
 
-# --------------------------------- Main pipeline --------------------------------
+# --------------------------- Per-respondent scoring ---------------------------
 
-def main() -> None:
-    """Full pipeline: load data, compute embeddings, score, and save outputs."""
-    _ensure_folders()
-    print("Loading data...")
-    competencies, jobs, user_inputs = load_inputs()
-    if not user_inputs:
-        raise ValueError("No user responses found in data/user_responses.csv.")
+def _to_numpy(x) -> np.ndarray:
+    """Tensor or array-like -> float32 numpy array on CPU."""
+    if hasattr(x, "detach"):  # torch.Tensor, without importing torch
+        x = x.detach().cpu().numpy()
+    return np.asarray(x, dtype=np.float32)
+
+
+def _l2_normalize(x: np.ndarray) -> np.ndarray:
+    """Row-wise unit vectors (zero rows stay zero, like util.cos_sim)."""
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def compute_comp_scores_batch(user_emb, comp_emb, owners, n_owners: int | None = None,
+                              mode: str = "avg", evidence_top_n: int = 0):
+    """
+    Per-respondent version of compute_comp_scores().
+
+    Parameters
+    ----------
+    user_emb : tensor or array
+        Embeddings of all answers of all respondents (n_answers x d).
+    comp_emb : tensor or array
+        Embeddings of competencies (n_competencies x d).
+    owners : array of int
+        owners[i] = index of the respondent who wrote answer i.
+    n_owners : int, optional
+        Number of respondents (default: max(owners) + 1).
+    mode : str
+        Same meaning as in compute_comp_scores(), applied per respondent.
+    evidence_top_n : int
+        In "max" mode, also return top_answers() of the similarity matrix.
+
+    Returns
+    -------
+    np.ndarray
+        Matrix (n_respondents x n_competencies) of cosine similarities,
+        computed with a single matrix product ((scores, (rows, sims)) with
+        evidence_top_n > 0 in "max" mode).
+    """
+    U = _to_numpy(user_emb)
+    C = _l2_normalize(_to_numpy(comp_emb))
+    owners = np.asarray(owners, dtype=np.int64)
+    n = int(n_owners) if n_owners is not None else int(owners.max()) + 1
+    one_per_owner = len(owners) == n and np.array_equal(owners, np.arange(n))
+
+    if mode == "avg":
+        if one_per_owner:
+            P = U
+        else:
+            P = np.zeros((n, U.shape[1]), dtype=np.float32)
+            np.add.at(P, owners, U)
+            P /= np.maximum(np.bincount(owners, minlength=n), 1)[:, None]
+        return _l2_normalize(P) @ C.T
+    elif mode == "max":
+        S = _l2_normalize(U) @ C.T
+        evidence = top_answers(S, owners, n, evidence_top_n) if evidence_top_n > 0 else None
+        if one_per_owner:
+            out = S
+        else:
+            out = np.full((n, C.shape[0]), -np.inf, dtype=np.float32)
+            np.maximum.at(out, owners, S)
+        return (out, evidence) if evidence is not None else out
+    else:
+        raise ValueError("mode must be 'avg' or 'max'")
+
+
+# Max (respondents x fields x competencies / dims) elements held at once by
+# the field-level "avg" scorer.
+FIELD_CHUNK_ELEMENTS = 8_000_000
+
+
+def load_field_mask(fields: List[str], comp_ids: List) -> np.ndarray:
+    """
+    Boolean (n_fields x n_competencies) mask from the MapsTo column of
+    data/questions.csv: True where a field may score a competency.
+
+    Fields without a question or with an empty MapsTo, and competencies that
+    no question maps to, are left unrestricted.
+    """
+    mask = np.ones((len(fields), len(comp_ids)), dtype=bool)
+    q_path = DATA_DIR / "questions.csv"
+    if not q_path.exists():
+        return mask
+    questions = pd.read_csv(q_path)
+    questions.columns = questions.columns.str.strip()
+    maps_to = {
+        qid: [c.strip() for c in str(m).split(";") if c.strip()]
+        for qid, m in zip(questions["QuestionID"], questions["MapsTo"].fillna(""))
+    }
+    col_of = {cid: j for j, cid in enumerate(comp_ids)}
+    restricted = np.zeros_like(mask)
+    for i, field in enumerate(fields):
+        targets = [col_of[c] for c in maps_to.get(FIELD_QUESTIONS.get(field), []) if c in col_of]
+        if targets:
+            restricted[i, targets] = True
+        else:
+            restricted[i, :] = True
+    mapped = restricted[[i for i, f in enumerate(fields)
+                         if maps_to.get(FIELD_QUESTIONS.get(f))]].any(axis=0)
+    mask[:, mapped] = restricted[:, mapped]
+    return mask
+
+
+def compute_field_scores_batch(user_emb, comp_emb, owners, fields: List[str],
+                               n_owners: int | None = None, mode: str = "avg",
+                               weights: dict | None = None, comp_ids: List | None = None,
+                               restrict: bool = False, evidence_top_n: int = 0):
+    """
+    compute_comp_scores_batch() for field-level answers.
+
+    Parameters
+    ----------
+    owners : array of int
+        Respondent index of each answer (row of user_emb).
+    fields : list of str
+        Canonical field name of each answer.
+    weights : dict, optional
+        Field -> weight (default 1.0; 0 drops the field).
+    comp_ids, restrict :
+        With restrict=True, a competency is only scored from the fields mapped
+        to it in data/questions.csv (see load_field_mask); a respondent who left
+        all those fields empty falls back to all of their fields.
+    evidence_top_n : int
+        In "max" mode, also return top_answers() over the allowed answers
+        (row indices refer to user_emb).
+
+    Returns
+    -------
+    np.ndarray
+        (n_respondents x n_competencies). "avg" = cosine between a competency
+        and the weighted mean of the respondent's allowed answer embeddings;
+        "max" = best allowed answer (weights only drop fields).
+    """
+    U = _to_numpy(user_emb)
+    C = _l2_normalize(_to_numpy(comp_emb))
+    owners = np.asarray(owners, dtype=np.int64)
+    n = int(n_owners) if n_owners is not None else int(owners.max()) + 1
+    codes, names = pd.factorize(pd.Series(list(fields)))
+    names = list(names)
+    m, F = C.shape[0], len(names)
+
+    w = np.array([float((weights or {}).get(f, 1.0)) for f in names], dtype=np.float32)
+    keep = w[codes] > 0
+    kept_rows = np.flatnonzero(keep)
+    U, owners, codes = U[keep], owners[keep], codes[keep]
+    if restrict:
+        mask = load_field_mask(names, comp_ids if comp_ids is not None else list(range(m)))
+    else:
+        mask = np.ones((F, m), dtype=bool)
+
+    if mode == "max":
+        S = _l2_normalize(U) @ C.T
+        S_allowed = np.where(mask[codes], S, -np.inf)
+        allowed = np.full((n, m), -np.inf, dtype=np.float32)
+        np.maximum.at(allowed, owners, S_allowed)
+        best = np.full((n, m), -np.inf, dtype=np.float32)
+        np.maximum.at(best, owners, S)
+        out = np.where(np.isfinite(allowed), allowed, best)
+        out = np.where(np.isfinite(out), out, 0.0).astype(np.float32)
+        if evidence_top_n <= 0:
+            return out
+        rows, sims = top_answers(S_allowed, owners, n, evidence_top_n)
+        if restrict:    # same fallback as the scores: all fields where none is allowed
+            rows_all, sims_all = top_answers(S, owners, n, evidence_top_n)
+            fallback = (rows[:, :, :1] < 0)
+            rows, sims = np.where(fallback, rows_all, rows), np.where(fallback, sims_all, sims)
+        rows = np.where(rows >= 0, kept_rows[np.maximum(rows, 0)], -1)
+        return out, (rows, sims)
+    if mode != "avg":
+        raise ValueError("mode must be 'avg' or 'max'")
+
+    # Weighted embedding sum per (respondent, field): a competency's profile is
+    # the sum over its allowed fields, and the cosine ignores the overall scale.
+    # Built chunk by chunk of respondents, so memory does not grow with n.
+    order = np.argsort(owners, kind="stable")
+    sorted_owners = owners[order]
+    out = np.zeros((n, m), dtype=np.float32)
+    step = max(1, FIELD_CHUNK_ELEMENTS // max(1, F * max(m, F, U.shape[1])))
+    for a in range(0, n, step):
+        b = min(a + step, n)
+        lo, hi = np.searchsorted(sorted_owners, [a, b])
+        rows = order[lo:hi]
+        E = np.zeros((b - a, F, U.shape[1]), dtype=np.float32)
+        np.add.at(E, (owners[rows] - a, codes[rows]), U[rows] * w[codes[rows], None])
+        P = np.zeros((b - a, F), dtype=bool)
+        P[owners[rows] - a, codes[rows]] = True
+        A = P[:, :, None] & mask[None, :, :]                       # resp x field x comp
+        A = np.where(A.any(axis=1, keepdims=True), A, P[:, :, None]).astype(np.float32)
+        num = np.einsum("rfm,rfm->rm", A, E @ C.T)                 # profile . competency
+        gram = E @ E.transpose(0, 2, 1)                            # resp x field x field
+        sq = np.einsum("rfm,rfg,rgm->rm", A, gram, A)              # ||profile||^2
+        out[a:b] = num / np.sqrt(np.maximum(sq, 1e-24))
+    return out
+
+
+def competency_index(comp_emb, comp_texts: List[str]) -> IVFIndex:
+    """
+    IVF index over the competency embeddings, saved next to the embedding
+    cache and rebuilt only when the catalog (or model/backend) changes.
+    """
+    signature = text_hash("\n".join(text_hash(t) for t in comp_texts))
+    path = CACHE_DIR / model_slug(model_key(MODEL_NAME, ENCODER_BACKEND)) / "competencies.ivf.npz"
+    index = IVFIndex.load(path, signature)
+    if index is None or len(index) != len(comp_texts):
+        t0 = time.perf_counter()
+        index = IVFIndex.build(_to_numpy(comp_emb), signature=signature)
+        index.save(path)
+        print(f"Built ANN index over {len(comp_texts)} competencies in {time.perf_counter() - t0:.1f}s")
+    return index
+
+
+def retrieve_competencies(queries, index: IVFIndex, top_n: int = ANN_TOP_N,
+                          nprobe: int = ANN_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-N competency rows and cosine scores for each query vector (best first, -1 = none)."""
+    return index.search(_to_numpy(queries), top_n=top_n, nprobe=nprobe)
+
+
+def compute_comp_scores_ann(user_emb, index: IVFIndex, owners, n_owners: int | None = None,
+                            mode: str = "avg", top_n: int = ANN_TOP_N,
+                            nprobe: int = ANN_NPROBE) -> np.ndarray:
+    """
+    compute_comp_scores_batch() through the ANN index.
+
+    Returns the same (n_respondents x n_competencies) layout; competencies not
+    retrieved for a respondent score 0.
+    """
+    U = _to_numpy(user_emb)
+    owners = np.asarray(owners, dtype=np.int64)
+    n = int(n_owners) if n_owners is not None else int(owners.max()) + 1
+    m = len(index)
+
+    if mode == "avg":
+        P = np.zeros((n, U.shape[1]), dtype=np.float32)
+        np.add.at(P, owners, U)
+        ids, sims = retrieve_competencies(P, index, top_n, nprobe)
+        rows = np.repeat(np.arange(n), ids.shape[1])
+        out = np.zeros((n, m), dtype=np.float32)
+    elif mode == "max":
+        ids, sims = retrieve_competencies(U, index, top_n, nprobe)
+        rows = np.repeat(owners, ids.shape[1])
+        out = np.full((n, m), -np.inf, dtype=np.float32)
+    else:
+        raise ValueError("mode must be 'avg' or 'max'")
+
+    ids, sims = ids.ravel(), sims.ravel()
+    ok = ids >= 0
+    if mode == "avg":   # one query per respondent: (row, id) pairs are unique
+        out[rows[ok], ids[ok]] = sims[ok]
+        return out
+    np.maximum.at(out, (rows[ok], ids[ok]), sims[ok])
+    return np.where(np.isfinite(out), out, 0.0).astype(np.float32)
+
+
+# ------------------------------ Evidence (max mode) ------------------------------
+
+def top_answers(S: np.ndarray, owners, n_owners: int, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best `top_n` answers behind every max-mode competency score.
+
+    Parameters
+    ----------
+    S : np.ndarray
+        (n_answers x n_competencies) answer similarities, as already computed
+        by the "max" scorers (-inf = answer not allowed for the competency).
+    owners : array of int
+        Respondent index of each answer.
+
+    Returns
+    -------
+    (rows, sims)
+        Both (n_owners x n_competencies x top_n), best first: answer index
+        (row of S) and its similarity; -1 / nan where a respondent has fewer
+        than top_n answers. rows[..., 0] is the argmax of the max-mode score.
+    """
+    S = np.asarray(S, dtype=np.float32)
+    owners = np.asarray(owners, dtype=np.int64)
+    m = S.shape[1]
+    rows = np.full((n_owners, m, top_n), -1, dtype=np.int64)
+    sims = np.full((n_owners, m, top_n), np.nan, dtype=np.float32)
+    if not len(owners):
+        return rows, sims
+
+    # Answers of each respondent laid out in a padded (respondent x slot) grid
+    order = np.argsort(owners, kind="stable")
+    counts = np.bincount(owners, minlength=n_owners)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    slot = np.empty(len(owners), dtype=np.int64)
+    slot[order] = np.arange(len(owners)) - starts[owners[order]]
+    width = int(counts.max())
+    top = min(top_n, width)
+
+    step = max(1, FIELD_CHUNK_ELEMENTS // max(1, width * m))
+    for a in range(0, n_owners, step):
+        b = min(a + step, n_owners)
+        idx = order[starts[a]:ends[b - 1]]
+        if n_owners == 1:       # pooled profile: S is already the grid
+            grid, answer = S[None], np.arange(len(owners))[None]
+        else:
+            grid = np.full((b - a, width, m), -np.inf, dtype=np.float32)
+            grid[owners[idx] - a, slot[idx]] = S[idx]
+            answer = np.full((b - a, width), -1, dtype=np.int64)
+            answer[owners[idx] - a, slot[idx]] = idx
+
+        if top < width:
+            best = np.argpartition(-grid, top - 1, axis=1)[:, :top]
+        else:
+            best = np.broadcast_to(np.arange(width)[None, :, None], grid.shape)
+        vals = np.take_along_axis(grid, best, axis=1)
+        o = np.argsort(-vals, axis=1, kind="stable")
+        best, vals = np.take_along_axis(best, o, axis=1), np.take_along_axis(vals, o, axis=1)
+        r = answer[np.arange(b - a)[:, None, None], best]
+        ok = np.isfinite(vals)
+        rows[a:b, :, :top] = np.where(ok, r, -1).transpose(0, 2, 1)
+        sims[a:b, :, :top] = np.where(ok, vals, np.nan).transpose(0, 2, 1)
+    return rows, sims
+
+
+def evidence_table(rows: np.ndarray, sims: np.ndarray, competencies: pd.DataFrame,
+                   responses: pd.DataFrame, people: pd.DataFrame | None = None,
+                   scores: np.ndarray | None = None,
+                   n_competencies: int | None = None) -> pd.DataFrame:
+    """
+    Long table of the answers behind max-mode scores (outputs/evidence.csv).
+
+    Parameters
+    ----------
+    rows, sims : np.ndarray
+        top_answers() output, (n_profiles x n_competencies x top_n); answer
+        indices are positions in `responses`.
+    people : DataFrame, optional
+        One row per profile (per-respondent tables); None = pooled profile.
+    scores : np.ndarray, optional
+        Competency scores of each profile: rows are listed best competency
+        first and, with n_competencies, only the n_competencies best are kept.
+
+    Returns
+    -------
+    DataFrame
+        [RespondentID,] CompetencyID, Rank, Similarity, Field or Excerpt (the
+        answer), plus AnswerRow / AnswerRespondentID for the pooled profile.
+    """
+    n, m, t = rows.shape
+    cols = np.broadcast_to(np.arange(m), (n, m))
+    if scores is not None:      # best competencies first, optionally only the first n_competencies
+        scores = np.asarray(scores).reshape(n, m)
+        if n_competencies is not None and n_competencies < m:
+            cols = np.argpartition(-scores, n_competencies - 1, axis=1)[:, :n_competencies]
+        order = np.argsort(-np.take_along_axis(scores, cols, axis=1), axis=1, kind="stable")
+        cols = np.take_along_axis(cols, order, axis=1)
+    c = cols.shape[1]
+    r = rows[np.arange(n)[:, None], cols].ravel()
+    ok = r >= 0
+    r = r[ok]
+    df = pd.DataFrame({
+        "CompetencyID": competencies["CompetencyID"].to_numpy()[np.repeat(cols.ravel(), t)[ok]],
+        "Rank": np.tile(np.arange(1, t + 1), n * c)[ok],
+        "Similarity": sims[np.arange(n)[:, None], cols].ravel()[ok],
+    })
+    if people is not None:
+        df.insert(0, "RespondentID", people["RespondentID"].to_numpy()[np.repeat(np.arange(n), c * t)[ok]])
+    else:
+        df["AnswerRow"] = r
+        df["AnswerRespondentID"] = responses["RespondentID"].to_numpy()[r]
+    if "Field" in responses.columns:
+        df["Field"] = responses["Field"].to_numpy()[r]
+    else:
+        df["Excerpt"] = responses["Response"].astype(str).str.slice(0, EVIDENCE_EXCERPT_CHARS).to_numpy()[r]
+    return df
+
+
+class RunningEvidence:
+    """
+    Pooled-profile top_answers() over a stream of answer chunks.
+
+    Keeps the best `top_n` answers per competency seen so far and only the
+    answer rows they point to, so memory does not grow with the file.
+    table() gives the evidence_table() of a run over all chunks at once
+    (AnswerRow = position of the answer over the whole stream; between
+    answers with equal similarity, e.g. duplicates, either row may be kept).
+    """
+
+    def __init__(self, n_competencies: int, top_n: int):
+        self.top_n = top_n
+        self.rows = np.full((n_competencies, top_n), -1, dtype=np.int64)
+        self.sims = np.full((n_competencies, top_n), np.nan, dtype=np.float32)
+        self.answers: pd.DataFrame | None = None
+        self.positions = np.zeros(0, dtype=np.int64)
+
+    def update(self, S: np.ndarray, chunk: pd.DataFrame, offset: int) -> None:
+        """Fold in a chunk: S = (answers x competencies) similarities, offset = position of its first answer."""
+        rows, sims = top_answers(S, np.zeros(len(S), dtype=np.int64), 1, self.top_n)
+        rows, sims = rows[0], sims[0]
+        used = np.unique(rows[rows >= 0])
+        rows = np.where(rows >= 0, len(self.positions) + np.searchsorted(used, rows), -1)
+        answers = chunk.iloc[used] if self.answers is None else pd.concat([self.answers, chunk.iloc[used]])
+        positions = np.concatenate([self.positions, offset + used])
+
+        all_rows = np.concatenate([self.rows, rows], axis=1)
+        all_sims = np.concatenate([self.sims, sims], axis=1)
+        order = np.argsort(-np.where(all_rows >= 0, all_sims, -np.inf), axis=1, kind="stable")[:, :self.top_n]
+        self.rows = np.take_along_axis(all_rows, order, axis=1)
+        self.sims = np.take_along_axis(all_sims, order, axis=1)
+
+        kept = np.unique(self.rows[self.rows >= 0])
+        self.rows = np.where(self.rows >= 0, np.searchsorted(kept, self.rows), -1)
+        self.answers = answers.iloc[kept].reset_index(drop=True)
+        self.positions = positions[kept]
+
+    def table(self, competencies: pd.DataFrame, scores: np.ndarray) -> pd.DataFrame:
+        df = evidence_table(self.rows[None], self.sims[None], competencies, self.answers, scores=scores)
+        df["AnswerRow"] = self.positions[df["AnswerRow"].to_numpy()]
+        return df
+
+
+def block_scores_batch(scores: np.ndarray, comp_blocks: List[str]) -> Tuple[List[str], np.ndarray]:
+    """Average competency scores per block for every respondent (matrix product)."""
+    codes, names = pd.factorize(pd.Series(comp_blocks))
+    onehot = np.zeros((len(codes), len(names)), dtype=np.float32)
+    onehot[np.arange(len(codes)), codes] = 1.0
+    onehot /= onehot.sum(axis=0, keepdims=True)
+    return list(names), scores @ onehot
+
+
+def score_respondents(responses: pd.DataFrame, user_emb, comp_emb,
+                      competencies: pd.DataFrame, jobs: pd.DataFrame,
+                      mode: str = "avg", top_k: int = 3,
+                      job_matrix: JobMatrix | None = None,
+                      index: IVFIndex | None = None) -> dict:
+    """
+    Score every respondent separately.
+
+    Parameters
+    ----------
+    responses : DataFrame
+        Output of load_respondents() (one row per answer text, aligned with
+        user_emb). Field-level responses (Field column) are pooled with
+        compute_field_scores_batch().
+    index : IVFIndex, optional
+        Score through the ANN competency index (compute_comp_scores_ann).
+
+    Returns
+    -------
+    dict
+        "respondents" (one row per person), "competencies", "blocks" and "jobs"
+        (long tables keyed by RespondentID), and "candidates", the
+        CandidateIndex of the score matrix (reverse job -> respondents lookup).
+        In "max" mode with EVIDENCE_TOP_N, also "evidence" (evidence_table()).
+    """
+    owners, _ = pd.factorize(responses["RespondentID"])
+    people = _people_from_responses(responses)
+    top_n = EVIDENCE_TOP_N if mode == "max" and index is None else 0
+    evidence = None
+    with metrics.span("score_respondents", texts=len(responses), respondents=len(people)):
+        if "Field" in responses.columns:
+            S = compute_field_scores_batch(user_emb, comp_emb, owners, responses["Field"].tolist(),
+                                           len(people), mode=mode, weights=FIELD_WEIGHTS,
+                                           comp_ids=competencies["CompetencyID"].tolist(),
+                                           restrict=RESTRICT_TO_MAPSTO, evidence_top_n=top_n)
+        elif index is not None:
+            S = compute_comp_scores_ann(user_emb, index, owners, len(people), mode=mode)
+        else:
+            S = compute_comp_scores_batch(user_emb, comp_emb, owners, len(people), mode=mode,
+                                          evidence_top_n=top_n)
+        if top_n:
+            S, (rows, sims) = S
+            evidence = evidence_table(rows, sims, competencies, responses, people=people, scores=S,
+                                      n_competencies=EVIDENCE_COMPETENCIES)
+    tables = respondent_tables(people, S, competencies, jobs, top_k=top_k, job_matrix=job_matrix)
+    if evidence is not None:
+        tables["evidence"] = evidence
+    return tables
+
+
+def _people_from_responses(responses: pd.DataFrame) -> pd.DataFrame:
+    """One row per respondent (RespondentID + key fields), in file order."""
+    drop = [c for c in ("Field", "Response", "RowHash") if c in responses.columns]
+    return responses.drop_duplicates("RespondentID").drop(columns=drop).reset_index(drop=True)
+
+
+def respondent_tables(people: pd.DataFrame, S: np.ndarray, competencies: pd.DataFrame,
+                      jobs: pd.DataFrame, top_k: int = 3,
+                      job_matrix: JobMatrix | None = None, mode: str | None = None) -> dict:
+    """
+    Build the per-respondent output tables from a score matrix.
+
+    Parameters
+    ----------
+    people : DataFrame
+        One row per respondent (RespondentID + key fields), aligned with S.
+    S : np.ndarray
+        Competency scores (n_respondents x n_competencies).
+    job_matrix : JobMatrix, optional
+        Prebuilt job x competency matrix (built from `jobs` if omitted).
+    mode : str, optional
+        Mode S was scored in, stored with the candidate index (default MODE).
+
+    Returns
+    -------
+    dict
+        Same layout as score_respondents().
+    """
+    people = people.copy()
+    key_cols = ["RespondentID"] + [c for c in KEY_FIELDS if c in people.columns]
+    candidates = CandidateIndex(people[key_cols], np.asarray(S, dtype=np.float32),
+                                competencies["CompetencyID"].tolist(), mode=mode or MODE)
+    resp_ids = people["RespondentID"].to_numpy()
+    n = len(resp_ids)
 
-    # Prepare reference data
-    cid2block = dict(zip(competencies["CompetencyID"], competencies["BlockName"]))
     comp_ids = competencies["CompetencyID"].tolist()
     comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    comp_blocks = competencies["BlockName"].tolist()
 
+    with metrics.span("block_aggregation", respondents=n):
+        block_names, B = block_scores_batch(S, comp_blocks)
 
-    print(f"Loading model: {MODEL_NAME}")
-    model = SentenceTransformer(MODEL_NAME)
+    m = len(comp_ids)
+    comp_long = pd.DataFrame({
+        "RespondentID": np.repeat(resp_ids, m),
+        "CompetencyID": np.tile(comp_ids, n),
+        "CompetencyText": np.tile(comp_texts, n),
+        "BlockName": np.tile(comp_blocks, n),
+        "Score": S.ravel(),
+    })
 
-    print("Encoding texts...")
-    user_emb = encode(model, user_inputs)
-    comp_emb = encode(model, comp_texts)
+    block_long = pd.DataFrame({
+        "RespondentID": np.repeat(resp_ids, len(block_names)),
+        "BlockName": np.tile(block_names, n),
+        "Score": B.ravel(),
+    })
+
+    with metrics.span("job_scoring", respondents=n):
+        if job_matrix is None:
+            job_matrix = JobMatrix(jobs, comp_ids)
+        n_jobs = len(job_matrix.job_ids)
+        job_long = pd.DataFrame({
+            "RespondentID": np.repeat(resp_ids, n_jobs),
+            "JobID": np.tile(job_matrix.job_ids, n),
+            "JobTitle": np.tile(job_matrix.job_titles, n),
+            "JobScore": job_matrix.score_topk(S, k=top_k).ravel(),
+            "JobScoreMean": job_matrix.score_mean(S).ravel(),
+        })
 
-    print(f"Scoring competencies (mode='{MODE}')...")
-    comp_scores = compute_comp_scores(user_emb, comp_emb, mode=MODE)
+    # Sort within each respondent, keep respondents in file order
+    order = {rid: i for i, rid in enumerate(resp_ids)}
+    def _rank(df: pd.DataFrame, col: str) -> pd.DataFrame:
+        df = df.assign(_o=df["RespondentID"].map(order))
+        df = df.sort_values(["_o", col], ascending=[True, False]).drop(columns="_o")
+        return df.reset_index(drop=True)
+
+    comp_long = _rank(comp_long, "Score")
+    block_long = _rank(block_long, "Score")
+    job_long = _rank(job_long, "JobScore")
+    job_long["Rank"] = job_long.groupby("RespondentID").cumcount() + 1
+
+    people["final_coverage"] = B.mean(axis=1)
+    top_jobs = job_long[job_long["Rank"] == 1].set_index("RespondentID")
+    people["top_job"] = people["RespondentID"].map(top_jobs["JobTitle"])
+    people["top_job_score"] = people["RespondentID"].map(top_jobs["JobScore"])
+
+    return {"respondents": people, "competencies": comp_long, "blocks": block_long, "jobs": job_long,
+            "candidates": candidates}
+
+
+def write_respondent_outputs(tables: dict, run: dict | None = None) -> None:
+    """
+    Save per-respondent tables to outputs/respondents/, a JSON summary per
+    person, and the candidate index to outputs/candidates/.
+
+    `run` adds run-level fields to respondents.json (next to mode / top_k).
+    Without tables["candidates"] (scores not comparable across respondents,
+    e.g. cascade.py), the candidate index of an earlier run is removed.
+    """
+    if RESP_DIR.exists() and not RESP_DIR.is_dir():
+        RESP_DIR.unlink()
+    RESP_DIR.mkdir(parents=True, exist_ok=True)
+
+    with metrics.span("write_outputs", respondents=len(tables["respondents"])):
+        names = [k for k in ("respondents", "competencies", "blocks", "jobs", "evidence") if k in tables]
+        if OUTPUT_FORMAT in ("csv", "both"):
+            tables["competencies"].to_csv(RESP_DIR / "competency_scores.csv", index=False)
+            tables["blocks"].to_csv(RESP_DIR / "block_scores.csv", index=False)
+            tables["jobs"].to_csv(RESP_DIR / "job_scores.csv", index=False)
+            _write_evidence(tables.get("evidence"), RESP_DIR / "evidence.csv")
+        if OUTPUT_FORMAT in ("npz", "both"):
+            write_tables(RESP_DIR / "scores.npz", {k: tables[k] for k in names})
+        elif (RESP_DIR / "scores.npz").exists():
+            (RESP_DIR / "scores.npz").unlink()     # readers prefer it over the CSVs
+
+        summary = {"mode": MODE, "top_k": TOP_K, **(run or {}), "respondents": _respondent_records(tables)}
+        with open(RES_DIR / "respondents.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=float)
+        if "candidates" in tables:
+            tables["candidates"].save(CANDIDATE_DIR)
+        else:
+            for name in ("meta.json", "scores.npy", "people.csv"):
+                if (CANDIDATE_DIR / name).exists():
+                    (CANDIDATE_DIR / name).unlink()
+
+
+def _write_evidence(evidence: pd.DataFrame | None, path: Path) -> None:
+    """Write an evidence table, or remove the one of an earlier max-mode run."""
+    if evidence is not None:
+        evidence.to_csv(path, index=False)
+    elif path.exists():
+        path.unlink()
+
+
+def _respondent_records(tables: dict) -> List[dict]:
+    """One respondents.json record per person, with their top 5 competencies."""
+    top_comp = tables["competencies"].groupby("RespondentID", sort=False).head(5)
+    top_comp_by_resp: dict = {}
+    for rec in top_comp[["RespondentID", "CompetencyID", "CompetencyText", "Score"]].to_dict(orient="records"):
+        top_comp_by_resp.setdefault(rec.pop("RespondentID"), []).append(rec)
+    people = []
+    for rec in tables["respondents"].to_dict(orient="records"):
+        rec["top_competencies"] = top_comp_by_resp.get(rec["RespondentID"], [])
+        people.append(rec)
+    return people
+
+
+class RespondentOutputStream:
+    """
+    write_respondent_outputs() for streaming runs: the tables of each chunk
+    are appended to the CSVs, respondents.json and the candidate index as
+    they come, so memory does not grow with the number of respondents.
+    """
+
+    def __init__(self, competencies: pd.DataFrame):
+        if RESP_DIR.exists() and not RESP_DIR.is_dir():
+            RESP_DIR.unlink()
+        RESP_DIR.mkdir(parents=True, exist_ok=True)
+        _write_evidence(None, RESP_DIR / "evidence.csv")
+        if (RESP_DIR / "scores.npz").exists():
+            (RESP_DIR / "scores.npz").unlink()
+        self.n = 0
+        self._json_tmp = RES_DIR / "respondents.json.tmp"
+        self._json = open(self._json_tmp, "w", encoding="utf-8")
+        self._json.write(json.dumps({"mode": MODE, "top_k": TOP_K})[:-1] + ', "respondents": [\n')
+        self._candidates = CandidateIndexWriter(CANDIDATE_DIR, competencies["CompetencyID"].tolist(), MODE)
+
+    def append(self, tables: dict) -> None:
+        first = self.n == 0
+        for name, file in (("competencies", "competency_scores.csv"), ("blocks", "block_scores.csv"),
+                           ("jobs", "job_scores.csv")):
+            tables[name].to_csv(RESP_DIR / file, mode="w" if first else "a", header=first, index=False)
+        if "evidence" in tables:
+            path = RESP_DIR / "evidence.csv"
+            tables["evidence"].to_csv(path, mode="a" if path.exists() else "w", header=not path.exists(),
+                                      index=False)
+        for rec in _respondent_records(tables):
+            self._json.write(("" if self.n == 0 else ",\n") + json.dumps(rec, ensure_ascii=False, default=float))
+            self.n += 1
+        self._candidates.append(tables["candidates"])
+
+    def close(self) -> None:
+        self._json.write("\n]}\n")
+        self._json.close()
+        self._json_tmp.replace(RES_DIR / "respondents.json")
+        self._candidates.close()
+
+
+def pooled_tables(comp_scores: np.ndarray, competencies: pd.DataFrame,
+                  jobs: pd.DataFrame, top_k: int = 3,
+                  job_matrix: JobMatrix | None = None):
+    """Competency, block and job tables for the pooled profile (1D score vector)."""
+    # Prepare reference data
+    cid2block = dict(zip(competencies["CompetencyID"], competencies["BlockName"]))
+    comp_ids = competencies["CompetencyID"].tolist()
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
 
     # Table of all competencies with their similarity score
     comp_df = (
@@ -298,50 +1346,387 @@ def main() -> None:
     )
 
     # Average score per block
-    block_scores = comp_df.groupby("BlockName")["Score"].mean().sort_values(ascending=False)
-    final_coverage = float(block_scores.mean())
+    with metrics.span("block_aggregation", respondents=1):
+        block_scores = comp_df.groupby("BlockName")["Score"].mean().sort_values(ascending=False)
 
-    # Prepare job scoring
-    score_map = dict(zip(comp_df["CompetencyID"], comp_df["Score"]))
+    # Job scoring on the sparse job x competency matrix (same results as
+    # score_job_mean / score_job_topk, without a Python call per job)
+    with metrics.span("job_scoring", respondents=1):
+        if job_matrix is None:
+            job_matrix = JobMatrix(jobs, comp_ids)
 
-    jobs_mean = jobs.copy()
-    jobs_mean["JobScore"] = jobs_mean["RequiredCompetencies"].apply(
-        lambda ids: score_job_mean(ids, score_map)
-    )
+        jobs_topk = jobs.copy()
+        jobs_topk["JobScore"] = job_matrix.score_topk(comp_scores, k=top_k)[0]
 
-    jobs_topk = jobs.copy()
-    jobs_topk["JobScore"] = jobs_topk["RequiredCompetencies"].apply(
-        lambda ids: score_job_topk(ids, score_map, k=TOP_K)
-    )
+        # Use Top-K ranking by default
+        jobs_ranked = jobs_topk.sort_values("JobScore", ascending=False).reset_index(drop=True)
+    return comp_df, block_scores, jobs_ranked
 
-    # Use Top-K ranking by default
-    jobs_ranked = jobs_topk.sort_values("JobScore", ascending=False).reset_index(drop=True)
+
+def write_pooled_outputs(comp_scores: np.ndarray, competencies: pd.DataFrame,
+                         jobs: pd.DataFrame, job_matrix: JobMatrix | None = None,
+                         evidence: pd.DataFrame | None = None) -> None:
+    """
+    Save the pooled-profile CSVs and summary.json (the files the front-end reads),
+    and outputs/evidence.csv when `evidence` (evidence_table()) is given.
+    """
+    comp_df, block_scores, jobs_ranked = pooled_tables(comp_scores, competencies, jobs,
+                                                       top_k=TOP_K, job_matrix=job_matrix)
+    final_coverage = float(block_scores.mean())
 
     print("OUT_DIR:", OUT_DIR.resolve())
     print("RES_DIR:", RES_DIR.resolve())
 
-    # Save CSVs
-    comp_df.to_csv(OUT_DIR / "competency_scores.csv", index=False)
-    block_scores.to_csv(OUT_DIR / "block_scores.csv")
-    jobs_ranked.to_csv(OUT_DIR / "job_scores.csv", index=False)
-
-    # Save summary JSON for the front-end
-    top_job = jobs_ranked.iloc[0] if len(jobs_ranked) else None
-    summary = {
-        "mode": MODE,
-        "top_k": TOP_K,
-        "final_coverage": final_coverage,
-        "top_job": top_job["JobTitle"] if top_job is not None else None,
-        "top_job_score": float(top_job["JobScore"]) if top_job is not None else None,
-        "top_competencies": comp_df.head(5)[
-            ["CompetencyID", "CompetencyText", "Score"]
-        ].to_dict(orient="records")
-    }
-    with open(RES_DIR / "summary.json", "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with metrics.span("write_outputs", respondents=1):
+        # Save CSVs
+        comp_df.to_csv(OUT_DIR / "competency_scores.csv", index=False)
+        block_scores.to_csv(OUT_DIR / "block_scores.csv")
+        jobs_ranked.to_csv(OUT_DIR / "job_scores.csv", index=False)
+        _write_evidence(evidence, OUT_DIR / "evidence.csv")
+        if OUTPUT_FORMAT in ("npz", "both"):
+            write_tables(OUT_DIR / "scores.npz", {"competencies": comp_df, "blocks": block_scores.reset_index(),
+                                                  "jobs": jobs_ranked})
+        elif (OUT_DIR / "scores.npz").exists():
+            (OUT_DIR / "scores.npz").unlink()      # readers prefer it over the CSVs
+
+        # Save summary JSON for the front-end
+        top_job = jobs_ranked.iloc[0] if len(jobs_ranked) else None
+        summary = {
+            "mode": MODE,
+            "top_k": TOP_K,
+            "final_coverage": final_coverage,
+            "top_job": top_job["JobTitle"] if top_job is not None else None,
+            "top_job_score": float(top_job["JobScore"]) if top_job is not None else None,
+            "top_competencies": comp_df.head(5)[
+                ["CompetencyID", "CompetencyText", "Score"]
+            ].to_dict(orient="records")
+        }
+        with open(RES_DIR / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+# ------------------------------ Incremental runs -------------------------------
+
+def _catalog_signature(competencies: pd.DataFrame) -> str:
+    """Everything that makes stored scores stale: model, mode and the competency catalog."""
+    parts = [model_key(MODEL_NAME, ENCODER_BACKEND), MODE] + [
+        f"{cid}:{text_hash(txt)}"
+        for cid, txt in zip(competencies["CompetencyID"], competencies["CompetencyText"].astype(str))
+    ]
+    return text_hash("\n".join(parts))
+
+
+def _merge_new_responses(state: IncrementalState, new: pd.DataFrame, user_emb, comp_emb) -> None:
+    """
+    Fold freshly encoded answers into the incremental state.
+
+    "avg" keeps a running sum of embeddings per respondent (and for the pooled
+    profile); "max" keeps a running max of similarities. Both give exactly the
+    scores a full run would compute.
+    """
+    U = _to_numpy(user_emb)
+    C = _l2_normalize(_to_numpy(comp_emb))
+    fill = 0.0 if MODE == "avg" else -np.inf
+    people = _people_from_responses(new)
+    rows = state.add_people(people, U.shape[1], C.shape[0], fill)
+    row_of = dict(zip(people["RespondentID"], rows))
+    owners = new["RespondentID"].map(row_of).to_numpy(dtype=np.int64)
+    touched = np.unique(owners)
+
+    if MODE == "avg":
+        np.add.at(state.sums, owners, U)
+        state.counts += np.bincount(owners, minlength=len(state.counts))
+        profiles = state.sums[touched] / state.counts[touched, None]
+        state.scores[touched] = _l2_normalize(profiles) @ C.T
+        state.pooled_sum = state.pooled_sum + U.sum(axis=0)
+        state.pooled_count += len(U)
+        state.pooled_scores = (_l2_normalize(state.pooled_sum[None, :]) @ C.T)[0]
+    elif MODE == "max":
+        S = _l2_normalize(U) @ C.T
+        np.maximum.at(state.scores, owners, S)
+        state.counts += np.bincount(owners, minlength=len(state.counts))
+        state.pooled_count += len(U)
+        state.pooled_scores = np.maximum(state.pooled_scores, S.max(axis=0))
+    else:
+        raise ValueError("mode must be 'avg' or 'max'")
 
+    state.fingerprints.update(new["RowHash"])
+
+
+def run_incremental(competencies: pd.DataFrame, jobs: pd.DataFrame,
+                    responses: pd.DataFrame, per_respondent: bool = PER_RESPONDENT) -> None:
+    """
+    Score only rows not seen by a previous run, then rewrite all outputs.
+
+    The model is not even loaded when there is nothing new: outputs are rebuilt
+    from the stored scores (so a TOP_K change still applies).
+    """
+    state = IncrementalState.load(_catalog_signature(competencies), STATE_DIR)
+    if not state.fingerprints.issubset(set(responses["RowHash"])):
+        # Rows were edited or removed: sums can't be un-added, start over.
+        print("Previously processed rows changed or disappeared: full rescore.")
+        state = IncrementalState(state.signature, STATE_DIR)
+
+    new = responses[~responses["RowHash"].isin(state.fingerprints)]
+    print(f"Incremental run: {len(new)} new rows, {len(responses) - len(new)} already scored.")
+
+    if len(new):
+        print(f"Loading model: {MODEL_NAME} ({ENCODER_BACKEND})")
+        with metrics.span("model_load"):
+            model = load_model(MODEL_NAME, ENCODER_BACKEND)
+        print("Encoding new texts...")
+        comp_emb = encode_competencies(model, competencies["CompetencyText"].astype(str).tolist())
+        user_emb = encode(model, new["Response"].tolist())
+        if ARCHIVE_DTYPE:
+            _archive_embeddings(new, user_emb)
+        _report_answer_cache()
+        _report_encode()
+        _merge_new_responses(state, new, user_emb, comp_emb)
+        state.save()
+
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+    write_pooled_outputs(state.pooled_scores, competencies, jobs, job_matrix=job_matrix)
+    if per_respondent:
+        write_respondent_outputs(respondent_tables(state.people, state.scores, competencies, jobs,
+                                                   top_k=TOP_K, job_matrix=job_matrix))
+        print("Per-respondent results in outputs/respondents/ and outputs/results/respondents.json")
+
+
+# ------------------------------- Streaming runs --------------------------------
+
+def run_streaming(competencies: pd.DataFrame, jobs: pd.DataFrame, chunk_rows: int,
+                  per_respondent: bool = PER_RESPONDENT) -> None:
+    """
+    Encode and score data/user_responses.csv chunk by chunk.
+
+    The pooled profile is kept as a running sum of embeddings ("avg") or a
+    running max of similarities ("max"), which gives the scores of a full run;
+    in "max" mode the pooled evidence is kept the same way (RunningEvidence).
+    Per-respondent tables are appended chunk by chunk; rows of one respondent
+    are expected in the same chunk (the key includes the Timestamp, so only
+    exact duplicate rows could be split).
+    """
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+
+    print(f"Loading model: {MODEL_NAME} ({ENCODER_BACKEND})")
+    with metrics.span("model_load"):
+        model = load_model(MODEL_NAME, ENCODER_BACKEND)
+    comp_emb = encode_competencies(model, comp_texts)
+    C = _l2_normalize(_to_numpy(comp_emb))
+    index = None
+    if USE_ANN_INDEX and len(competencies) >= ANN_MIN_COMPETENCIES:
+        with metrics.span("ann_index"):
+            index = competency_index(comp_emb, comp_texts)
+
+    pooled_sum = np.zeros(C.shape[1], dtype=np.float32)
+    pooled_max = np.full(C.shape[0], -np.inf, dtype=np.float32)
+    evidence = None
+    if MODE == "max" and index is None and EVIDENCE_TOP_N > 0:
+        evidence = RunningEvidence(C.shape[0], EVIDENCE_TOP_N)
+    stream = RespondentOutputStream(competencies) if per_respondent else None
+    n_rows = 0
+    try:
+        for chunk in iter_response_chunks(chunk_rows):
+            U = _to_numpy(encode(model, chunk["Response"].tolist()))
+            offset, n_rows = n_rows, n_rows + len(U)
+            if ARCHIVE_DTYPE:
+                _archive_embeddings(chunk, U)
+            if MODE == "avg":
+                pooled_sum += U.sum(axis=0)
+            elif index is not None:
+                pooled_max = np.maximum(pooled_max, compute_comp_scores_ann(
+                    U, index, np.zeros(len(U), dtype=np.int64), 1, mode=MODE)[0])
+            else:
+                S = _l2_normalize(U) @ C.T
+                pooled_max = np.maximum(pooled_max, S.max(axis=0))
+                if evidence is not None:
+                    evidence.update(S, chunk, offset)
+            if stream is not None:
+                stream.append(score_respondents(chunk, U, comp_emb, competencies, jobs, mode=MODE,
+                                                top_k=TOP_K, job_matrix=job_matrix, index=index))
+            print(f"  {n_rows} texts scored" + (f", {stream.n} respondents written" if stream else ""))
+    finally:
+        if stream is not None:
+            stream.close()
+    if not n_rows:
+        raise ValueError("No usable user responses found in data/user_responses.csv.")
+    _report_answer_cache()
+    _report_encode()
+
+    if MODE == "avg" and index is not None:
+        comp_scores = compute_comp_scores_ann(pooled_sum[None, :], index, np.zeros(1, dtype=np.int64),
+                                              1, mode=MODE)[0]
+    elif MODE == "avg":
+        comp_scores = (_l2_normalize(pooled_sum[None, :]) @ C.T)[0]
+    else:
+        comp_scores = pooled_max
+    write_pooled_outputs(comp_scores, competencies, jobs, job_matrix=job_matrix,
+                         evidence=evidence.table(competencies, comp_scores) if evidence is not None else None)
+    if per_respondent:
+        print("Per-respondent results in outputs/respondents/ and outputs/results/respondents.json")
+
+
+# --------------------------------- Main pipeline --------------------------------
+
+def main(per_respondent: bool = PER_RESPONDENT, incremental: bool = INCREMENTAL,
+         field_level: bool = FIELD_LEVEL, chunk_rows: int | None = STREAM_CHUNK_ROWS,
+         profile: bool = PROFILE_RUN) -> None:
+    """Full pipeline: load data, compute embeddings, score, and save outputs."""
+    global metrics
+    if incremental and field_level:
+        raise ValueError("--field-level is not supported with --incremental yet.")
+    if chunk_rows and (incremental or field_level):
+        raise ValueError("--chunk-rows is not supported with --incremental or --field-level yet.")
+    if chunk_rows and per_respondent and OUTPUT_FORMAT != "csv":
+        raise ValueError("--chunk-rows writes per-respondent tables as csv only.")
+    _ensure_folders()
+
+    metrics = RunMetrics(RES_DIR / "trace.jsonl")
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        try:
+            _run(per_respondent, incremental, field_level, chunk_rows)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                path = RES_DIR / f"profile-{time.strftime('%Y%m%d-%H%M%S')}.pstats"
+                profiler.dump_stats(path)
+                print(f"cProfile written to {path}")
+        _write_run_metrics()
+    finally:
+        metrics = RunMetrics(enabled=False)
     print("Done. Results available in outputs/ and outputs/results/summary.json")
 
 
+def _write_run_metrics() -> None:
+    """Add cache / encoder figures to the run metrics and store them in summary.json."""
+    if _answer_caches:
+        cache = answer_cache()
+        metrics.record(answer_cache=hit_rate(cache.hits, cache.misses))
+    if encode_stats["texts"]:
+        metrics.record(encoder={**encode_stats, "texts_per_second": encode_stats["texts"]
+                                / max(encode_stats["seconds"], 1e-9)})
+    run = metrics.finish()
+    path = RES_DIR / "summary.json"
+    summary = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    summary["run_metrics"] = run
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=float)
+    slowest = sorted(run["stages"].items(), key=lambda kv: -kv[1]["seconds"])[:4]
+    print(f"Run: {run['total_seconds']:.2f}s, peak RSS {run['peak_rss_mb'] or 0:.0f} MB; slowest stages: "
+          + ", ".join(f"{name} {st['seconds']:.2f}s" for name, st in slowest))
+
+
+def _run(per_respondent: bool, incremental: bool, field_level: bool, chunk_rows: int | None) -> None:
+    if chunk_rows:
+        print(f"Streaming data/user_responses.csv in chunks of {chunk_rows} rows...")
+        competencies, jobs = load_reference()
+        run_streaming(competencies, jobs, chunk_rows, per_respondent=per_respondent)
+        return
+    print("Loading data...")
+    with metrics.span("load_inputs") as span:
+        competencies, jobs, responses = load_respondents(field_level=field_level)
+        span["texts"] = len(responses)
+    user_inputs = responses["Response"].tolist()
+    if not user_inputs:
+        raise ValueError("No user responses found in data/user_responses.csv.")
+
+    if incremental:
+        run_incremental(competencies, jobs, responses, per_respondent=per_respondent)
+        return
+
+    comp_texts = competencies["CompetencyText"].astype(str).tolist()
+    job_matrix = JobMatrix(jobs, competencies["CompetencyID"].tolist())
+
+    print(f"Loading model: {MODEL_NAME} ({ENCODER_BACKEND})")
+    with metrics.span("model_load"):
+        model = load_model(MODEL_NAME, ENCODER_BACKEND)
+
+    print(f"Encoding {len(user_inputs)} {'answer fields' if field_level else 'texts'}...")
+    user_emb = encode(model, user_inputs)
+    if ARCHIVE_DTYPE:
+        _archive_embeddings(responses, user_emb)
+    _report_answer_cache()
+    comp_emb = encode_competencies(model, comp_texts)
+    _report_encode()
+
+    index = None
+    if USE_ANN_INDEX and not field_level and len(competencies) >= ANN_MIN_COMPETENCIES:
+        with metrics.span("ann_index"):
+            index = competency_index(comp_emb, comp_texts)
+
+    print(f"Scoring competencies (mode='{MODE}'{', ANN top-%d' % ANN_TOP_N if index else ''})...")
+    top_n = EVIDENCE_TOP_N if MODE == "max" and index is None else 0
+    evidence = None
+    if field_level:
+        # Pooled profile = every field of every row, as a single respondent
+        comp_scores = compute_field_scores_batch(
+            user_emb, comp_emb, np.zeros(len(responses), dtype=np.int64),
+            responses["Field"].tolist(), 1, mode=MODE, weights=FIELD_WEIGHTS,
+            comp_ids=competencies["CompetencyID"].tolist(), restrict=RESTRICT_TO_MAPSTO,
+            evidence_top_n=top_n,
+        )
+        if top_n:
+            comp_scores, evidence = comp_scores
+        comp_scores = comp_scores[0]
+    elif index is not None:
+        comp_scores = compute_comp_scores_ann(user_emb, index, np.zeros(len(user_inputs), dtype=np.int64),
+                                              1, mode=MODE)[0]
+    else:
+        comp_scores = compute_comp_scores(user_emb, comp_emb, mode=MODE, evidence_top_n=top_n)
+        if top_n:
+            comp_scores, (rows, sims) = comp_scores
+            evidence = (rows[None], sims[None])
+    if evidence is not None:
+        evidence = evidence_table(*evidence, competencies, responses, scores=comp_scores)
+
+    write_pooled_outputs(comp_scores, competencies, jobs, job_matrix=job_matrix, evidence=evidence)
+
+    if per_respondent:
+        print(f"Scoring {responses['RespondentID'].nunique()} respondents separately...")
+        tables = score_respondents(responses, user_emb, comp_emb, competencies, jobs,
+                                   mode=MODE, top_k=TOP_K, job_matrix=job_matrix, index=index)
+        write_respondent_outputs(tables)
+        print("Per-respondent results in outputs/respondents/ and outputs/results/respondents.json")
+
+
+def _parse_args(argv: List[str] | None = None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Semantic engine: competency and job scoring.")
+    parser.add_argument("--per-respondent", action="store_true", default=PER_RESPONDENT,
+                        help="also score each respondent separately (outputs/respondents/)")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                        help="only encode rows not processed by a previous run")
+    parser.add_argument("--backend", choices=BACKENDS, default=ENCODER_BACKEND,
+                        help="encoder inference backend (torch, int8, onnx)")
+    parser.add_argument("--field-level", action="store_true", default=FIELD_LEVEL,
+                        help="encode each answer field separately and pool per respondent")
+    parser.add_argument("--restrict-mapsto", action="store_true", default=RESTRICT_TO_MAPSTO,
+                        help="with --field-level, score competencies only from their MapsTo fields")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT,
+                        help="per-respondent tables as csv, npz (columnar) or both")
+    parser.add_argument("--encode-workers", type=int, default=ENCODE_WORKERS,
+                        help="encode large batches with N worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS,
+                        help="stream user_responses.csv N rows at a time (bounded memory)")
+    parser.add_argument("--archive", choices=["float16", "int8"], default=ARCHIVE_DTYPE,
+                        help="append answer embeddings to the quantized archive (embedding_archive.py)")
+    parser.add_argument("--profile", action="store_true", default=PROFILE_RUN,
+                        help="dump a cProfile file of the run to outputs/results/")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    main()
+    args = _parse_args()
+    RESTRICT_TO_MAPSTO = args.restrict_mapsto
+    ENCODER_BACKEND = args.backend
+    OUTPUT_FORMAT = args.output_format
+    ENCODE_WORKERS = args.encode_workers
+    ARCHIVE_DTYPE = args.archive
+    main(per_respondent=args.per_respondent, incremental=args.incremental,
+         field_level=args.field_level, chunk_rows=args.chunk_rows, profile=args.profile)
@@ -0,0 +1,184 @@
+# submission_store.py
+# -----------------------------------------------------------------------------
+# Append-only local store for form submissions (alternative to the GitHub
+# read-modify-write of data/user_responses.csv done by app.py).
+#
+# Each submission is ONE INSERT into a SQLite database in WAL mode:
+#   - constant cost per submission, whatever the number of stored responses
+#   - atomic (a row is either fully stored or not at all)
+#   - concurrent writers are serialized by SQLite (busy timeout), no lost
+#     updates like with the GitHub file `sha`
+#
+# A periodic export appends the rows not exported yet to the CSV the engine
+# reads, keeping it append-only (incremental engine runs rely on that). Each
+# exported row carries its SubmissionID, and ids already in the CSV are
+# skipped, so an export interrupted after writing the file is not duplicated
+# by the next one:
+#   python submission_store.py export [--db data/submissions.db] [--csv data/user_responses.csv]
+#   python submission_store.py count
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+DB_PATH = Path("data") / "submissions.db"
+CSV_PATH = Path("data") / "user_responses.csv"
+
+# Column order of data/user_responses.csv (what app.py submits).
+SUBMISSION_COLUMNS = [
+    "Timestamp", "First_Name", "Last_Name", "Programming", "Data_Analysis",
+    "ML_Projects", "ML_Problem", "NLP", "Data_Pipeline", "Sharing_Results",
+    "Git_Level", "Presentation_Level", "Reflection",
+]
+
+# Column of the exported CSV holding the submission id (empty for rows that
+# did not come from this store).
+ID_COLUMN = "SubmissionID"
+
+# How long a writer waits for another one to release the database (seconds).
+BUSY_TIMEOUT = 30.0
+
+
+class SubmissionStore:
+    """
+    SQLite (WAL) journal of submissions.
+
+    Parameters
+    ----------
+    path : Path
+        Database file (created on first use).
+    """
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._local = threading.local()   # one connection per thread
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, row: Dict) -> int:
+        """Store one submission atomically; returns its id."""
+        payload = json.dumps(row, ensure_ascii=False, default=str)
+        with self._connect() as conn:   # commits on success, rolls back on error
+            cur = conn.execute("INSERT INTO submissions (payload) VALUES (?)", (payload,))
+        return int(cur.lastrowid)
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM submissions").fetchone()[0])
+
+    def rows(self, after_id: int = 0) -> List[Dict]:
+        """Submissions with id > after_id, oldest first (each with its _id)."""
+        cur = self._connect().execute(
+            "SELECT id, payload FROM submissions WHERE id > ? ORDER BY id", (after_id,)
+        )
+        return [{**json.loads(payload), "_id": sid} for sid, payload in cur]
+
+    def export_csv(self, csv_path: Path = CSV_PATH, columns: List[str] = SUBMISSION_COLUMNS) -> int:
+        """
+        Append submissions not exported yet to `csv_path`; returns how many.
+
+        Rows already in the CSV (e.g. submitted through GitHub) are kept, and
+        submissions whose id is already in its ID_COLUMN are not written again.
+        If the CSV header differs from `columns` + ID_COLUMN (e.g. the first
+        export to a CSV written by app.py), the file is rewritten with the
+        union of both column sets instead of appended to: that changes every
+        row's fingerprint, so the next incremental engine run is a full rescore.
+        """
+        csv_path = Path(csv_path)
+        conn = self._connect()
+        # BEGIN IMMEDIATE: only one exporter at a time; appends are not blocked
+        # for long since the transaction only reads and updates `meta`.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'exported_id'").fetchone()
+            last = int(row[0]) if row else 0
+            new = self.rows(after_id=last)
+            if new:
+                top = max(r["_id"] for r in new)
+                done = _exported_ids(csv_path)     # written by an export that did not commit
+                new = [r for r in new if r["_id"] not in done]
+                if new:
+                    frame = pd.DataFrame(new).rename(columns={"_id": ID_COLUMN})
+                    _append_csv(csv_path, frame, columns + [ID_COLUMN])
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('exported_id', ?)", (str(top),)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(new)
+
+
+def _exported_ids(csv_path: Path) -> set:
+    """Submission ids already in the CSV's ID_COLUMN."""
+    if not csv_path.exists() or csv_path.stat().st_size == 0:
+        return set()
+    header = pd.read_csv(csv_path, nrows=0).columns.str.strip().tolist()
+    if ID_COLUMN not in header:
+        return set()
+    ids = pd.read_csv(csv_path, usecols=lambda c: c.strip() == ID_COLUMN).iloc[:, 0]
+    return set(pd.to_numeric(ids, errors="coerce").dropna().astype(int))
+
+
+def _append_csv(csv_path: Path, frame: pd.DataFrame, columns: List[str]) -> None:
+    """Append `frame` to the CSV, or rewrite it (temp file + rename) if headers differ."""
+    cols = columns + [c for c in frame.columns if c not in columns]
+    frame = frame.reindex(columns=cols)
+    if csv_path.exists() and csv_path.stat().st_size > 0:
+        header = pd.read_csv(csv_path, nrows=0).columns.str.strip().tolist()
+        if header == cols:
+            with open(csv_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+            with open(csv_path, "a", encoding="utf-8", newline="") as f:
+                if needs_newline:
+                    f.write("\n")
+                frame.to_csv(f, header=False, index=False)
+            return
+        existing = pd.read_csv(csv_path)
+        existing.columns = existing.columns.str.strip()
+        frame = pd.concat([existing, frame], ignore_index=True)
+        frame = frame.reindex(columns=header + [c for c in frame.columns if c not in header])
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    frame.to_csv(tmp, index=False)
+    os.replace(tmp, csv_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local submission store.")
+    parser.add_argument("command", choices=["export", "count"])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--csv", type=Path, default=CSV_PATH)
+    args = parser.parse_args()
+
+    store = SubmissionStore(args.db)
+    if args.command == "export":
+        n = store.export_csv(args.csv)
+        print(f"Exported {n} new submissions to {args.csv}")
+    else:
+        print(store.count())
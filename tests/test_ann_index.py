@@ -0,0 +1,26 @@
+import numpy as np
+
+from ann_index import IVFIndex, brute_force_topn
+
+
+def test_search_probing_every_list_is_exact():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+    queries = rng.normal(size=(50, 32)).astype(np.float32)
+    index = IVFIndex.build(vectors, n_lists=40)
+
+    for top_n in (1, 10, 100):
+        ids, scores = index.search(queries, top_n=top_n, nprobe=40)
+        exact = brute_force_topn(vectors, queries, top_n)
+        recall = np.mean([len(set(a) & set(b)) / top_n for a, b in zip(ids, exact)])
+        assert recall == 1.0
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_save_load_round_trip(tmp_path):
+    vectors = np.random.default_rng(1).normal(size=(300, 8)).astype(np.float32)
+    index = IVFIndex.build(vectors, n_lists=10, signature="abc")
+    index.save(tmp_path / "index.npz")
+    assert IVFIndex.load(tmp_path / "index.npz", signature="other") is None
+    loaded = IVFIndex.load(tmp_path / "index.npz", signature="abc")
+    np.testing.assert_array_equal(loaded.search(vectors[:5], 3)[0], index.search(vectors[:5], 3)[0])
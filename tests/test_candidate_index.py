@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candidate_index import CandidateIndex, CandidateIndexWriter
+from semantic_engine import score_job_mean, score_job_topk
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(0)
+    comp_ids = [f"C{i:02d}" for i in range(20)]
+    people = pd.DataFrame({"RespondentID": [f"row-{i}" for i in range(200)]})
+    scores = rng.random((200, 20)).astype(np.float32)
+    return CandidateIndex(people, scores, comp_ids, mode="avg")
+
+
+@pytest.mark.parametrize("method, scorer", [
+    ("topk", lambda req, m: score_job_topk(req, m, k=3)),
+    ("mean", score_job_mean),
+])
+def test_rank_matches_brute_force_sort(index, method, scorer):
+    required = ["C01", "C04", "C07", "C11", "C99"]
+    ranked = index.rank(required, top_n=15, method=method, k=3)
+
+    expected = np.array([scorer(required, dict(zip(index.comp_ids, row))) for row in index.scores])
+    order = np.argsort(-expected, kind="stable")[:15]
+    assert ranked["RespondentID"].tolist() == index.people["RespondentID"].iloc[order].tolist()
+    np.testing.assert_allclose(ranked["JobScore"], expected[order], rtol=1e-6)
+    assert ranked["Rank"].tolist() == list(range(1, 16))
+
+
+def test_writer_chunks_load_back_as_one_index(index, tmp_path):
+    writer = CandidateIndexWriter(tmp_path, index.comp_ids, mode="avg")
+    for a in range(0, len(index), 64):
+        writer.append(CandidateIndex(index.people.iloc[a:a + 64], index.scores[a:a + 64], index.comp_ids))
+    writer.close()
+    loaded = CandidateIndex.load(tmp_path)
+    np.testing.assert_array_equal(loaded.scores, index.scores)
+    assert loaded.people["RespondentID"].tolist() == index.people["RespondentID"].tolist()
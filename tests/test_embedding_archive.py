@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import semantic_engine as engine
+from embedding_archive import EmbeddingArchive
+
+# Quantization error on unit vectors: float16 ~1e-3, int8 (one scale per vector) ~1e-2.
+TOLERANCE = {"float16": 2e-3, "int8": 2e-2}
+
+
+@pytest.fixture
+def answers():
+    rng = np.random.default_rng(3)
+    U = rng.normal(size=(240, 32)).astype(np.float32)
+    C = rng.normal(size=(10, 32)).astype(np.float32)
+    owners = rng.permutation(np.arange(len(U)) % 40)
+    responses = pd.DataFrame({"RespondentID": [f"R{o:03d}" for o in owners],
+                              "Response": ["x"] * len(U)})
+    return U, C, owners, responses
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+@pytest.mark.parametrize("mode", ["avg", "max"])
+def test_archive_scores_close_to_float32(answers, tmp_path, dtype, mode):
+    U, C, owners, responses = answers
+    archive = EmbeddingArchive("stub-model", dtype=dtype, root=tmp_path)
+    assert archive.append(responses, U) == 40
+
+    got = EmbeddingArchive("stub-model", root=tmp_path).score(C, mode=mode, chunk_rows=50)
+
+    # The archive groups rows per respondent in first-seen order.
+    ids, first = np.unique(responses["RespondentID"], return_index=True)
+    order = ids[np.argsort(first)]
+    assert archive.people["RespondentID"].tolist() == list(order)
+    idx = {rid: i for i, rid in enumerate(order)}
+    ref = engine.compute_comp_scores_batch(
+        U, C, np.array([idx[r] for r in responses["RespondentID"]]), len(order), mode=mode)
+    np.testing.assert_allclose(got, ref, atol=TOLERANCE[dtype])
+
+
+def test_archive_append_skips_known_respondents(answers, tmp_path):
+    U, _, _, responses = answers
+    archive = EmbeddingArchive("stub-model", dtype="int8", root=tmp_path)
+    archive.append(responses, U)
+    assert archive.append(responses, U) == 0
+    assert len(EmbeddingArchive("stub-model", root=tmp_path)) == 40
@@ -0,0 +1,30 @@
+import numpy as np
+
+from embedding_store import AnswerCache, text_hash
+
+
+def _encoder(vectors):
+    return lambda texts: np.array([vectors[t] for t in texts], dtype=np.float32)
+
+
+def test_answer_cache_recovers_from_interrupted_append(tmp_path):
+    vectors = {"aaaa": [1, 0], "bbbb": [0, 1], "cccc": [1, 1]}
+    cache = AnswerCache("stub", root=tmp_path)
+    cache.get_or_encode(["aaaa", "bbbb"], _encoder(vectors))
+
+    # Crash after the vector write: an orphan vector, a partial one and a partial key line
+    with open(cache.vec_path, "ab") as f:
+        f.write(np.array([99, 99], dtype=np.float32).tobytes() + b"\x00\x00")
+    with open(cache.keys_path, "a", encoding="utf-8") as f:
+        f.write(text_hash("orphan")[:7])
+
+    cache = AnswerCache("stub", root=tmp_path)
+    out, stats = cache.get_or_encode(["cccc", "aaaa", "bbbb"], _encoder(vectors))
+    assert stats == {**stats, "hits": 2, "misses": 1}
+    np.testing.assert_array_equal(out, [[1, 1], [1, 0], [0, 1]])
+
+    cache = AnswerCache("stub", root=tmp_path)
+    out, stats = cache.get_or_encode(["cccc", "bbbb"], _encoder({}))
+    assert stats["misses"] == 0
+    np.testing.assert_array_equal(out, [[1, 1], [0, 1]])
+    assert cache.vec_path.stat().st_size == 3 * 2 * 4
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import semantic_engine as engine
+
+
+def _unit(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+@pytest.fixture
+def similarities():
+    rng = np.random.default_rng(0)
+    U = rng.normal(size=(300, 16)).astype(np.float32)
+    C = rng.normal(size=(25, 16)).astype(np.float32)
+    return _unit(U) @ _unit(C).T
+
+
+@pytest.mark.parametrize("n_owners, top_n", [(1, 3), (40, 1), (40, 3), (40, 12)])
+def test_top_answers_matches_brute_force(similarities, n_owners, top_n):
+    S = similarities
+    owners = np.random.default_rng(1).permutation(np.arange(len(S)) % n_owners)
+    rows, sims = engine.top_answers(S, owners, n_owners, top_n)
+
+    for r in range(n_owners):
+        mine = np.flatnonzero(owners == r)
+        best = mine[np.argsort(-S[mine], axis=0, kind="stable")[:top_n]]      # top answers x competencies
+        k = len(best)
+        np.testing.assert_array_equal(rows[r, :, :k], best.T)
+        np.testing.assert_allclose(sims[r, :, :k], np.take_along_axis(S, best, axis=0).T)
+        assert (rows[r, :, k:] == -1).all() and np.isnan(sims[r, :, k:]).all()
+    if n_owners == 1:
+        np.testing.assert_array_equal(rows[0, :, 0], S.argmax(axis=0))
+
+
+def test_running_evidence_matches_one_pass(similarities):
+    S = similarities
+    responses = pd.DataFrame({"RespondentID": [f"row-{i}" for i in range(len(S))],
+                              "Response": [f"answer {i}" for i in range(len(S))]})
+    competencies = pd.DataFrame({"CompetencyID": [f"C{j:02d}" for j in range(S.shape[1])]})
+    scores = S.max(axis=0)
+    rows, sims = engine.top_answers(S, np.zeros(len(S), dtype=np.int64), 1, 3)
+    expected = engine.evidence_table(rows, sims, competencies, responses, scores=scores)
+
+    running = engine.RunningEvidence(S.shape[1], 3)
+    for a in range(0, len(S), 70):
+        running.update(S[a:a + 70], responses.iloc[a:a + 70], a)
+    pd.testing.assert_frame_equal(running.table(competencies, scores), expected)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+import semantic_engine as engine
+
+
+def _unit(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+@pytest.fixture
+def answers():
+    rng = np.random.default_rng(1)
+    U = rng.normal(size=(300, 16)).astype(np.float32)
+    C = rng.normal(size=(12, 16)).astype(np.float32)
+    owners = rng.permutation(np.arange(len(U)) % 60)
+    fields = list(rng.choice(["a", "b", "c"], len(U)))
+    return U, C, owners, fields
+
+
+@pytest.mark.parametrize("chunk", [1, 50, 10 ** 7])
+def test_field_avg_matches_weighted_mean_profile(answers, monkeypatch, chunk):
+    U, C, owners, fields = answers
+    weights = {"a": 1.0, "b": 2.0, "c": 0.0}
+    monkeypatch.setattr(engine, "FIELD_CHUNK_ELEMENTS", chunk)
+    got = engine.compute_field_scores_batch(U, C, owners, fields, 60, mode="avg", weights=weights)
+
+    w = np.array([weights[f] for f in fields], dtype=np.float32)
+    for r in range(60):
+        rows = (owners == r) & (w > 0)
+        expected = _unit((U[rows] * w[rows, None]).sum(axis=0)) @ _unit(C).T if rows.any() else 0.0
+        np.testing.assert_allclose(got[r], expected, atol=1e-5)
+
+
+def test_field_max_matches_best_answer(answers):
+    U, C, owners, fields = answers
+    got = engine.compute_field_scores_batch(U, C, owners, fields, 60, mode="max")
+    S = _unit(U) @ _unit(C).T
+    for r in range(60):
+        np.testing.assert_allclose(got[r], S[owners == r].max(axis=0), atol=1e-6)
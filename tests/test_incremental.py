@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import semantic_engine as engine
+from incremental_state import IncrementalState
+
+
+def _fake_encode(model, texts, model_name=None):
+    return np.array([[len(t), t.count(","), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_incremental_run_scores_resubmitted_identical_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(engine, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(engine, "load_model", lambda *args, **kwargs: None)
+    monkeypatch.setattr(engine, "encode", _fake_encode)
+    monkeypatch.setattr(engine, "encode_competencies", _fake_encode)
+    monkeypatch.setattr(engine, "OUTPUT_FORMAT", "csv")
+    competencies = pd.DataFrame({"CompetencyID": ["C01", "C02"], "CompetencyText": ["Python", "SQL, Excel"],
+                                 "BlockID": [1, 1], "BlockName": ["Data", "Data"]})
+    jobs = pd.DataFrame({"JobID": ["J01"], "JobTitle": ["Data Analyst"], "RequiredCompetencies": [["C01", "C02"]]})
+    engine._ensure_folders()
+
+    rows = ["Python, SQL", "Excel"]
+    engine.run_incremental(competencies, jobs, engine._responses_from_frame(pd.DataFrame({"response": rows})))
+    rows.append("Python, SQL")
+    responses = engine._responses_from_frame(pd.DataFrame({"response": rows}))
+    engine.run_incremental(competencies, jobs, responses)
+
+    state = IncrementalState.load(engine._catalog_signature(competencies), engine.STATE_DIR)
+    assert state.people["RespondentID"].tolist() == ["row-0", "row-1", "row-2"]
+    assert state.pooled_count == 3
+    assert state.fingerprints == set(responses["RowHash"])
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_matrix import JobMatrix
+from semantic_engine import score_job_mean, score_job_topk
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(0)
+    comp_ids = [f"C{i:02d}" for i in range(30)]
+    required = [list(rng.choice(comp_ids + ["C99"], size=n)) for n in (1, 3, 5, 8, 12)] + [[], ["C01", "C01"]]
+    jobs = pd.DataFrame({"JobID": [f"J{i}" for i in range(len(required))],
+                         "JobTitle": [f"Job {i}" for i in range(len(required))],
+                         "RequiredCompetencies": required})
+    scores = rng.random((6, len(comp_ids))).astype(np.float32)
+    return jobs, comp_ids, scores
+
+
+def _reference(jobs, comp_ids, scores, scorer):
+    maps = [dict(zip(comp_ids, row)) for row in scores]
+    return np.array([[scorer(req, m) for req in jobs["RequiredCompetencies"]] for m in maps])
+
+
+def test_score_mean_matches_scalar_scorer(catalog):
+    jobs, comp_ids, scores = catalog
+    expected = _reference(jobs, comp_ids, scores, score_job_mean)
+    np.testing.assert_allclose(JobMatrix(jobs, comp_ids).score_mean(scores), expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 5, 20])
+def test_score_topk_matches_scalar_scorer(catalog, k):
+    jobs, comp_ids, scores = catalog
+    expected = _reference(jobs, comp_ids, scores, lambda req, m: score_job_topk(req, m, k=k))
+    np.testing.assert_allclose(JobMatrix(jobs, comp_ids).score_topk(scores, k=k), expected, rtol=1e-6)
+
+
+def test_score_topk_chunked(catalog, monkeypatch):
+    jobs, comp_ids, scores = catalog
+    full = JobMatrix(jobs, comp_ids).score_topk(scores, k=3)
+    monkeypatch.setattr("job_matrix.TOPK_CHUNK_ELEMENTS", 1)
+    np.testing.assert_array_equal(JobMatrix(jobs, comp_ids).score_topk(scores, k=3), full)
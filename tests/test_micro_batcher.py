@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(len(texts))
+        return np.array([[float(t)] for t in texts])
+
+
+def test_batches_never_exceed_max_batch_size():
+    encoder = RecordingEncoder()
+    batcher = MicroBatcher(encoder, max_batch_size=16, max_wait_ms=20)
+    sizes = [3, 7, 12, 5, 16, 1, 40, 9, 11, 2] * 5
+    requests = [[str(100 * i + j) for j in range(n)] for i, n in enumerate(sizes)]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(batcher.encode, requests))
+    batcher.close()
+
+    assert max(encoder.batches) <= 16
+    assert sum(encoder.batches) == sum(sizes)
+    for texts, emb in zip(requests, results):
+        np.testing.assert_array_equal(emb[:, 0], [float(t) for t in texts])
+
+
+def test_submit_racing_close_never_hangs():
+    for _ in range(20):
+        batcher = MicroBatcher(RecordingEncoder(), max_batch_size=4, max_wait_ms=1)
+        futures, refused = [], []
+        start = threading.Barrier(5)
+
+        def client():
+            start.wait()
+            for i in range(50):
+                try:
+                    futures.append(batcher.submit([str(i)] * 3))
+                except RuntimeError:
+                    refused.append(i)
+
+        threads = [threading.Thread(target=client) for _ in range(4)]
+        for t in threads:
+            t.start()
+        start.wait()
+        batcher.close()
+        for t in threads:
+            t.join()
+        for fut in futures:
+            assert fut.result(timeout=5).shape == (3, 1)
+        with pytest.raises(RuntimeError):
+            batcher.submit(["late"])
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from parameter_sweep import SimilarityMatrix, parse_config, rank_agreement
+from semantic_engine import compute_comp_scores_batch
+
+
+@pytest.mark.parametrize("mode", ["avg", "max"])
+def test_comp_scores_match_batch_scorer(mode):
+    rng = np.random.default_rng(0)
+    U = rng.normal(size=(400, 24)).astype(np.float32)
+    C = rng.normal(size=(30, 24)).astype(np.float32)
+    owners = rng.permutation(np.arange(len(U)) % 70)
+    got = SimilarityMatrix(U, C, owners, 70).comp_scores(mode)
+    np.testing.assert_allclose(got, compute_comp_scores_batch(U, C, owners, 70, mode=mode), atol=1e-5)
+
+
+def test_rank_agreement_of_identical_scores():
+    scores = np.random.default_rng(1).random((20, 8))
+    assert rank_agreement(scores, scores, top_n=5) == {"top1_agreement": 1.0, "top5_overlap": 1.0,
+                                                      "spearman": pytest.approx(1.0)}
+
+
+def test_parse_config():
+    assert parse_config("max/top3") == ("max", "topk", 3)
+    assert parse_config("avg/mean") == ("avg", "mean", None)
+    with pytest.raises(ValueError):
+        parse_config("avg/best")
@@ -0,0 +1,34 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from scoring_service import ScoringService, _make_handler
+
+
+@pytest.fixture(scope="module")
+def url():
+    service = ScoringService.__new__(ScoringService)     # no model: requests are rejected before encoding
+    service.mode, service.top_k = "avg", 3
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/score"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2], "Python", {"texts": "Python"}, {"response": ["Python"]}, {},
+    {"texts": ["Python"], "top_k": 0}, {"texts": ["Python"], "top_k": -2},
+    {"texts": ["Python"], "top_k": 2.5}, {"texts": ["Python"], "top_k": "3"},
+    {"texts": ["Python"], "top_k": True}, {"texts": ["Python"], "mode": "median"},
+])
+def test_invalid_score_request_is_rejected_with_400(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST")
+    with pytest.raises(urllib.error.HTTPError) as err:
+        urllib.request.urlopen(request, timeout=5)
+    assert err.value.code == 400
+    assert json.loads(err.value.read())["error"]
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import submission_store
+from submission_store import ID_COLUMN, SUBMISSION_COLUMNS, SubmissionStore
+
+
+def _row(i):
+    return {"Timestamp": f"2026-01-0{i}", "First_Name": f"A{i}", "Last_Name": "B", "Programming": "Python"}
+
+
+def test_export_interrupted_after_csv_write_is_not_duplicated(tmp_path, monkeypatch):
+    csv = tmp_path / "user_responses.csv"
+    pd.DataFrame([_row(0)], columns=SUBMISSION_COLUMNS).to_csv(csv, index=False)   # written by app.py
+    store = SubmissionStore(tmp_path / "submissions.db")
+    for i in (1, 2, 3):
+        store.append(_row(i))
+
+    append_csv = submission_store._append_csv
+
+    def crash_after_write(*args):
+        append_csv(*args)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(submission_store, "_append_csv", crash_after_write)
+    with pytest.raises(KeyboardInterrupt):
+        store.export_csv(csv)
+    monkeypatch.setattr(submission_store, "_append_csv", append_csv)
+
+    assert store.export_csv(csv) == 0
+    store.append(_row(4))
+    assert store.export_csv(csv) == 1
+
+    out = pd.read_csv(csv)
+    assert out["First_Name"].tolist() == ["A0", "A1", "A2", "A3", "A4"]
+    assert out[ID_COLUMN].tolist()[1:] == [1, 2, 3, 4]
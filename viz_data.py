@@ -0,0 +1,169 @@
+# viz_data.py
+# -----------------------------------------------------------------------------
+# Chart data for the visualisation pages, memoized per results version.
+#
+# Parsing the CSVs, the join with competencies.csv, sorting and the per-block
+# subsets only depend on the result files, so prepare_results() runs once per
+# results version (the `version` token of results_loader sources). Figures are
+# memoized on (version, widget value): moving the "Nombre de compétences"
+# slider rebuilds only that bar chart, picking a block only the block chart.
+#
+# When the engine also wrote outputs/scores.npz (columnar_output.py), the
+# three score tables are read from it instead of parsing the CSVs. With
+# outputs/evidence.csv ("max" mode), the best answer behind each competency is
+# joined to the competency table (Evidence, EvidenceSimilarity).
+#
+# Arguments starting with "_" are not hashed by st.cache_data: the version
+# token already identifies them.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+from io import BytesIO, StringIO
+from typing import Dict, Tuple
+
+import pandas as pd
+import streamlit as st
+
+SCORE_COLS = ["JobScore", "Score", "FinalScore"]
+
+
+def _read_csv(content: str) -> pd.DataFrame:
+    df = pd.read_csv(StringIO(content))
+    df.columns = df.columns.str.strip()
+    return df
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def prepare_results(version: Tuple, _contents: Dict[str, str | None], files: Tuple[str, ...],
+                    _columnar: bytes | None = None, _evidence: str | None = None) -> Dict:
+    """
+    Parsed and pre-sorted result tables.
+
+    `files` = (competency_scores, block_scores, job_scores, summary, competencies)
+    paths, as in results_loader.RESULT_FILES. `_columnar` is the content of
+    results_loader.COLUMNAR_FILE, if any: it replaces the three score CSVs.
+    `_evidence` is the content of results_loader.EVIDENCE_FILE, if any.
+    """
+    comp_content, block_content, job_content, summary_content, comp_ref_content = (
+        _contents.get(p) for p in files
+    )
+    if _columnar is not None:
+        from columnar_output import read_tables
+
+        tables = read_tables(BytesIO(_columnar))
+        comp_df, block_df, job_df = tables["competencies"], tables["blocks"], tables["jobs"]
+    else:
+        comp_df = _read_csv(comp_content)
+        block_df = _read_csv(block_content)
+        job_df = _read_csv(job_content)
+
+    summary = {}
+    if summary_content:
+        try:
+            summary = json.loads(summary_content)
+        except Exception:
+            pass
+
+    if comp_ref_content and "BlockName" not in comp_df.columns and "CompetencyID" in comp_df.columns:
+        ref_comp = _read_csv(comp_ref_content)
+        if {"CompetencyID", "BlockName"}.issubset(ref_comp.columns):
+            comp_df = comp_df.merge(ref_comp[["CompetencyID", "BlockName"]], on="CompetencyID", how="left")
+
+    if _evidence and "CompetencyID" in comp_df.columns:
+        comp_df = _join_evidence(comp_df, _read_csv(_evidence))
+
+    if "Score" in comp_df.columns:
+        comp_df = comp_df.sort_values("Score", ascending=False).reset_index(drop=True)
+
+    job_score_col = next((c for c in SCORE_COLS if c in job_df.columns), None)
+    job_title_col = "JobTitle" if "JobTitle" in job_df.columns else job_df.columns[0]
+    if job_score_col:
+        job_df = job_df.sort_values(job_score_col, ascending=False).reset_index(drop=True)
+
+    blocks, block_subsets = [], {}
+    if "BlockName" in comp_df.columns:
+        blocks = list(dict.fromkeys(comp_df["BlockName"].dropna().tolist()))
+        for name, sub in comp_df.groupby("BlockName", sort=False, observed=True):
+            block_subsets[name] = sub.reset_index(drop=True)
+
+    return {
+        "comp_df": comp_df,
+        "block_df": block_df,
+        "job_df": job_df,
+        "summary": summary,
+        "job_score_col": job_score_col,
+        "job_title_col": job_title_col,
+        "blocks": blocks,
+        "block_subsets": block_subsets,
+        "matched": int((comp_df["Score"] > 0.0).sum()) if "Score" in comp_df.columns else 0,
+        "total": int(len(comp_df)),
+    }
+
+
+def _join_evidence(comp_df: pd.DataFrame, evidence: pd.DataFrame) -> pd.DataFrame:
+    """Best answer of each competency: field name ("NLP", ...) or answer excerpt."""
+    if not {"CompetencyID", "Rank", "Similarity"}.issubset(evidence.columns):
+        return comp_df
+    best = evidence[evidence["Rank"] == 1].drop_duplicates("CompetencyID")
+    label = "Field" if "Field" in best.columns else "Excerpt"
+    if label not in best.columns:
+        return comp_df
+    best = pd.DataFrame({
+        "CompetencyID": best["CompetencyID"].astype(str),
+        "Evidence": best[label].astype(str).str.replace("_", " ") if label == "Field" else best[label],
+        "EvidenceSimilarity": best["Similarity"],
+    })
+    comp_df = comp_df.assign(_cid=comp_df["CompetencyID"].astype(str))
+    return (comp_df.merge(best.rename(columns={"CompetencyID": "_cid"}), on="_cid", how="left")
+            .drop(columns="_cid"))
+
+
+def _hbar(df: pd.DataFrame, x: str, y: str, threshold: float):
+    import plotly.express as px
+
+    fig = px.bar(df.sort_values(x), x=x, y=y, orientation="h", range_x=[0, 1])
+    fig.add_vline(
+        x=threshold,
+        line_dash="dash",
+        annotation_text=f"Seuil {threshold:.2f}",
+        annotation_position="top left"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def radar_figure(version: Tuple, _block_df: pd.DataFrame, threshold: float):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    b = _block_df.copy()
+    b["Score"] = b["Score"].clip(0, 1)
+    fig = px.line_polar(b, r="Score", theta="BlockName", line_close=True, range_r=[0, 1])
+    fig.update_traces(fill="toself")
+    thetas = list(b["BlockName"])
+    if len(thetas) >= 3:
+        fig.add_trace(go.Scatterpolar(
+            r=[threshold]*len(thetas),
+            theta=thetas,
+            mode="lines",
+            line=dict(dash="dash"),
+            name=f"Seuil {threshold:.2f}"
+        ))
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def top_competencies_figure(version: Tuple, top_n: int, _comp_df: pd.DataFrame, threshold: float):
+    return _hbar(_comp_df.head(top_n), "Score", "CompetencyText", threshold)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def block_figure(version: Tuple, block: str, _sub: pd.DataFrame, threshold: float):
+    return _hbar(_sub, "Score", "CompetencyText", threshold)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def jobs_figure(version: Tuple, _top_jobs: pd.DataFrame, x: str, y: str, threshold: float):
+    return _hbar(_top_jobs, x, y, threshold)
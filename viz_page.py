@@ -1,25 +1,12 @@
-from pathlib import Path
-import json
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
-import requests
-from io import StringIO
-
-GITHUB_REPO = "Amik24/semantic-analysis-project"
-BASE_RAW_URL = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main"
-
-def load_from_github(file_path):
-    url = f"{BASE_RAW_URL}/{file_path}"
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.text
-        return None
-    except Exception:
-        return None
+
+from results_loader import BASE_RAW_URL, COLUMNAR_FILE, EVIDENCE_FILE, RESULT_FILES, GitHubSource
+from viz_data import block_figure, jobs_figure, prepare_results, radar_figure, top_competencies_figure
+
+@st.cache_resource
+def get_results_source():
+    # Une seule session HTTP + cache (TTL / ETag) partagés entre les reruns
+    return GitHubSource(BASE_RAW_URL)
 
 def render_header():
     PRIMARY = "#177E7B"
@@ -63,12 +50,13 @@ def show_visualisations():
 
     SEUIL_FORT = 0.70
 
+    source = get_results_source()
     with st.spinner("Chargement des résultats depuis GitHub..."):
-        comp_content = load_from_github("outputs/competency_scores.csv")
-        block_content = load_from_github("outputs/block_scores.csv")
-        job_content = load_from_github("outputs/job_scores.csv")
-        summary_content = load_from_github("outputs/results/summary.json")
-        comp_ref_content = load_from_github("data/competencies.csv")
+        contents = source.fetch(RESULT_FILES + [EVIDENCE_FILE])
+        columnar = source.fetch_bytes([COLUMNAR_FILE])[COLUMNAR_FILE]
+    comp_content, block_content, job_content, summary_content, comp_ref_content = (
+        contents[p] for p in RESULT_FILES
+    )
 
     missing = []
     if not comp_content: missing.append("competency_scores.csv")
@@ -82,26 +70,12 @@ def show_visualisations():
         )
         return
 
-    comp_df = pd.read_csv(StringIO(comp_content))
-    block_df = pd.read_csv(StringIO(block_content))
-    job_df = pd.read_csv(StringIO(job_content))
-
-    comp_df.columns = comp_df.columns.str.strip()
-    block_df.columns = block_df.columns.str.strip()
-    job_df.columns = job_df.columns.str.strip()
-
-    summary = {}
-    if summary_content:
-        try:
-            summary = json.loads(summary_content)
-        except Exception:
-            pass
-
-    if comp_ref_content and "BlockName" not in comp_df.columns and "CompetencyID" in comp_df.columns:
-        ref_comp = pd.read_csv(StringIO(comp_ref_content))
-        ref_comp.columns = ref_comp.columns.str.strip()
-        if {"CompetencyID", "BlockName"}.issubset(ref_comp.columns):
-            comp_df = comp_df.merge(ref_comp[["CompetencyID", "BlockName"]], on="CompetencyID", how="left")
+    # Tables parsées / jointes / triées une seule fois par version des résultats
+    version = source.version(RESULT_FILES + [COLUMNAR_FILE, EVIDENCE_FILE])
+    data = prepare_results(version, contents, tuple(RESULT_FILES), columnar, contents[EVIDENCE_FILE])
+    comp_df, block_df, job_df = data["comp_df"], data["block_df"], data["job_df"]
+    summary = data["summary"]
+    job_score_col, job_title_col = data["job_score_col"], data["job_title_col"]
 
     with st.container():
         c1, c2, c3 = st.columns(3)
@@ -111,41 +85,22 @@ def show_visualisations():
             float(block_df["Score"].mean()) if "Score" in block_df.columns else None
         )
 
-        job_score_col = next((c for c in ["JobScore", "Score", "FinalScore"] if c in job_df.columns), None)
-        job_title_col = "JobTitle" if "JobTitle" in job_df.columns else job_df.columns[0]
         if job_score_col and len(job_df):
-            j_sorted = job_df.sort_values(job_score_col, ascending=False)
-            top_job = str(j_sorted.iloc[0][job_title_col])
-            top_job_score = float(j_sorted.iloc[0][job_score_col])
+            top_job = str(job_df.iloc[0][job_title_col])
+            top_job_score = float(job_df.iloc[0][job_score_col])
         else:
             top_job, top_job_score = "—", None
 
-        matched = int((comp_df["Score"] > 0.0).sum()) if "Score" in comp_df.columns else 0
-        total = int(len(comp_df))
-
         c1.metric("Score global de couverture", f"{final_cov:.2f}" if final_cov is not None else "—")
         c2.metric("Métier recommandé #1", top_job, delta=(f"{top_job_score:.2f}" if top_job_score is not None else None))
-        c3.metric("Compétences détectées", f"{matched}/{total}")
+        c3.metric("Compétences détectées", f"{data['matched']}/{data['total']}")
 
     st.caption("Lecture : moyenne des blocs. ≥ 0,70 = bon alignement.")
     st.markdown("---")
 
     st.subheader("Couverture par bloc")
     if {"BlockName", "Score"}.issubset(block_df.columns) and len(block_df) >= 3:
-        b = block_df.copy()
-        b["Score"] = b["Score"].clip(0, 1)
-        fig = px.line_polar(b, r="Score", theta="BlockName", line_close=True, range_r=[0, 1])
-        fig.update_traces(fill="toself")
-        thetas = list(b["BlockName"])
-        if len(thetas) >= 3:
-            fig.add_trace(go.Scatterpolar(
-                r=[SEUIL_FORT]*len(thetas),
-                theta=thetas,
-                mode="lines",
-                line=dict(dash="dash"),
-                name=f"Seuil {SEUIL_FORT:.2f}"
-            ))
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(radar_figure(version, block_df, SEUIL_FORT), use_container_width=True)
     else:
         st.info("Il faut 'BlockName' et 'Score' dans block_scores.csv.")
 
@@ -154,79 +109,46 @@ def show_visualisations():
         default_n = min(10, len(comp_df))
         top_n = st.slider("Nombre de compétences à afficher :", 5, 35, default_n, step=1)
 
-        top_comp = comp_df.sort_values("Score", ascending=False).head(top_n)
+        top_comp = comp_df.head(top_n)
+        st.plotly_chart(top_competencies_figure(version, top_n, comp_df, SEUIL_FORT), use_container_width=True)
 
-        fig2 = px.bar(
-            top_comp.sort_values("Score"),
-            x="Score",
-            y="CompetencyText",
-            orientation="h",
-            range_x=[0, 1]
-        )
-        fig2.add_vline(
-            x=SEUIL_FORT,
-            line_dash="dash",
-            annotation_text=f"Seuil {SEUIL_FORT:.2f}",
-            annotation_position="top left"
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        # Mode "max" : réponse qui a le plus contribué à chaque compétence
+        if "Evidence" in top_comp.columns and top_comp["Evidence"].notna().any():
+            with st.expander("Pourquoi ces compétences ?"):
+                for _, row in top_comp.dropna(subset=["Evidence"]).iterrows():
+                    st.write(f"**{row['CompetencyText']}** — correspond grâce à votre réponse "
+                             f"« {row['Evidence']} » ({row['EvidenceSimilarity']:.2f})")
 
         with st.expander("Voir le tableau détaillé"):
-            st.dataframe(top_comp.reset_index(drop=True))
+            st.dataframe(top_comp)
     else:
         st.info("Il faut 'CompetencyText' et 'Score' dans competency_scores.csv.")
 
     st.subheader("Détail par bloc")
     if "BlockName" in comp_df.columns:
-        blocks = list(dict.fromkeys(comp_df["BlockName"].dropna().tolist()))
+        blocks = data["blocks"]
         if blocks:
             sel = st.selectbox("Choisir un bloc", blocks, index=0)
-            sub = comp_df.loc[comp_df["BlockName"] == sel]
-            fig3 = px.bar(
-                sub.sort_values("Score", ascending=True),
-                x="Score",
-                y="CompetencyText",
-                orientation="h",
-                range_x=[0, 1]
-            )
-            fig3.add_vline(
-                x=SEUIL_FORT,
-                line_dash="dash",
-                annotation_text=f"Seuil {SEUIL_FORT:.2f}",
-                annotation_position="top left"
-            )
-            st.plotly_chart(fig3, use_container_width=True)
-            st.dataframe(sub.reset_index(drop=True))
+            sub = data["block_subsets"][sel]
+            st.plotly_chart(block_figure(version, sel, sub, SEUIL_FORT), use_container_width=True)
+            st.dataframe(sub)
         else:
             st.info("Aucun 'BlockName' trouvé.")
     else:
         st.info("Ajoute 'BlockName' via jointure avec competencies.csv si nécessaire.")
 
     st.subheader("Recommandations de métiers")
-    job_score_col = next((c for c in ["JobScore", "Score", "FinalScore"] if c in job_df.columns), None)
-    job_title_col = "JobTitle" if "JobTitle" in job_df.columns else job_df.columns[0]
     if job_score_col:
-        top_jobs = job_df.sort_values(job_score_col, ascending=False).head(5)
-        fig4 = px.bar(
-            top_jobs.sort_values(job_score_col),
-            x=job_score_col,
-            y=job_title_col,
-            orientation="h",
-            range_x=[0, 1]
-        )
-        fig4.add_vline(
-            x=SEUIL_FORT,
-            line_dash="dash",
-            annotation_text=f"Seuil {SEUIL_FORT:.2f}",
-            annotation_position="top left"
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+        top_jobs = job_df.head(5)
+        st.plotly_chart(jobs_figure(version, top_jobs, job_score_col, job_title_col, SEUIL_FORT),
+                        use_container_width=True)
         for _, row in top_jobs.iterrows():
             st.write(f"**{row[job_title_col]}** — {row[job_score_col]:.2f}")
     else:
         st.info("Colonne de score manquante pour les jobs.")
 
     if st.button("🔄 Rafraîchir les résultats"):
+        source.invalidate()
         st.rerun()
 
 if __name__ == "__main__":